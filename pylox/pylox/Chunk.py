@@ -0,0 +1,71 @@
+from array import array
+from enum import IntEnum, auto
+from typing import Final
+
+
+class OpCode(IntEnum):
+    CONSTANT = 0
+    NIL = auto()
+    TRUE = auto()
+    FALSE = auto()
+    POP = auto()
+    GET_LOCAL = auto()
+    SET_LOCAL = auto()
+    GET_GLOBAL = auto()
+    DEFINE_GLOBAL = auto()
+    SET_GLOBAL = auto()
+    GET_UPVALUE = auto()
+    SET_UPVALUE = auto()
+    GET_PROPERTY = auto()
+    SET_PROPERTY = auto()
+    GET_SUPER = auto()
+    EQUAL = auto()
+    NOT_EQUAL = auto()
+    GREATER = auto()
+    GREATER_EQUAL = auto()
+    LESS = auto()
+    LESS_EQUAL = auto()
+    ADD = auto()
+    SUBTRACT = auto()
+    MULTIPLY = auto()
+    DIVIDE = auto()
+    NOT = auto()
+    NEGATE = auto()
+    PRINT = auto()
+    JUMP = auto()
+    JUMP_IF_FALSE = auto()
+    LOOP = auto()
+    CALL = auto()
+    INVOKE = auto()
+    SUPER_INVOKE = auto()
+    TAIL_CALL = auto()
+    TAIL_INVOKE = auto()
+    CLOSURE = auto()
+    CLOSE_UPVALUE = auto()
+    RETURN = auto()
+    CLASS = auto()
+    INHERIT = auto()
+    METHOD = auto()
+
+
+# A constant index, local slot or upvalue index is a single byte operand.
+UINT8_COUNT: Final[int] = 256
+# Jump offsets are two byte operands.
+UINT16_MAX: Final[int] = 65535
+
+
+class Chunk:
+    """A flat sequence of bytecode with its line table and constant pool."""
+
+    def __init__(self) -> None:
+        self.code: Final[array[int]] = array("B")
+        self.lines: Final[array[int]] = array("i")
+        self.constants: Final[list[object]] = []
+
+    def write(self, byte: int, line: int) -> None:
+        self.code.append(byte)
+        self.lines.append(line)
+
+    def add_constant(self, value: object) -> int:
+        self.constants.append(value)
+        return len(self.constants) - 1
@@ -0,0 +1,816 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable, Final, Optional, Type, override
+from Expr import (
+    Assign,
+    Binary,
+    Call,
+    Expr,
+    Get,
+    Grouping,
+    Literal,
+    Logical,
+    Set,
+    Super,
+    This,
+    Unary,
+    Variable,
+    Visitor as ExprVisitor,
+)
+from Stmt import (
+    Block,
+    Class,
+    Expression,
+    For,
+    Function,
+    If,
+    Print,
+    Return as StmtReturn,
+    Stmt,
+    Var,
+    Visitor as StmtVisitor,
+    While,
+)
+from Token import Token
+from TokenTypes import TokenType
+from RuntimeError import RuntimeError
+from Environment import CELL, LOCAL, Cell, Environment
+from GlobalEnvironment import UNDEFINED, GlobalCell, GlobalEnvironment
+from LoxFunction import LoxFunction
+from Return import Return
+
+if TYPE_CHECKING:
+    from Interpreter import Interpreter
+    from LoxCallable import LoxCallable
+    from LoxClass import LoxClass
+    from LoxInstance import LoxInstance
+
+# Compiled code runs against the Environment of the running function, or of
+# top-level code. A statement that may execute a return statement completes
+# with None or a Return; what any other statement returns is ignored.
+type CompiledExpr = Callable[[Environment], object]
+type CompiledStmt = Callable[[Environment], object]
+
+
+class CompiledFunction(LoxFunction):
+    """A LoxFunction whose body has already been compiled to closures."""
+
+    def __init__(
+        self,
+        declaration: Function,
+        cells: tuple[Cell, ...],
+        is_initializer: bool,
+        body: CompiledStmt,
+        receiver: Optional[LoxInstance] = None,
+    ) -> None:
+        super().__init__(declaration, cells, is_initializer, receiver)
+        self._body: Final[CompiledStmt] = body
+
+    @override
+    def bind(self, instance: LoxInstance):
+        return CompiledFunction(
+            self._declaration, self._cells, self._is_initializer, self._body, instance
+        )
+
+    @override
+    def invoke(self, interpreter: Interpreter, values: list[object]) -> Optional[object]:
+        completion: object = self._body(self._environment(interpreter, values))
+
+        if self._is_initializer:
+            return self._this(values)
+        if type(completion) is Return:
+            return completion.value
+        return None
+
+
+class ClosureCompiler(ExprVisitor[CompiledExpr], StmtVisitor[CompiledStmt]):
+    """Compiles a resolved syntax tree into nested Python closures.
+
+    Every node is visited exactly once: operators are selected and resolved
+    accesses and slots are looked up at compile time, so running the result
+    involves no visitor dispatch and no per-evaluation `match`.
+    """
+
+    def __init__(
+        self,
+        interpreter: Interpreter,
+        globals: GlobalEnvironment,
+        callable_interface: Type[LoxCallable],
+        klass_class: Type[LoxClass],
+        instance_class: Type[LoxInstance],
+        stringify: Callable[[object], str],
+    ) -> None:
+        self._interpreter: Final[Interpreter] = interpreter
+        self._globals: Final[GlobalEnvironment] = globals
+        self._callable_interface: Final[Type[LoxCallable]] = callable_interface
+        self._klass_class: Final[Type[LoxClass]] = klass_class
+        self._instance_class: Final[Type[LoxInstance]] = instance_class
+        self._stringify: Final[Callable[[object], str]] = stringify
+        # Return statements compiled so far in the current function body.
+        self._returns: int = 0
+
+    def compile(self, statements: list[Stmt]) -> CompiledStmt:
+        compiled: list[tuple[CompiledStmt, bool]] = [
+            self._completing_statement(s) for s in statements
+        ]
+
+        if len(compiled) == 1:
+            return compiled[0][0]
+
+        if not any(may_return for _, may_return in compiled):
+            statements_only: list[CompiledStmt] = [s for s, _ in compiled]
+
+            def sequence(env: Environment) -> None:
+                for statement in statements_only:
+                    statement(env)
+
+            return sequence
+
+        def returning_sequence(env: Environment) -> object:
+            for statement, may_return in compiled:
+                completion = statement(env)
+                if may_return and completion is not None:
+                    return completion
+            return None
+
+        return returning_sequence
+
+    def _statement(self, stmt: Stmt) -> CompiledStmt:
+        return stmt.accept(self)
+
+    def _completing_statement(self, stmt: Stmt) -> tuple[CompiledStmt, bool]:
+        """Compiles stmt and tells whether it may execute a return statement."""
+        returns: int = self._returns
+        compiled: CompiledStmt = stmt.accept(self)
+        return compiled, self._returns != returns
+
+    def _compile_function(self, declaration: Function) -> CompiledStmt:
+        if declaration.lazy is not None:
+            return self._compile_lazily(declaration)
+
+        returns: int = self._returns
+        try:
+            return self.compile(declaration.body)
+        finally:
+            self._returns = returns
+
+    def _compile_lazily(self, declaration: Function) -> CompiledStmt:
+        # The body has been parsed and resolved by the time it first runs,
+        # since setting up the function's environment sees to that.
+        compiled: Optional[CompiledStmt] = None
+
+        def lazy_body(env: Environment) -> object:
+            nonlocal compiled
+            if compiled is None:
+                compiled = self._compile_function(declaration)
+            return compiled(env)
+
+        return lazy_body
+
+    def _expression(self, expr: Expr) -> CompiledExpr:
+        return expr.accept(self)
+
+    def _define(self, declaration: Var | Function | Class, value: CompiledExpr) -> CompiledStmt:
+        slot: Optional[int] = declaration.slot
+        if slot is None:
+            cell: GlobalCell = self._globals.cell(declaration.name.lexeme)
+
+            def define_global(env: Environment) -> None:
+                cell.value = value(env)
+
+            return define_global
+
+        if declaration.captured:
+
+            def define_captured(env: Environment) -> None:
+                env.values[slot] = Cell(value(env))
+
+            return define_captured
+
+        def define_local(env: Environment) -> None:
+            env.values[slot] = value(env)
+
+        return define_local
+
+    def _capture(self, declaration: Function) -> Callable[[Environment], tuple[Cell, ...]]:
+        """Compiles collecting the cells a function captures when created."""
+        upvalues = declaration.upvalues
+        if not upvalues:
+            return lambda env: ()
+
+        def capture(env: Environment) -> tuple[Cell, ...]:
+            return tuple(
+                env.values[index] if is_local else env.cells[index]  # type: ignore[reportGeneralTypeIssues]
+                for is_local, index in upvalues
+            )
+
+        return capture
+
+    @override
+    def visit_Block_Stmt(self, stmt: Block) -> CompiledStmt:
+        # Locals of the block have slots in the function's environment.
+        return self.compile(stmt.statements)
+
+    @override
+    def visit_Class_Stmt(self, stmt: Class) -> CompiledStmt:
+        super_token: Optional[Token] = None
+        super_class_expr: Optional[CompiledExpr] = None
+        if stmt.super_class is not None:
+            super_token = stmt.super_class.name
+            super_class_expr = self._expression(stmt.super_class)
+        methods = [
+            (method, self._capture(method), self._compile_function(method))
+            for method in stmt.methods
+        ]
+        name: str = stmt.name.lexeme
+        klass_class = self._klass_class
+        slot: Optional[int] = stmt.slot
+        super_slot: Optional[int] = stmt.super_slot
+        captured: Optional[bool] = stmt.captured
+
+        def klass(env: Environment) -> object:
+            super_class: object = None
+            if super_class_expr is not None:
+                super_class = super_class_expr(env)
+                if not isinstance(super_class, klass_class):
+                    raise RuntimeError(super_token, "Superclass must be a class.")  # type: ignore[reportArgumentType]
+
+            # Methods capture "super", and the class itself if it is a local
+            # they use, when they are created, so those cells come first.
+            cell: Optional[Cell] = None
+            if captured:
+                cell = env.values[slot] = Cell(None)  # type: ignore[reportArgumentType]
+            if super_slot is not None:
+                env.values[super_slot] = Cell(super_class)
+
+            functions: dict[str, LoxFunction] = {}
+            for method, capture, body in methods:
+                is_init = method.name.lexeme == "init"
+                functions[method.name.lexeme] = CompiledFunction(
+                    method, capture(env), is_init, body
+                )
+
+            value = klass_class(name, super_class, functions)  # type: ignore[reportArgumentType]
+            if cell is not None:
+                cell.value = value
+            return value
+
+        if captured:
+            return klass
+        return self._define(stmt, klass)
+
+    @override
+    def visit_Expression_Stmt(self, stmt: Expression) -> CompiledStmt:
+        return self._expression(stmt.expression)
+
+    @override
+    def visit_Function_Stmt(self, stmt: Function) -> CompiledStmt:
+        body: CompiledStmt = self._compile_function(stmt)
+        capture = self._capture(stmt)
+
+        if stmt.captured:
+            slot: int = stmt.slot  # type: ignore[reportAssignmentType]
+
+            # The cell goes in first, so a local function can capture itself.
+            def recursive_function(env: Environment) -> None:
+                cell: Cell = Cell(None)
+                env.values[slot] = cell
+                cell.value = CompiledFunction(stmt, capture(env), False, body)
+
+            return recursive_function
+
+        def function(env: Environment) -> object:
+            return CompiledFunction(stmt, capture(env), False, body)
+
+        return self._define(stmt, function)
+
+    @override
+    def visit_If_Stmt(self, stmt: If) -> CompiledStmt:
+        condition: CompiledExpr = self._expression(stmt.condition)
+        then_branch, then_returns = self._completing_statement(stmt.thenBranch)
+        else_branch: Optional[CompiledStmt] = None
+        else_returns: bool = False
+        if stmt.elseBranch:
+            else_branch, else_returns = self._completing_statement(stmt.elseBranch)
+
+        if then_returns or else_returns:
+            then_branch = self._completes_normally(then_branch, then_returns)
+            if else_branch is not None:
+                else_branch = self._completes_normally(else_branch, else_returns)
+
+            def if_returning(env: Environment) -> object:
+                value = condition(env)
+                if value is not None and value is not False:
+                    return then_branch(env)
+                if else_branch is not None:
+                    return else_branch(env)
+                return None
+
+            return if_returning
+
+        if else_branch is None:
+
+            def if_then(env: Environment) -> None:
+                value = condition(env)
+                if value is not None and value is not False:
+                    then_branch(env)
+
+            return if_then
+
+        def if_else(env: Environment) -> None:
+            value = condition(env)
+            if value is not None and value is not False:
+                then_branch(env)
+            else:
+                else_branch(env)  # type: ignore[reportOptionalCall]
+
+        return if_else
+
+    def _completes_normally(self, compiled: CompiledStmt, may_return: bool) -> CompiledStmt:
+        """Makes a statement that can't return complete with None."""
+        if may_return:
+            return compiled
+
+        def statement(env: Environment) -> None:
+            compiled(env)
+
+        return statement
+
+    @override
+    def visit_Print_Stmt(self, stmt: Print) -> CompiledStmt:
+        expression: CompiledExpr = self._expression(stmt.expression)
+        stringify = self._stringify
+
+        def print_stmt(env: Environment) -> None:
+            print(stringify(expression(env)))
+
+        return print_stmt
+
+    @override
+    def visit_Return_Stmt(self, stmt: StmtReturn) -> CompiledStmt:
+        self._returns += 1
+        if not stmt.value:
+
+            def return_nil(env: Environment) -> Return:
+                return Return(None)
+
+            return return_nil
+
+        value: CompiledExpr = self._expression(stmt.value)
+
+        def return_value(env: Environment) -> Return:
+            return Return(value(env))
+
+        return return_value
+
+    @override
+    def visit_Var_Stmt(self, stmt: Var) -> CompiledStmt:
+        if not stmt.initializer:
+
+            def nil(env: Environment) -> object:
+                return None
+
+            return self._define(stmt, nil)
+
+        return self._define(stmt, self._expression(stmt.initializer))
+
+    @override
+    def visit_For_Stmt(self, stmt: For) -> CompiledStmt:
+        initializer: Optional[CompiledStmt] = None
+        if stmt.initializer is not None:
+            initializer = self._statement(stmt.initializer)
+        condition: CompiledExpr = self._expression(stmt.condition)
+        body, body_returns = self._completing_statement(stmt.body)
+        increment: Optional[CompiledExpr] = None
+        if stmt.increment is not None:
+            increment = self._expression(stmt.increment)
+
+        def for_loop(env: Environment) -> object:
+            if initializer is not None:
+                initializer(env)
+            value = condition(env)
+            while value is not None and value is not False:
+                completion = body(env)
+                if body_returns and completion is not None:
+                    return completion
+                if increment is not None:
+                    increment(env)
+                value = condition(env)
+            return None
+
+        return for_loop
+
+    @override
+    def visit_While_Stmt(self, stmt: While) -> CompiledStmt:
+        condition: CompiledExpr = self._expression(stmt.condition)
+        body, body_returns = self._completing_statement(stmt.body)
+
+        if body_returns:
+
+            def returning_loop(env: Environment) -> object:
+                value = condition(env)
+                while value is not None and value is not False:
+                    completion = body(env)
+                    if completion is not None:
+                        return completion
+                    value = condition(env)
+                return None
+
+            return returning_loop
+
+        def while_loop(env: Environment) -> None:
+            value = condition(env)
+            while value is not None and value is not False:
+                body(env)
+                value = condition(env)
+
+        return while_loop
+
+    @override
+    def visit_Assign_Expr(self, expr: Assign) -> CompiledExpr:
+        value: CompiledExpr = self._expression(expr.value)
+        name: Token = expr.name
+        access: Optional[int] = expr.access
+        slot: int = expr.slot  # type: ignore[reportAssignmentType]
+
+        if access is None:
+            globals = self._globals
+            cell: GlobalCell = globals.cell(name.lexeme)
+
+            def assign_global(env: Environment) -> object:
+                result = value(env)
+                if cell.value is UNDEFINED:
+                    globals.assign(name, result)
+                cell.value = result
+                return result
+
+            return assign_global
+
+        if access == LOCAL:
+
+            def assign_local(env: Environment) -> object:
+                result = value(env)
+                env.values[slot] = result
+                return result
+
+            return assign_local
+
+        if access == CELL:
+
+            def assign_cell(env: Environment) -> object:
+                result = value(env)
+                env.values[slot].value = result  # type: ignore[reportAttributeAccessIssue]
+                return result
+
+            return assign_cell
+
+        def assign_upvalue(env: Environment) -> object:
+            result = value(env)
+            env.cells[slot].value = result
+            return result
+
+        return assign_upvalue
+
+    @override
+    def visit_Binary_Expr(self, expr: Binary) -> CompiledExpr:
+        left: CompiledExpr = self._expression(expr.left)
+        right: CompiledExpr = self._expression(expr.right)
+        operator: Token = expr.operator
+
+        match operator.type:
+            case TokenType.PLUS:
+
+                def add(env: Environment) -> object:
+                    a = left(env)
+                    b = right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a + b
+                    if isinstance(a, str) and isinstance(b, str):
+                        return a + b
+                    raise RuntimeError(
+                        operator, "Operands must be two numbers or two strings."
+                    )
+
+                return add
+            case TokenType.MINUS:
+
+                def subtract(env: Environment) -> object:
+                    a = left(env)
+                    b = right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a - b
+                    raise RuntimeError(operator, "Operands must be numbers.")
+
+                return subtract
+            case TokenType.STAR:
+
+                def multiply(env: Environment) -> object:
+                    a = left(env)
+                    b = right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a * b
+                    raise RuntimeError(operator, "Operands must be numbers.")
+
+                return multiply
+            case TokenType.SLASH:
+
+                def divide(env: Environment) -> object:
+                    a = left(env)
+                    b = right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        if b == 0:
+                            raise RuntimeError(operator, "Right operand cannot be 0.")
+                        return a / b
+                    raise RuntimeError(operator, "Operands must be numbers.")
+
+                return divide
+            case TokenType.LESS:
+
+                def less(env: Environment) -> object:
+                    a = left(env)
+                    b = right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a < b
+                    raise RuntimeError(operator, "Operands must be numbers.")
+
+                return less
+            case TokenType.LESS_EQUAL:
+
+                def less_equal(env: Environment) -> object:
+                    a = left(env)
+                    b = right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a <= b
+                    raise RuntimeError(operator, "Operands must be numbers.")
+
+                return less_equal
+            case TokenType.GREATER:
+
+                def greater(env: Environment) -> object:
+                    a = left(env)
+                    b = right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a > b
+                    raise RuntimeError(operator, "Operands must be numbers.")
+
+                return greater
+            case TokenType.GREATER_EQUAL:
+
+                def greater_equal(env: Environment) -> object:
+                    a = left(env)
+                    b = right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a >= b
+                    raise RuntimeError(operator, "Operands must be numbers.")
+
+                return greater_equal
+            case TokenType.EQUAL_EQUAL:
+
+                def equal(env: Environment) -> object:
+                    a = left(env)
+                    b = right(env)
+                    return type(a) is type(b) and a == b
+
+                return equal
+            case TokenType.BANG_EQUAL:
+
+                def not_equal(env: Environment) -> object:
+                    a = left(env)
+                    b = right(env)
+                    return type(a) is not type(b) or a != b
+
+                return not_equal
+            case _:
+                raise AssertionError(f"Unknown binary operator {operator.type}.")
+
+    @override
+    def visit_Call_Expr(self, expr: Call) -> CompiledExpr:
+        callee: CompiledExpr = self._expression(expr.callee)
+        arguments: list[CompiledExpr] = [self._expression(a) for a in expr.arguments]
+        line: int = expr.line
+        interpreter = self._interpreter
+        callable_interface = self._callable_interface
+
+        if type(expr.callee) is Get:
+            return self._invoke(expr.callee, arguments, line)
+
+        def call(env: Environment) -> object:
+            function = callee(env)
+            values: list[object] = [argument(env) for argument in arguments]
+
+            if not isinstance(function, callable_interface):
+                raise RuntimeError(line, "Can only call functions and classes.")
+
+            if len(values) != function.arity():
+                raise RuntimeError(
+                    line,
+                    f"Expected {function.arity()} arguments but got {len(values)}.",
+                )
+
+            # Lox calls recurse in Python here, so running out of host stack
+            # is how a Lox program overflows its own.
+            try:
+                return function.call(interpreter, values)
+            except RecursionError:
+                raise RuntimeError(line, "Stack overflow.") from None
+
+        return call
+
+    def _invoke(self, site: Get, arguments: list[CompiledExpr], line: int) -> CompiledExpr:
+        obj: CompiledExpr = self._expression(site.object)
+        name: Token = site.name
+        interpreter = self._interpreter
+        callable_interface = self._callable_interface
+        instance_class = self._instance_class
+
+        def invoke(env: Environment) -> object:
+            instance = obj(env)
+            if not isinstance(instance, instance_class):
+                raise RuntimeError(name, "Only instances have properties.")
+
+            method: Optional[LoxFunction] = instance.get_method(site)
+            if method is not None:
+                # Call the method with "this" in its first slot rather than
+                # allocating a bound method just to call it once.
+                values: list[object] = [instance]
+                values.extend([argument(env) for argument in arguments])
+                if len(values) - 1 != method.arity():
+                    raise RuntimeError(
+                        line,
+                        f"Expected {method.arity()} arguments but got {len(values) - 1}.",
+                    )
+                try:
+                    return method.invoke(interpreter, values)
+                except RecursionError:
+                    raise RuntimeError(line, "Stack overflow.") from None
+
+            function = instance.get(name)
+            values = [argument(env) for argument in arguments]
+
+            if not isinstance(function, callable_interface):
+                raise RuntimeError(line, "Can only call functions and classes.")
+
+            if len(values) != function.arity():
+                raise RuntimeError(
+                    line,
+                    f"Expected {function.arity()} arguments but got {len(values)}.",
+                )
+
+            try:
+                return function.call(interpreter, values)
+            except RecursionError:
+                raise RuntimeError(line, "Stack overflow.") from None
+
+        return invoke
+
+    @override
+    def visit_Get_Expr(self, expr: Get) -> CompiledExpr:
+        obj: CompiledExpr = self._expression(expr.object)
+        name: Token = expr.name
+        instance_class = self._instance_class
+
+        def get(env: Environment) -> object:
+            instance = obj(env)
+            if isinstance(instance, instance_class):
+                return instance.get(name, expr)
+            raise RuntimeError(name, "Only instances have properties.")
+
+        return get
+
+    @override
+    def visit_Grouping_Expr(self, expr: Grouping) -> CompiledExpr:
+        return self._expression(expr.expression)
+
+    @override
+    def visit_Literal_Expr(self, expr: Literal) -> CompiledExpr:
+        value: object = expr.value
+
+        def literal(env: Environment) -> object:
+            return value
+
+        return literal
+
+    @override
+    def visit_Logical_Expr(self, expr: Logical) -> CompiledExpr:
+        left: CompiledExpr = self._expression(expr.left)
+        right: CompiledExpr = self._expression(expr.right)
+
+        if expr.operator.type == TokenType.OR:
+
+            def logical_or(env: Environment) -> object:
+                value = left(env)
+                if value is not None and value is not False:
+                    return value
+                return right(env)
+
+            return logical_or
+
+        def logical_and(env: Environment) -> object:
+            value = left(env)
+            if value is None or value is False:
+                return value
+            return right(env)
+
+        return logical_and
+
+    @override
+    def visit_Set_Expr(self, expr: Set) -> CompiledExpr:
+        obj: CompiledExpr = self._expression(expr.object)
+        value: CompiledExpr = self._expression(expr.value)
+        name: Token = expr.name
+        instance_class = self._instance_class
+
+        def set_property(env: Environment) -> object:
+            instance = obj(env)
+            if not isinstance(instance, instance_class):
+                raise RuntimeError(name, "Only instances have fields.")
+            result = value(env)
+            instance.set(name, result, expr)
+            return result
+
+        return set_property
+
+    @override
+    def visit_Super_Expr(self, expr: Super) -> CompiledExpr:
+        slot: int = expr.slot  # type: ignore[reportAssignmentType]
+        this: CompiledExpr = self._expression(expr.this)
+        method: Token = expr.method
+
+        def super_expr(env: Environment) -> object:
+            # Only methods use "super", so they always find it among their cells.
+            super_class: LoxClass = env.cells[slot].value  # type: ignore[reportAssignmentType]
+            instance: LoxInstance = this(env)  # type: ignore[reportAssignmentType]
+            if super_class is expr.cached_class:
+                return expr.cached_method.bind(instance)  # type: ignore[reportOptionalMemberAccess]
+            function = super_class.find_method(method.lexeme)
+            if function is None:
+                raise RuntimeError(method, f"Undefined property '{method.lexeme}'.")
+            expr.cached_class = super_class
+            expr.cached_method = function
+            return function.bind(instance)
+
+        return super_expr
+
+    @override
+    def visit_This_Expr(self, expr: This) -> CompiledExpr:
+        return self._look_up_variable(expr.keyword, expr.access, expr.slot)
+
+    @override
+    def visit_Unary_Expr(self, expr: Unary) -> CompiledExpr:
+        right: CompiledExpr = self._expression(expr.right)
+        operator: Token = expr.operator
+
+        if operator.type == TokenType.BANG:
+
+            def not_expr(env: Environment) -> object:
+                value = right(env)
+                return value is None or value is False
+
+            return not_expr
+
+        def negate(env: Environment) -> object:
+            value = right(env)
+            if isinstance(value, float):
+                return -value
+            raise RuntimeError(operator, "Operand must be a number.")
+
+        return negate
+
+    @override
+    def visit_Variable_Expr(self, expr: Variable) -> CompiledExpr:
+        return self._look_up_variable(expr.name, expr.access, expr.slot)
+
+    def _look_up_variable(
+        self, name: Token, access: Optional[int], slot: Optional[int]
+    ) -> CompiledExpr:
+        if access is None:
+            globals = self._globals
+            # The cell is bound now, whether or not the global is defined
+            # yet; reading it before it is defined is still an error.
+            cell: GlobalCell = globals.cell(name.lexeme)
+
+            def global_variable(env: Environment) -> object:
+                value = cell.value
+                if value is UNDEFINED:
+                    return globals.get(name)
+                return value
+
+            return global_variable
+
+        if access == LOCAL:
+
+            def local_variable(env: Environment) -> object:
+                return env.values[slot]  # type: ignore[reportCallIssue]
+
+            return local_variable
+
+        if access == CELL:
+
+            def cell_variable(env: Environment) -> object:
+                return env.values[slot].value  # type: ignore[reportAttributeAccessIssue]
+
+            return cell_variable
+
+        def upvalue_variable(env: Environment) -> object:
+            return env.cells[slot].value  # type: ignore[reportCallIssue]
+
+        return upvalue_variable
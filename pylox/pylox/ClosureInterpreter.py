@@ -0,0 +1,50 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable, Type, override
+
+from ClosureCompiler import ClosureCompiler, CompiledStmt
+from Interpreter import Interpreter
+from RuntimeError import RuntimeError
+from Stmt import Stmt
+
+if TYPE_CHECKING:
+    from LoxCallable import LoxCallable
+    from LoxFunction import LoxFunction
+    from LoxClass import LoxClass
+    from LoxInstance import LoxInstance
+
+
+class ClosureInterpreter(Interpreter):
+    """Runs programs by compiling them to closures with ClosureCompiler.
+
+    Resolution results and globals are shared with the tree-walking
+    Interpreter; only statement execution differs.
+    """
+
+    def __init__(
+        self,
+        callable_interface: Type[LoxCallable],
+        function_class: Type[LoxFunction],
+        klass_class: Type[LoxClass],
+        instance_class: Type[LoxInstance],
+    ) -> None:
+        super().__init__(callable_interface, function_class, klass_class, instance_class)
+        self._compiler: ClosureCompiler = ClosureCompiler(
+            self,
+            self.globals,
+            callable_interface,
+            klass_class,
+            instance_class,
+            self._stringify,
+        )
+
+    @override
+    def interpret(
+        self,
+        statements: list[Stmt],
+        runtime_error: Callable[[RuntimeError], None],
+    ):
+        program: CompiledStmt = self._compiler.compile(statements)
+        try:
+            program(self._environment)
+        except RuntimeError as e:
+            runtime_error(e)
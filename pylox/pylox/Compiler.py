@@ -0,0 +1,588 @@
+from __future__ import annotations
+from enum import Enum, auto
+from typing import Callable, Final, Optional, override
+from Expr import (
+    Assign,
+    Binary,
+    Call,
+    Expr,
+    Get,
+    Grouping,
+    Literal,
+    Logical,
+    Set,
+    Super,
+    This,
+    Unary,
+    Variable,
+    Visitor as ExprVisitor,
+)
+from Stmt import (
+    Block,
+    Class,
+    Expression,
+    For,
+    Function,
+    If,
+    Print,
+    Return,
+    Stmt,
+    Var,
+    Visitor as StmtVisitor,
+    While,
+)
+from Chunk import UINT16_MAX, UINT8_COUNT, Chunk, OpCode
+from Token import Token
+from TokenTypes import TokenType
+from VMObject import ObjFunction
+
+
+class _FunctionType(Enum):
+    FUNCTION = auto()
+    INITIALIZER = auto()
+    METHOD = auto()
+    SCRIPT = auto()
+
+
+class _Local:
+    def __init__(self, name: str, depth: int) -> None:
+        self.name: Final[str] = name
+        self.depth: int = depth
+        self.is_captured: bool = False
+
+
+class _Upvalue:
+    def __init__(self, index: int, is_local: bool) -> None:
+        self.index: Final[int] = index
+        self.is_local: Final[bool] = is_local
+
+
+class _FunctionState:
+    def __init__(
+        self,
+        enclosing: Optional[_FunctionState],
+        function: ObjFunction,
+        function_type: _FunctionType,
+    ) -> None:
+        self.enclosing: Final[Optional[_FunctionState]] = enclosing
+        self.function: Final[ObjFunction] = function
+        self.function_type: Final[_FunctionType] = function_type
+        self.upvalues: Final[list[_Upvalue]] = []
+        self.scope_depth: int = 0
+        self.identifiers: Final[dict[str, int]] = {}
+
+        # Slot zero holds the function being called, or the receiver for
+        # methods, so it is unavailable to user code.
+        receiver = ""
+        if function_type != _FunctionType.FUNCTION and function_type != _FunctionType.SCRIPT:
+            receiver = "this"
+        self.locals: Final[list[_Local]] = [_Local(receiver, 0)]
+
+
+class Compiler(ExprVisitor[None], StmtVisitor[None]):
+    """Compiles a resolved syntax tree into bytecode for the VM.
+
+    Static errors have already been reported by the Resolver; the compiler
+    only reports the limits imposed by the bytecode format.
+    """
+
+    def __init__(self, error: Callable[[Token, str], None]) -> None:
+        self._error: Final[Callable[[Token, str], None]] = error
+        self._current: _FunctionState = _FunctionState(
+            None, ObjFunction(None), _FunctionType.SCRIPT
+        )
+        self._token: Optional[Token] = None
+        self._line: int = 0
+        self._had_error: bool = False
+        self._error_token: Optional[Token] = None
+
+    def compile(self, statements: list[Stmt]) -> Optional[ObjFunction]:
+        self._current = _FunctionState(None, ObjFunction(None), _FunctionType.SCRIPT)
+        self._had_error = False
+
+        for statement in statements:
+            statement.accept(self)
+
+        function: ObjFunction = self._end_function().function
+        return None if self._had_error else function
+
+    @override
+    def visit_Block_Stmt(self, stmt: Block) -> None:
+        self._begin_scope()
+        for statement in stmt.statements:
+            statement.accept(self)
+        self._end_scope()
+
+    @override
+    def visit_Class_Stmt(self, stmt: Class) -> None:
+        self._at(stmt.name)
+        name_constant: int = self._identifier_constant(stmt.name)
+        self._declare_variable(stmt.name)
+
+        self._emit(OpCode.CLASS, name_constant)
+        self._define_variable(name_constant)
+
+        if stmt.super_class is not None:
+            stmt.super_class.accept(self)
+
+            self._begin_scope()
+            self._add_local("super", stmt.super_class.name)
+            self._mark_initialized()
+
+            self._named_variable(stmt.name.lexeme, stmt.name, False)
+            self._at(stmt.super_class.name)
+            self._emit(OpCode.INHERIT)
+
+        self._named_variable(stmt.name.lexeme, stmt.name, False)
+        for method in stmt.methods:
+            method_constant: int = self._identifier_constant(method.name)
+            function_type = _FunctionType.METHOD
+            if method.name.lexeme == "init":
+                function_type = _FunctionType.INITIALIZER
+            self._function(method, function_type)
+            self._emit(OpCode.METHOD, method_constant)
+        self._emit(OpCode.POP)
+
+        if stmt.super_class is not None:
+            self._end_scope()
+
+    @override
+    def visit_Expression_Stmt(self, stmt: Expression) -> None:
+        stmt.expression.accept(self)
+        self._emit(OpCode.POP)
+
+    @override
+    def visit_Function_Stmt(self, stmt: Function) -> None:
+        self._at(stmt.name)
+        global_constant: int = self._parse_variable(stmt.name)
+        # A local function can refer to itself, so it is initialized before
+        # its body is compiled.
+        self._mark_initialized()
+        self._function(stmt, _FunctionType.FUNCTION)
+        self._define_variable(global_constant)
+
+    @override
+    def visit_If_Stmt(self, stmt: If) -> None:
+        stmt.condition.accept(self)
+
+        then_jump: int = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._emit(OpCode.POP)
+        stmt.thenBranch.accept(self)
+
+        else_jump: int = self._emit_jump(OpCode.JUMP)
+        self._patch_jump(then_jump)
+        self._emit(OpCode.POP)
+
+        if stmt.elseBranch:
+            stmt.elseBranch.accept(self)
+        self._patch_jump(else_jump)
+
+    @override
+    def visit_Print_Stmt(self, stmt: Print) -> None:
+        stmt.expression.accept(self)
+        self._emit(OpCode.PRINT)
+
+    @override
+    def visit_Return_Stmt(self, stmt: Return) -> None:
+        self._at(stmt.keyword)
+        if not stmt.value:
+            self._emit_return()
+            return
+
+        # A call in tail position reuses the caller's frame. The RETURN after
+        # it only runs when the callee isn't a Lox function and so was called
+        # the ordinary way.
+        if isinstance(stmt.value, Call):
+            self._call(stmt.value, tail=True)
+        else:
+            stmt.value.accept(self)
+        self._at(stmt.keyword)
+        self._emit(OpCode.RETURN)
+
+    @override
+    def visit_Var_Stmt(self, stmt: Var) -> None:
+        self._at(stmt.name)
+        global_constant: int = self._parse_variable(stmt.name)
+
+        if stmt.initializer:
+            stmt.initializer.accept(self)
+        else:
+            self._emit(OpCode.NIL)
+
+        self._define_variable(global_constant)
+
+    @override
+    def visit_For_Stmt(self, stmt: For) -> None:
+        self._begin_scope()
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+
+        loop_start: int = len(self._chunk().code)
+        stmt.condition.accept(self)
+        exit_jump: int = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._emit(OpCode.POP)
+        stmt.body.accept(self)
+        if stmt.increment is not None:
+            stmt.increment.accept(self)
+            self._emit(OpCode.POP)
+        self._emit_loop(loop_start)
+
+        self._patch_jump(exit_jump)
+        self._emit(OpCode.POP)
+        self._end_scope()
+
+    @override
+    def visit_While_Stmt(self, stmt: While) -> None:
+        loop_start: int = len(self._chunk().code)
+        stmt.condition.accept(self)
+
+        exit_jump: int = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._emit(OpCode.POP)
+        stmt.body.accept(self)
+        self._emit_loop(loop_start)
+
+        self._patch_jump(exit_jump)
+        self._emit(OpCode.POP)
+
+    @override
+    def visit_Assign_Expr(self, expr: Assign) -> None:
+        expr.value.accept(self)
+        self._named_variable(expr.name.lexeme, expr.name, True)
+
+    @override
+    def visit_Binary_Expr(self, expr: Binary) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+        self._at(expr.operator)
+        match expr.operator.type:
+            case TokenType.PLUS:
+                self._emit(OpCode.ADD)
+            case TokenType.MINUS:
+                self._emit(OpCode.SUBTRACT)
+            case TokenType.STAR:
+                self._emit(OpCode.MULTIPLY)
+            case TokenType.SLASH:
+                self._emit(OpCode.DIVIDE)
+            case TokenType.LESS:
+                self._emit(OpCode.LESS)
+            case TokenType.LESS_EQUAL:
+                self._emit(OpCode.LESS_EQUAL)
+            case TokenType.GREATER:
+                self._emit(OpCode.GREATER)
+            case TokenType.GREATER_EQUAL:
+                self._emit(OpCode.GREATER_EQUAL)
+            case TokenType.EQUAL_EQUAL:
+                self._emit(OpCode.EQUAL)
+            case TokenType.BANG_EQUAL:
+                self._emit(OpCode.NOT_EQUAL)
+            case _:
+                pass
+
+    @override
+    def visit_Call_Expr(self, expr: Call) -> None:
+        self._call(expr, tail=False)
+
+    def _call(self, expr: Call, tail: bool) -> None:
+        callee: Expr = expr.callee
+
+        # Invocations fuse the property lookup with the call. Errors from
+        # either half are reported on a single line, so only fuse when the
+        # property name and the closing parenthesis share one.
+        if isinstance(callee, Get) and callee.name.line == expr.line:
+            callee.object.accept(self)
+            self._arguments(expr)
+            self._at(callee.name)
+            self._emit(
+                OpCode.TAIL_INVOKE if tail else OpCode.INVOKE,
+                self._identifier_constant(callee.name),
+                len(expr.arguments),
+            )
+            return
+
+        if isinstance(callee, Super) and callee.method.line == expr.line:
+            self._named_variable("this", callee.keyword, False)
+            self._arguments(expr)
+            self._named_variable("super", callee.keyword, False)
+            self._at(callee.method)
+            self._emit(
+                OpCode.SUPER_INVOKE,
+                self._identifier_constant(callee.method),
+                len(expr.arguments),
+            )
+            return
+
+        callee.accept(self)
+        self._arguments(expr)
+        self._line = expr.line
+        self._emit(OpCode.TAIL_CALL if tail else OpCode.CALL, len(expr.arguments))
+
+    def _arguments(self, expr: Call) -> None:
+        for argument in expr.arguments:
+            argument.accept(self)
+
+    @override
+    def visit_Get_Expr(self, expr: Get) -> None:
+        expr.object.accept(self)
+        self._at(expr.name)
+        self._emit(OpCode.GET_PROPERTY, self._identifier_constant(expr.name))
+
+    @override
+    def visit_Grouping_Expr(self, expr: Grouping) -> None:
+        expr.expression.accept(self)
+
+    @override
+    def visit_Literal_Expr(self, expr: Literal) -> None:
+        self._at(expr.token)
+        if expr.value is None:
+            self._emit(OpCode.NIL)
+        elif expr.value is True:
+            self._emit(OpCode.TRUE)
+        elif expr.value is False:
+            self._emit(OpCode.FALSE)
+        else:
+            self._emit(OpCode.CONSTANT, self._make_constant(expr.value, expr.token))
+
+    @override
+    def visit_Logical_Expr(self, expr: Logical) -> None:
+        expr.left.accept(self)
+
+        if expr.operator.type == TokenType.OR:
+            else_jump: int = self._emit_jump(OpCode.JUMP_IF_FALSE)
+            end_jump: int = self._emit_jump(OpCode.JUMP)
+            self._patch_jump(else_jump)
+            self._emit(OpCode.POP)
+            expr.right.accept(self)
+            self._patch_jump(end_jump)
+            return
+
+        end_jump = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._emit(OpCode.POP)
+        expr.right.accept(self)
+        self._patch_jump(end_jump)
+
+    @override
+    def visit_Set_Expr(self, expr: Set) -> None:
+        expr.object.accept(self)
+        expr.value.accept(self)
+        self._at(expr.name)
+        self._emit(OpCode.SET_PROPERTY, self._identifier_constant(expr.name))
+
+    @override
+    def visit_Super_Expr(self, expr: Super) -> None:
+        self._named_variable("this", expr.keyword, False)
+        self._named_variable("super", expr.keyword, False)
+        self._at(expr.method)
+        self._emit(OpCode.GET_SUPER, self._identifier_constant(expr.method))
+
+    @override
+    def visit_This_Expr(self, expr: This) -> None:
+        self._named_variable("this", expr.keyword, False)
+
+    @override
+    def visit_Unary_Expr(self, expr: Unary) -> None:
+        expr.right.accept(self)
+
+        self._at(expr.operator)
+        if expr.operator.type == TokenType.BANG:
+            self._emit(OpCode.NOT)
+        else:
+            self._emit(OpCode.NEGATE)
+
+    @override
+    def visit_Variable_Expr(self, expr: Variable) -> None:
+        self._named_variable(expr.name.lexeme, expr.name, False)
+
+    def _function(self, stmt: Function, function_type: _FunctionType) -> None:
+        self._current = _FunctionState(
+            self._current, ObjFunction(stmt.name.lexeme), function_type
+        )
+        self._begin_scope()
+
+        self._current.function.arity = len(stmt.params)
+        for param in stmt.params:
+            self._declare_variable(param)
+            self._mark_initialized()
+
+        for statement in stmt.body:
+            statement.accept(self)
+
+        state: _FunctionState = self._end_function()
+
+        self._at(stmt.name)
+        self._emit(OpCode.CLOSURE, self._make_constant(state.function, stmt.name))
+        for upvalue in state.upvalues:
+            self._emit(1 if upvalue.is_local else 0, upvalue.index)
+
+    def _end_function(self) -> _FunctionState:
+        self._emit_return()
+        state: _FunctionState = self._current
+        if state.enclosing is not None:
+            self._current = state.enclosing
+        return state
+
+    def _begin_scope(self) -> None:
+        self._current.scope_depth += 1
+
+    def _end_scope(self) -> None:
+        state: _FunctionState = self._current
+        state.scope_depth -= 1
+
+        locals: list[_Local] = state.locals
+        while locals and locals[-1].depth > state.scope_depth:
+            if locals[-1].is_captured:
+                self._emit(OpCode.CLOSE_UPVALUE)
+            else:
+                self._emit(OpCode.POP)
+            locals.pop()
+
+    def _parse_variable(self, name: Token) -> int:
+        self._declare_variable(name)
+        if self._current.scope_depth > 0:
+            return 0
+        return self._identifier_constant(name)
+
+    def _declare_variable(self, name: Token) -> None:
+        if self._current.scope_depth == 0:
+            return
+        self._add_local(name.lexeme, name)
+
+    def _add_local(self, name: str, token: Token) -> None:
+        if len(self._current.locals) == UINT8_COUNT:
+            self._report(token, "Too many local variables in function.")
+            return
+        self._current.locals.append(_Local(name, -1))
+
+    def _mark_initialized(self) -> None:
+        if self._current.scope_depth == 0:
+            return
+        self._current.locals[-1].depth = self._current.scope_depth
+
+    def _define_variable(self, global_constant: int) -> None:
+        if self._current.scope_depth > 0:
+            self._mark_initialized()
+            return
+        self._emit(OpCode.DEFINE_GLOBAL, global_constant)
+
+    def _named_variable(self, name: str, token: Token, assign: bool) -> None:
+        arg: int = self._resolve_local(self._current, name)
+        if arg != -1:
+            get_op, set_op = OpCode.GET_LOCAL, OpCode.SET_LOCAL
+        else:
+            arg = self._resolve_upvalue(self._current, name, token)
+            if arg != -1:
+                get_op, set_op = OpCode.GET_UPVALUE, OpCode.SET_UPVALUE
+            else:
+                arg = self._identifier_constant(token)
+                get_op, set_op = OpCode.GET_GLOBAL, OpCode.SET_GLOBAL
+
+        self._at(token)
+        self._emit(set_op if assign else get_op, arg)
+
+    def _resolve_local(self, state: _FunctionState, name: str) -> int:
+        for i in range(len(state.locals) - 1, -1, -1):
+            if state.locals[i].name == name:
+                return i
+        return -1
+
+    def _resolve_upvalue(self, state: _FunctionState, name: str, token: Token) -> int:
+        if state.enclosing is None:
+            return -1
+
+        local: int = self._resolve_local(state.enclosing, name)
+        if local != -1:
+            state.enclosing.locals[local].is_captured = True
+            return self._add_upvalue(state, local, True, token)
+
+        upvalue: int = self._resolve_upvalue(state.enclosing, name, token)
+        if upvalue != -1:
+            return self._add_upvalue(state, upvalue, False, token)
+
+        return -1
+
+    def _add_upvalue(
+        self, state: _FunctionState, index: int, is_local: bool, token: Token
+    ) -> int:
+        for i, upvalue in enumerate(state.upvalues):
+            if upvalue.index == index and upvalue.is_local == is_local:
+                return i
+
+        if len(state.upvalues) == UINT8_COUNT:
+            self._report(token, "Too many closure variables in function.")
+            return 0
+
+        state.upvalues.append(_Upvalue(index, is_local))
+        state.function.upvalue_count = len(state.upvalues)
+        return len(state.upvalues) - 1
+
+    def _identifier_constant(self, name: Token) -> int:
+        # Unlike clox, identifiers are deduplicated per chunk so that large
+        # scripts referencing many globals do not exhaust the constant pool.
+        identifiers: dict[str, int] = self._current.identifiers
+        constant: Optional[int] = identifiers.get(name.lexeme)
+        if constant is None:
+            constant = self._make_constant(name.lexeme, name)
+            identifiers[name.lexeme] = constant
+        return constant
+
+    def _make_constant(self, value: object, token: Token) -> int:
+        constant: int = self._chunk().add_constant(value)
+        if constant >= UINT8_COUNT:
+            self._report(token, "Too many constants in one chunk.")
+            return 0
+        return constant
+
+    def _emit(self, *data: int) -> None:
+        chunk: Chunk = self._chunk()
+        for byte in data:
+            chunk.write(byte, self._line)
+
+    def _emit_return(self) -> None:
+        if self._current.function_type == _FunctionType.INITIALIZER:
+            self._emit(OpCode.GET_LOCAL, 0)
+        else:
+            self._emit(OpCode.NIL)
+        self._emit(OpCode.RETURN)
+
+    def _emit_jump(self, instruction: OpCode) -> int:
+        self._emit(instruction, 0xFF, 0xFF)
+        return len(self._chunk().code) - 2
+
+    def _patch_jump(self, offset: int) -> None:
+        code = self._chunk().code
+        # -2 to adjust for the bytecode for the jump offset itself.
+        jump: int = len(code) - offset - 2
+        if jump > UINT16_MAX:
+            self._report_here("Too much code to jump over.")
+
+        code[offset] = (jump >> 8) & 0xFF
+        code[offset + 1] = jump & 0xFF
+
+    def _emit_loop(self, loop_start: int) -> None:
+        self._emit(OpCode.LOOP)
+
+        offset: int = len(self._chunk().code) - loop_start + 2
+        if offset > UINT16_MAX:
+            self._report_here("Loop body too large.")
+
+        self._emit((offset >> 8) & 0xFF, offset & 0xFF)
+
+    def _chunk(self) -> Chunk:
+        return self._current.function.chunk
+
+    def _at(self, token: Token) -> None:
+        self._token = token
+        self._line = token.line
+
+    def _report(self, token: Token, message: str) -> None:
+        self._had_error = True
+        # Like clox's panic mode, report only the first error at a token.
+        if token is self._error_token:
+            return
+        self._error_token = token
+        self._error(token, message)
+
+    def _report_here(self, message: str) -> None:
+        # Jumps have no token of their own; blame the last one compiled.
+        assert self._token is not None
+        self._report(self._token, message)
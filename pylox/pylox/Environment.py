@@ -1,46 +1,49 @@
 from __future__ import annotations
-from typing import Final, Optional
+from typing import Final
 
-from Token import Token
-from RuntimeError import RuntimeError
+# How a resolved local is reached from the code that uses it: in a slot of
+# the running function's environment, in a cell held in such a slot because
+# some closure captured it, or in one of the cells the running function
+# captured itself.
+LOCAL: Final[int] = 0
+CELL: Final[int] = 1
+UPVALUE: Final[int] = 2
 
+# Where a function finds a variable it captures when it is created: in a
+# cell in a slot of the enclosing environment (True), or among the cells
+# the enclosing function captured (False), with the index of either.
+type Upvalue = tuple[bool, int]
 
-class Environment:
-    def __init__(self, enclosing: Optional[Environment] = None) -> None:
-        self.enclosing: Final[Optional[Environment]] = enclosing
-        self._values: Final[dict[str, object]] = {}
-
-    def define(self, name: str, value: object):
-        self._values[name] = value
-
-    def get_at(self, distance: int, name: str) -> object:
-        return self.ancestor(distance)._values.get(name)
 
-    def assign_at(self, distance: int, name: Token, value: object) -> None:
-        self.ancestor(distance)._values[name.lexeme] = value
+class Cell:
+    """A captured variable, shared by its scope and the closures using it."""
 
-    def ancestor(self, distance: int) -> Environment:
-        environment: Environment = self
-        for _ in range(distance):
-            if environment.enclosing:
-                environment = environment.enclosing
+    __slots__ = ("value",)
 
-        return environment
+    def __init__(self, value: object) -> None:
+        self.value: object = value
 
-    def get(self, name: Token) -> object:
-        if name.lexeme in self._values.keys():
-            return self._values[name.lexeme]
-        if self.enclosing:
-            return self.enclosing.get(name)
 
-        raise RuntimeError(name, f"Undefined variable '{name.lexeme}'.")
-
-    def assign(self, name: Token, value: object):
-        if name.lexeme in self._values.keys():
-            self._values[name.lexeme] = value
-            return
-        if self.enclosing:
-            self.enclosing.assign(name, value)
-            return
-
-        raise RuntimeError(name, f"Undefined variable '{name.lexeme}'.")
+class Environment:
+    """The local variables of one function call, and the cells it captured.
+
+    The Resolver gives every local of a function, whichever block declares
+    it, a slot of its own, so a call needs a single flat environment and
+    blocks need none. Only variables that some closure captures live in
+    cells; a closure keeps just the cells it uses, not the environments
+    they came from.
+
+    Top-level code has an environment too, for variables declared in blocks
+    outside any function. Nothing records how many of those there are, so
+    its values are a dict keyed by slot rather than a list.
+    """
+
+    __slots__ = ("values", "cells")
+
+    def __init__(
+        self,
+        values: list[object] | dict[int, object],
+        cells: tuple[Cell, ...] = (),
+    ) -> None:
+        self.values: Final[list[object] | dict[int, object]] = values
+        self.cells: Final[tuple[Cell, ...]] = cells
@@ -1,11 +1,20 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Final, override
+from typing import TYPE_CHECKING, Final, Optional, override
 
 from Token import Token
 
+if TYPE_CHECKING:
+    from GlobalEnvironment import GlobalCell
+    from LoxClass import LoxClass
+    from LoxFunction import LoxFunction
+    from Shape import Shape
+
 
 class Expr(ABC):
+    # Nodes have no per-instance __dict__; every subclass lists its fields.
+    __slots__ = ()
+
     @abstractmethod
     def accept[R](self, visitor: Visitor[R]) -> R: ...
 
@@ -17,12 +26,54 @@ class Visitor[R]:
     @abstractmethod
     def visit_Binary_Expr(self, expr: Binary) -> R: ...
 
+    def visit_Add_Expr(self, expr: Add) -> R:
+        return self.visit_Binary_Expr(expr)
+
+    def visit_FloatAdd_Expr(self, expr: FloatAdd) -> R:
+        return self.visit_Add_Expr(expr)
+
+    def visit_StringAdd_Expr(self, expr: StringAdd) -> R:
+        return self.visit_Add_Expr(expr)
+
+    def visit_Subtract_Expr(self, expr: Subtract) -> R:
+        return self.visit_Binary_Expr(expr)
+
+    def visit_Multiply_Expr(self, expr: Multiply) -> R:
+        return self.visit_Binary_Expr(expr)
+
+    def visit_Divide_Expr(self, expr: Divide) -> R:
+        return self.visit_Binary_Expr(expr)
+
+    def visit_Less_Expr(self, expr: Less) -> R:
+        return self.visit_Binary_Expr(expr)
+
+    def visit_LessEqual_Expr(self, expr: LessEqual) -> R:
+        return self.visit_Binary_Expr(expr)
+
+    def visit_Greater_Expr(self, expr: Greater) -> R:
+        return self.visit_Binary_Expr(expr)
+
+    def visit_GreaterEqual_Expr(self, expr: GreaterEqual) -> R:
+        return self.visit_Binary_Expr(expr)
+
+    def visit_Equal_Expr(self, expr: Equal) -> R:
+        return self.visit_Binary_Expr(expr)
+
+    def visit_NotEqual_Expr(self, expr: NotEqual) -> R:
+        return self.visit_Binary_Expr(expr)
+
     @abstractmethod
     def visit_Call_Expr(self, expr: Call) -> R: ...
 
     @abstractmethod
     def visit_Get_Expr(self, expr: Get) -> R: ...
 
+    def visit_FieldGet_Expr(self, expr: FieldGet) -> R:
+        return self.visit_Get_Expr(expr)
+
+    def visit_GenericGet_Expr(self, expr: GenericGet) -> R:
+        return self.visit_Get_Expr(expr)
+
     @abstractmethod
     def visit_Grouping_Expr(self, expr: Grouping) -> R: ...
 
@@ -32,6 +83,12 @@ class Visitor[R]:
     @abstractmethod
     def visit_Logical_Expr(self, expr: Logical) -> R: ...
 
+    def visit_And_Expr(self, expr: And) -> R:
+        return self.visit_Logical_Expr(expr)
+
+    def visit_Or_Expr(self, expr: Or) -> R:
+        return self.visit_Logical_Expr(expr)
+
     @abstractmethod
     def visit_Set_Expr(self, expr: Set) -> R: ...
 
@@ -41,6 +98,12 @@ class Visitor[R]:
     @abstractmethod
     def visit_Unary_Expr(self, expr: Unary) -> R: ...
 
+    def visit_Negate_Expr(self, expr: Negate) -> R:
+        return self.visit_Unary_Expr(expr)
+
+    def visit_Not_Expr(self, expr: Not) -> R:
+        return self.visit_Unary_Expr(expr)
+
     @abstractmethod
     def visit_This_Expr(self, expr: This) -> R: ...
 
@@ -49,10 +112,15 @@ class Visitor[R]:
 
 
 class Assign(Expr):
+    __slots__ = ("name", "value", "access", "slot", "cell")
+
     def __init__(self, name: Token, value: Expr):
         super().__init__()
         self.name: Final[Token] = name
         self.value: Final[Expr] = value
+        self.access: Optional[int] = None
+        self.slot: Optional[int] = None
+        self.cell: Optional[GlobalCell] = None
 
     @override
     def accept[R](self, visitor: Visitor[R]) -> R:
@@ -60,6 +128,8 @@ class Assign(Expr):
 
 
 class Binary(Expr):
+    __slots__ = ("left", "operator", "right")
+
     def __init__(self, left: Expr, operator: Token, right: Expr):
         super().__init__()
         self.left: Final[Expr] = left
@@ -71,11 +141,109 @@ class Binary(Expr):
         return visitor.visit_Binary_Expr(self)
 
 
+class Add(Binary):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_Add_Expr(self)
+
+
+class FloatAdd(Add):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_FloatAdd_Expr(self)
+
+
+class StringAdd(Add):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_StringAdd_Expr(self)
+
+
+class Subtract(Binary):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_Subtract_Expr(self)
+
+
+class Multiply(Binary):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_Multiply_Expr(self)
+
+
+class Divide(Binary):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_Divide_Expr(self)
+
+
+class Less(Binary):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_Less_Expr(self)
+
+
+class LessEqual(Binary):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_LessEqual_Expr(self)
+
+
+class Greater(Binary):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_Greater_Expr(self)
+
+
+class GreaterEqual(Binary):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_GreaterEqual_Expr(self)
+
+
+class Equal(Binary):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_Equal_Expr(self)
+
+
+class NotEqual(Binary):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_NotEqual_Expr(self)
+
+
 class Call(Expr):
-    def __init__(self, callee: Expr, paren: Token, arguments: list[Expr]):
+    __slots__ = ("callee", "line", "arguments")
+
+    def __init__(self, callee: Expr, line: int, arguments: list[Expr]):
         super().__init__()
         self.callee: Final[Expr] = callee
-        self.paren: Final[Token] = paren
+        self.line: Final[int] = line
         self.arguments: Final[list[Expr]] = arguments
 
     @override
@@ -84,17 +252,41 @@ class Call(Expr):
 
 
 class Get(Expr):
+    __slots__ = ("object", "name", "cached_class", "cached_method", "cached_shape", "cached_slot")
+
     def __init__(self, object: Expr, name: Token):
         super().__init__()
         self.object: Final[Expr] = object
         self.name: Final[Token] = name
+        self.cached_class: Optional[LoxClass] = None
+        self.cached_method: Optional[LoxFunction] = None
+        self.cached_shape: Optional[Shape] = None
+        self.cached_slot: Optional[int] = None
 
     @override
     def accept[R](self, visitor: Visitor[R]) -> R:
         return visitor.visit_Get_Expr(self)
 
 
+class FieldGet(Get):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_FieldGet_Expr(self)
+
+
+class GenericGet(Get):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_GenericGet_Expr(self)
+
+
 class Grouping(Expr):
+    __slots__ = ("expression",)
+
     def __init__(self, expression: Expr):
         super().__init__()
         self.expression: Final[Expr] = expression
@@ -105,9 +297,12 @@ class Grouping(Expr):
 
 
 class Literal(Expr):
-    def __init__(self, value: object):
+    __slots__ = ("value", "token")
+
+    def __init__(self, value: object, token: Token):
         super().__init__()
         self.value: Final[object] = value
+        self.token: Final[Token] = token
 
     @override
     def accept[R](self, visitor: Visitor[R]) -> R:
@@ -115,6 +310,8 @@ class Literal(Expr):
 
 
 class Logical(Expr):
+    __slots__ = ("left", "operator", "right")
+
     def __init__(self, left: Expr, operator: Token, right: Expr):
         super().__init__()
         self.left: Final[Expr] = left
@@ -126,12 +323,33 @@ class Logical(Expr):
         return visitor.visit_Logical_Expr(self)
 
 
+class And(Logical):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_And_Expr(self)
+
+
+class Or(Logical):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_Or_Expr(self)
+
+
 class Set(Expr):
+    __slots__ = ("object", "name", "value", "cached_shape", "cached_slot", "cached_next")
+
     def __init__(self, object: Expr, name: Token, value: Expr):
         super().__init__()
         self.object: Final[Expr] = object
         self.name: Final[Token] = name
         self.value: Final[Expr] = value
+        self.cached_shape: Optional[Shape] = None
+        self.cached_slot: Optional[int] = None
+        self.cached_next: Optional[Shape] = None
 
     @override
     def accept[R](self, visitor: Visitor[R]) -> R:
@@ -139,10 +357,17 @@ class Set(Expr):
 
 
 class Super(Expr):
-    def __init__(self, keyword: Token, method: Token):
+    __slots__ = ("keyword", "method", "this", "access", "slot", "cached_class", "cached_method")
+
+    def __init__(self, keyword: Token, method: Token, this: This):
         super().__init__()
         self.keyword: Final[Token] = keyword
         self.method: Final[Token] = method
+        self.this: Final[This] = this
+        self.access: Optional[int] = None
+        self.slot: Optional[int] = None
+        self.cached_class: Optional[LoxClass] = None
+        self.cached_method: Optional[LoxFunction] = None
 
     @override
     def accept[R](self, visitor: Visitor[R]) -> R:
@@ -150,6 +375,8 @@ class Super(Expr):
 
 
 class Unary(Expr):
+    __slots__ = ("operator", "right")
+
     def __init__(self, operator: Token, right: Expr):
         super().__init__()
         self.operator: Final[Token] = operator
@@ -160,10 +387,30 @@ class Unary(Expr):
         return visitor.visit_Unary_Expr(self)
 
 
+class Negate(Unary):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_Negate_Expr(self)
+
+
+class Not(Unary):
+    __slots__ = ()
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_Not_Expr(self)
+
+
 class This(Expr):
+    __slots__ = ("keyword", "access", "slot")
+
     def __init__(self, keyword: Token):
         super().__init__()
         self.keyword: Final[Token] = keyword
+        self.access: Optional[int] = None
+        self.slot: Optional[int] = None
 
     @override
     def accept[R](self, visitor: Visitor[R]) -> R:
@@ -171,9 +418,14 @@ class This(Expr):
 
 
 class Variable(Expr):
+    __slots__ = ("name", "access", "slot", "cell")
+
     def __init__(self, name: Token):
         super().__init__()
         self.name: Final[Token] = name
+        self.access: Optional[int] = None
+        self.slot: Optional[int] = None
+        self.cell: Optional[GlobalCell] = None
 
     @override
     def accept[R](self, visitor: Visitor[R]) -> R:
@@ -0,0 +1,57 @@
+from typing import Final, Iterator
+
+from Token import Token
+from RuntimeError import RuntimeError
+
+# The value of a global that has been mentioned but not defined yet.
+UNDEFINED: Final[object] = object()
+
+
+class GlobalCell:
+    """Holds the value of one global variable.
+
+    A cell exists from the first time its name is used, defined or not, and
+    is never replaced, so code that reads or assigns a global can hold on to
+    its cell instead of looking the name up every time.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value: object = UNDEFINED
+
+
+class GlobalEnvironment:
+    """The top-level scope, looked up by name since globals are late bound."""
+
+    def __init__(self) -> None:
+        self._cells: Final[dict[str, GlobalCell]] = {}
+
+    def cell(self, name: str) -> GlobalCell:
+        cell: GlobalCell | None = self._cells.get(name)
+        if cell is None:
+            cell = self._cells[name] = GlobalCell()
+        return cell
+
+    def define(self, name: str, value: object):
+        self.cell(name).value = value
+
+    def items(self) -> Iterator[tuple[str, object]]:
+        for name, cell in self._cells.items():
+            if cell.value is not UNDEFINED:
+                yield name, cell.value
+
+    def get(self, name: Token) -> object:
+        value: object = self.cell(name.lexeme).value
+        if value is not UNDEFINED:
+            return value
+
+        raise RuntimeError(name, f"Undefined variable '{name.lexeme}'.")
+
+    def assign(self, name: Token, value: object):
+        cell: GlobalCell = self.cell(name.lexeme)
+        if cell.value is not UNDEFINED:
+            cell.value = value
+            return
+
+        raise RuntimeError(name, f"Undefined variable '{name.lexeme}'.")
@@ -1,15 +1,33 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING, Callable, Final, Optional, Type, override
 from Expr import (
+    Add,
+    And,
     Assign,
     Binary,
     Call,
+    Divide,
+    Equal,
     Expr,
+    FieldGet,
+    FloatAdd,
+    GenericGet,
     Get,
+    Greater,
+    GreaterEqual,
     Grouping,
+    Less,
+    LessEqual,
     Literal,
     Logical,
+    Multiply,
+    Negate,
+    Not,
+    NotEqual,
+    Or,
     Set,
+    StringAdd,
+    Subtract,
     Super,
     This,
     Unary,
@@ -23,6 +41,7 @@ from Stmt import (
     Block,
     Class,
     Expression,
+    For,
     Function,
     If,
     Print,
@@ -32,7 +51,8 @@ from Stmt import (
     Visitor as StmtVisitor,
     While,
 )
-from Environment import Environment
+from Environment import CELL, LOCAL, Cell, Environment
+from GlobalEnvironment import UNDEFINED, GlobalCell, GlobalEnvironment
 from Return import Return
 
 if TYPE_CHECKING:
@@ -43,7 +63,7 @@ if TYPE_CHECKING:
 import time
 
 
-class Interpreter(ExprVisitor[object], StmtVisitor[None]):
+class Interpreter(ExprVisitor[object], StmtVisitor[Optional[Return]]):
     def __init__(
         self,
         callable_interface: Type[LoxCallable],
@@ -52,9 +72,9 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
         instance_class: Type[LoxInstance],
     ) -> None:
         super().__init__()
-        self.globals: Final[Environment] = Environment()
-        self._environment: Environment = self.globals
-        self._locals: Final[dict[Expr, int]] = {}
+        self.globals: Final[GlobalEnvironment] = GlobalEnvironment()
+        # The running function's environment, or the one of top-level code.
+        self._environment: Environment = Environment({})
         self._callable_interface: Type[LoxCallable] = callable_interface
         self._function_class: Type[LoxFunction] = function_class
         self._klass_class: Type[LoxClass] = klass_class
@@ -87,25 +107,37 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
         except RuntimeError as e:
             runtime_error(e)
 
-    def _execute(self, statement: Stmt):
-        statement.accept(self)
+    def _execute(self, statement: Stmt) -> Optional[Return]:
+        return statement.accept(self)
 
-    def resolve(self, expr: Expr, depth: int):
-        self._locals[expr] = depth
+    def resolve(self, expr: Expr, access: int, slot: int):
+        # Kept on the node itself, so it goes away with the program. Nodes
+        # the resolver reports nothing for are globals.
+        expr.access = access  # type: ignore[reportAttributeAccessIssue]
+        expr.slot = slot  # type: ignore[reportAttributeAccessIssue]
 
-    def execute_block(self, statements: list[Stmt], environment: Environment):
+    def execute_block(
+        self, statements: list[Stmt], environment: Environment
+    ) -> Optional[Return]:
         previous: Environment = self._environment
         try:
             self._environment = environment
 
             for statement in statements:
-                self._execute(statement)
+                completion: Optional[Return] = statement.accept(self)
+                if completion is not None:
+                    return completion
         finally:
             self._environment = previous
 
     @override
-    def visit_Block_Stmt(self, stmt: Block) -> None:
-        self.execute_block(stmt.statements, Environment(self._environment))
+    def visit_Block_Stmt(self, stmt: Block) -> Optional[Return]:
+        # Locals of the block have slots in the function's environment.
+        for statement in stmt.statements:
+            completion: Optional[Return] = statement.accept(self)
+            if completion is not None:
+                return completion
+        return None
 
     @override
     def visit_Class_Stmt(self, stmt: Class) -> None:
@@ -115,22 +147,23 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
             if not isinstance(super_class, self._klass_class):
                 raise RuntimeError(stmt.super_class.name, "Superclass must be a class.")
 
-        self._environment.define(stmt.name.lexeme, None)
-        if stmt.super_class is not None:
-            self._environment = Environment(self._environment)
-            self._environment.define("super", super_class)
+        # Methods capture "super", and the class itself if it is a local
+        # they use, when they are created, so those cells come first.
+        cell: Optional[Cell] = self._declare_cell(stmt)
+        if stmt.super_slot is not None:
+            self._environment.values[stmt.super_slot] = Cell(super_class)
 
         methods: dict[str, LoxFunction] = {}
         for method in stmt.methods:
             is_init = method.name.lexeme == "init"
-            function = self._function_class(method, self._environment, is_init)
+            function = self._function_class(method, self._capture(method), is_init)
             methods[method.name.lexeme] = function
         klass = self._klass_class(stmt.name.lexeme, super_class, methods)
 
-        if stmt.super_class is not None:
-            if self._environment.enclosing is not None:
-                self._environment = self._environment.enclosing
-        self._environment.assign(stmt.name, klass)
+        if cell is None:
+            self._define(stmt, klass)
+        else:
+            cell.value = klass
 
     def _stringify(self, obj: object):
         if obj is None:
@@ -154,23 +187,25 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
     def visit_Binary_Expr(self, expr: Binary) -> object:
         left: object = self._evaluate(expr.left)
         right: object = self._evaluate(expr.right)
+        return self._binary(expr, left, right)
 
+    def _binary(self, expr: Binary, left: object, right: object) -> object:
         match expr.operator.type:
             case TokenType.PLUS:
                 if isinstance(left, float) and isinstance(right, float):
                     return left + right
                 if isinstance(left, str) and isinstance(right, str):
-                    return self._stringify(left) + self._stringify(right)
+                    return left + right
                 raise RuntimeError(
                     expr.operator,
                     "Operands must be two numbers or two strings.",
                 )
             case TokenType.MINUS:
                 self._check_number_operands(expr.operator, left, right)
-                return float(left) - float(right)  # type: ignore[ReportArgumentType]
+                return left - right  # type: ignore[reportOperatorIssue]
             case TokenType.STAR:
                 self._check_number_operands(expr.operator, left, right)
-                return float(left) * float(right)  # type: ignore[ReportArgumentType]
+                return left * right  # type: ignore[reportOperatorIssue]
             case TokenType.SLASH:
                 self._check_number_operands(expr.operator, left, right)
                 if right == 0:
@@ -178,19 +213,19 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
                         expr.operator,
                         "Right operand cannot be 0.",
                     )
-                return float(left) / float(right)  # type: ignore[ReportArgumentType]
+                return left / right  # type: ignore[reportOperatorIssue]
             case TokenType.LESS:
                 self._check_number_operands(expr.operator, left, right)
-                return float(left) < float(right)  # type: ignore[ReportArgumentType]
+                return left < right  # type: ignore[reportOperatorIssue]
             case TokenType.LESS_EQUAL:
                 self._check_number_operands(expr.operator, left, right)
-                return float(left) <= float(right)  # type: ignore[ReportArgumentType]
+                return left <= right  # type: ignore[reportOperatorIssue]
             case TokenType.GREATER:
                 self._check_number_operands(expr.operator, left, right)
-                return float(left) > float(right)  # type: ignore[ReportArgumentType]
+                return left > right  # type: ignore[reportOperatorIssue]
             case TokenType.GREATER_EQUAL:
                 self._check_number_operands(expr.operator, left, right)
-                return float(left) >= float(right)  # type: ignore[ReportArgumentType]
+                return left >= right  # type: ignore[reportOperatorIssue]
             case TokenType.EQUAL_EQUAL:
                 return self._is_equal(left, right)
             case TokenType.BANG_EQUAL:
@@ -201,8 +236,145 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
         # Unreachable
         return None
 
+    # The parser gives every operator a kind of node of its own. These
+    # evaluate operands with accept directly, skipping _evaluate's frame.
+
+    # Some nodes also rewrite themselves, by changing class, into a kind
+    # specialized for the values they see the first time they run. When a
+    # specialized node sees something else it goes back to the generic
+    # node for good, so a site that changes its mind settles quickly.
+
+    @override
+    def visit_Add_Expr(self, expr: Add) -> object:
+        left: object = expr.left.accept(self)
+        right: object = expr.right.accept(self)
+        if type(left) is float and type(right) is float:
+            expr.__class__ = FloatAdd
+            return left + right
+        if type(left) is str and type(right) is str:
+            expr.__class__ = StringAdd
+            return left + right
+        raise RuntimeError(expr.operator, "Operands must be two numbers or two strings.")
+
+    @override
+    def visit_FloatAdd_Expr(self, expr: FloatAdd) -> object:
+        left: object = expr.left.accept(self)
+        right: object = expr.right.accept(self)
+        if type(left) is float and type(right) is float:
+            return left + right
+        expr.__class__ = Binary
+        return self._binary(expr, left, right)
+
+    @override
+    def visit_StringAdd_Expr(self, expr: StringAdd) -> object:
+        left: object = expr.left.accept(self)
+        right: object = expr.right.accept(self)
+        if type(left) is str and type(right) is str:
+            return left + right
+        expr.__class__ = Binary
+        return self._binary(expr, left, right)
+
+    @override
+    def visit_Subtract_Expr(self, expr: Subtract) -> object:
+        left: object = expr.left.accept(self)
+        right: object = expr.right.accept(self)
+        if type(left) is float and type(right) is float:
+            return left - right
+        raise RuntimeError(expr.operator, "Operands must be numbers.")
+
+    @override
+    def visit_Multiply_Expr(self, expr: Multiply) -> object:
+        left: object = expr.left.accept(self)
+        right: object = expr.right.accept(self)
+        if type(left) is float and type(right) is float:
+            return left * right
+        raise RuntimeError(expr.operator, "Operands must be numbers.")
+
+    @override
+    def visit_Divide_Expr(self, expr: Divide) -> object:
+        left: object = expr.left.accept(self)
+        right: object = expr.right.accept(self)
+        if type(left) is not float or type(right) is not float:
+            raise RuntimeError(expr.operator, "Operands must be numbers.")
+        if right == 0:
+            raise RuntimeError(expr.operator, "Right operand cannot be 0.")
+        return left / right
+
+    @override
+    def visit_Less_Expr(self, expr: Less) -> object:
+        left: object = expr.left.accept(self)
+        right: object = expr.right.accept(self)
+        if type(left) is float and type(right) is float:
+            return left < right
+        raise RuntimeError(expr.operator, "Operands must be numbers.")
+
+    @override
+    def visit_LessEqual_Expr(self, expr: LessEqual) -> object:
+        left: object = expr.left.accept(self)
+        right: object = expr.right.accept(self)
+        if type(left) is float and type(right) is float:
+            return left <= right
+        raise RuntimeError(expr.operator, "Operands must be numbers.")
+
+    @override
+    def visit_Greater_Expr(self, expr: Greater) -> object:
+        left: object = expr.left.accept(self)
+        right: object = expr.right.accept(self)
+        if type(left) is float and type(right) is float:
+            return left > right
+        raise RuntimeError(expr.operator, "Operands must be numbers.")
+
+    @override
+    def visit_GreaterEqual_Expr(self, expr: GreaterEqual) -> object:
+        left: object = expr.left.accept(self)
+        right: object = expr.right.accept(self)
+        if type(left) is float and type(right) is float:
+            return left >= right
+        raise RuntimeError(expr.operator, "Operands must be numbers.")
+
+    @override
+    def visit_Equal_Expr(self, expr: Equal) -> object:
+        left: object = expr.left.accept(self)
+        right: object = expr.right.accept(self)
+        return type(left) is type(right) and left == right
+
+    @override
+    def visit_NotEqual_Expr(self, expr: NotEqual) -> object:
+        left: object = expr.left.accept(self)
+        right: object = expr.right.accept(self)
+        return type(left) is not type(right) or left != right
+
+    @override
+    def visit_And_Expr(self, expr: And) -> object:
+        left: object = expr.left.accept(self)
+        if left is None or left is False:
+            return left
+        return expr.right.accept(self)
+
+    @override
+    def visit_Or_Expr(self, expr: Or) -> object:
+        left: object = expr.left.accept(self)
+        if left is None or left is False:
+            return expr.right.accept(self)
+        return left
+
+    @override
+    def visit_Negate_Expr(self, expr: Negate) -> object:
+        right: object = expr.right.accept(self)
+        if type(right) is float:
+            return -right
+        raise RuntimeError(expr.operator, "Operand must be a number.")
+
+    @override
+    def visit_Not_Expr(self, expr: Not) -> object:
+        right: object = expr.right.accept(self)
+        return right is None or right is False
+
     @override
     def visit_Call_Expr(self, expr: Call) -> object:
+        if type(expr.callee) is Get:
+            return self._invoke(expr, expr.callee)
+
         callee: object = self._evaluate(expr.callee)
 
         arguments: list[object] = []
@@ -210,17 +382,65 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
             arguments.append(self._evaluate(argument))
 
         if not isinstance(callee, self._callable_interface):
-            raise RuntimeError(expr.paren, "Can only call functions and classes.")
+            raise RuntimeError(expr.line, "Can only call functions and classes.")
 
         function: LoxCallable = callee
 
         if len(arguments) != function.arity():
             raise RuntimeError(
-                expr.paren,
+                expr.line,
                 f"Expected {function.arity()} arguments but got {len(arguments)}.",
             )
 
-        return function.call(self, arguments)
+        # Lox calls recurse in Python here, so running out of host stack
+        # is how a Lox program overflows its own.
+        try:
+            return function.call(self, arguments)
+        except RecursionError:
+            raise RuntimeError(expr.line, "Stack overflow.") from None
+
+    def _invoke(self, expr: Call, site: Get) -> object:
+        obj: object = self._evaluate(site.object)
+        if not isinstance(obj, self._instance_class):
+            raise RuntimeError(site.name, "Only instances have properties.")
+
+        method: Optional[LoxFunction] = obj.get_method(site)
+        if method is None:
+            # A field holding a callable is called like any other value.
+            callee: object = obj.get(site.name)
+            arguments: list[object] = [self._evaluate(argument) for argument in expr.arguments]
+
+            if not isinstance(callee, self._callable_interface):
+                raise RuntimeError(expr.line, "Can only call functions and classes.")
+
+            function: LoxCallable = callee
+            if len(arguments) != function.arity():
+                raise RuntimeError(
+                    expr.line,
+                    f"Expected {function.arity()} arguments but got {len(arguments)}.",
+                )
+
+            try:
+                return function.call(self, arguments)
+            except RecursionError:
+                raise RuntimeError(expr.line, "Stack overflow.") from None
+
+        # Call the method with "this" in its first slot rather than allocating
+        # a bound method just to call it once.
+        values: list[object] = [obj]
+        for argument in expr.arguments:
+            values.append(self._evaluate(argument))
+
+        if len(values) - 1 != method.arity():
+            raise RuntimeError(
+                expr.line,
+                f"Expected {method.arity()} arguments but got {len(values) - 1}.",
+            )
+
+        try:
+            return method.invoke(self, values)
+        except RecursionError:
+            raise RuntimeError(expr.line, "Stack overflow.") from None
 
     def _is_equal(self, a: object, b: object):
         if type(a) is not type(b):
@@ -229,9 +449,30 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
 
     @override
     def visit_Get_Expr(self, expr: Get) -> object:
-        obj: object = self._evaluate(expr.object)
+        obj: object = expr.object.accept(self)
+        value: object = self._get(expr, obj)
+        # The lookup caches the shape and slot of a field it finds.
+        if expr.cached_shape is obj._shape and expr.cached_slot >= 0:  # type: ignore[reportAttributeAccessIssue]
+            expr.__class__ = FieldGet
+        else:
+            expr.__class__ = GenericGet
+        return value
+
+    @override
+    def visit_FieldGet_Expr(self, expr: FieldGet) -> object:
+        obj: object = expr.object.accept(self)
+        if isinstance(obj, self._instance_class) and obj._shape is expr.cached_shape:
+            return obj._values[expr.cached_slot]  # type: ignore[reportIndexIssue]
+        expr.__class__ = GenericGet
+        return self._get(expr, obj)
+
+    @override
+    def visit_GenericGet_Expr(self, expr: GenericGet) -> object:
+        return self._get(expr, expr.object.accept(self))
+
+    def _get(self, expr: Get, obj: object) -> object:
         if isinstance(obj, self._instance_class):
-            return obj.get(expr.name)
+            return obj.get(expr.name, expr)
 
         raise RuntimeError(expr.name, "Only instances have properties.")
 
@@ -264,25 +505,29 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
             raise RuntimeError(expr.name, "Only instances have fields.")
 
         value: object = self._evaluate(expr.value)
-        obj.set(expr.name, value)
+        obj.set(expr.name, value, expr)
         return value
 
     @override
     def visit_Super_Expr(self, expr: Super) -> object:
-        distance: int = self._locals[expr]
-        super_class = self._environment.get_at(distance, "super")
+        # Only methods use "super", so they always find it among their cells.
+        super_class = self._environment.cells[expr.slot].value  # type: ignore[reportCallIssue]
         assert(isinstance(super_class, self._klass_class))
-        obj = self._environment.get_at(distance - 1, "this")
+        obj = self._look_up(expr.this.access, expr.this.slot)  # type: ignore[reportArgumentType]
         assert(isinstance(obj, self._instance_class))
+        if super_class is expr.cached_class:
+            return expr.cached_method.bind(obj)  # type: ignore[reportOptionalMemberAccess]
         method = super_class.find_method(expr.method.lexeme)
         if method is None:
             raise RuntimeError(expr.method, f"Undefined property '{expr.method.lexeme}'.")
+        expr.cached_class = super_class
+        expr.cached_method = method
         return method.bind(obj)
 
 
     @override
     def visit_This_Expr(self, expr: This) -> object:
-        return self._look_up_variable(expr.keyword, expr)
+        return self._look_up(expr.access, expr.slot)  # type: ignore[reportArgumentType]
 
     @override
     def visit_Unary_Expr(self, expr: Unary) -> object:
@@ -293,7 +538,7 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
                 return not self._is_truthy(right)
             case TokenType.MINUS:
                 self._check_number_operand(expr.operator, right)
-                return -float(right)  # type: ignore[ReportArgumentType]
+                return -right  # type: ignore[reportOperatorIssue]
             case _:
                 pass
 
@@ -302,14 +547,33 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
 
     @override
     def visit_Variable_Expr(self, expr: Variable) -> object:
-        return self._look_up_variable(expr.name, expr)
-
-    def _look_up_variable(self, name: Token, expr: Expr) -> object:
-        distance: Optional[int] = self._locals.get(expr)
-        if distance is not None:
-            return self._environment.get_at(distance, name.lexeme)
-        else:
-            return self.globals.get(name)
+        # Globals are read through their cell, which the node keeps from
+        # its first run; an undefined one is left to globals to report.
+        cell: Optional[GlobalCell] = expr.cell
+        if cell is not None:
+            value: object = cell.value
+            if value is not UNDEFINED:
+                return value
+            return self.globals.get(expr.name)
+
+        access: Optional[int] = expr.access
+        if access is None:
+            expr.cell = self.globals.cell(expr.name.lexeme)
+            return self.globals.get(expr.name)
+
+        environment: Environment = self._environment
+        if access == LOCAL:
+            return environment.values[expr.slot]  # type: ignore[reportArgumentType]
+        if access == CELL:
+            return environment.values[expr.slot].value  # type: ignore[reportAttributeAccessIssue]
+        return environment.cells[expr.slot].value  # type: ignore[reportCallIssue]
+
+    def _look_up(self, access: int, slot: int) -> object:
+        if access == LOCAL:
+            return self._environment.values[slot]
+        if access == CELL:
+            return self._environment.values[slot].value  # type: ignore[reportAttributeAccessIssue]
+        return self._environment.cells[slot].value
 
     def _check_number_operand(self, operator: Token, operand: object) -> None:
         if isinstance(operand, float):
@@ -342,15 +606,30 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
 
     @override
     def visit_Function_Stmt(self, stmt: Function) -> None:
-        function = self._function_class(stmt, self._environment, False)
-        self._environment.define(stmt.name.lexeme, function)
+        # A function that uses itself captures its own cell.
+        cell: Optional[Cell] = self._declare_cell(stmt)
+        function = self._function_class(stmt, self._capture(stmt), False)
+        if cell is None:
+            self._define(stmt, function)
+        else:
+            cell.value = function
+
+    def _capture(self, declaration: Function) -> tuple[Cell, ...]:
+        upvalues = declaration.upvalues
+        if not upvalues:
+            return ()
+        environment: Environment = self._environment
+        return tuple(
+            environment.values[index] if is_local else environment.cells[index]  # type: ignore[reportGeneralTypeIssues]
+            for is_local, index in upvalues
+        )
 
     @override
-    def visit_If_Stmt(self, stmt: If) -> None:
+    def visit_If_Stmt(self, stmt: If) -> Optional[Return]:
         if self._is_truthy(self._evaluate(stmt.condition)):
-            self._execute(stmt.thenBranch)
+            return self._execute(stmt.thenBranch)
         elif stmt.elseBranch:
-            self._execute(stmt.elseBranch)
+            return self._execute(stmt.elseBranch)
         return None
 
     @override
@@ -359,12 +638,12 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
         print(self._stringify(value))
 
     @override
-    def visit_Return_Stmt(self, stmt: StmtReturn) -> None:
+    def visit_Return_Stmt(self, stmt: StmtReturn) -> Optional[Return]:
         value: object = None
         if stmt.value:
             value = self._evaluate(stmt.value)
 
-        raise Return(value)
+        return Return(value)
 
     @override
     def visit_Var_Stmt(self, stmt: Var) -> None:
@@ -372,19 +651,66 @@ class Interpreter(ExprVisitor[object], StmtVisitor[None]):
         if stmt.initializer:
             value = self._evaluate(stmt.initializer)
 
-        self._environment.define(stmt.name.lexeme, value)
+        self._define(stmt, value)
+
+    def _define(self, declaration: Var | Function | Class, value: object) -> None:
+        if declaration.slot is None:
+            self.globals.define(declaration.name.lexeme, value)
+        elif declaration.captured:
+            self._environment.values[declaration.slot] = Cell(value)
+        else:
+            self._environment.values[declaration.slot] = value
+
+    def _declare_cell(self, declaration: Function | Class) -> Optional[Cell]:
+        """Puts an empty cell in the slot of a captured local declaration."""
+        if not declaration.captured:
+            return None
+        cell: Cell = Cell(None)
+        self._environment.values[declaration.slot] = cell  # type: ignore[reportArgumentType]
+        return cell
+
+    @override
+    def visit_For_Stmt(self, stmt: For) -> Optional[Return]:
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+        condition: Expr = stmt.condition
+        body: Stmt = stmt.body
+        increment: Optional[Expr] = stmt.increment
+        while self._is_truthy(condition.accept(self)):
+            completion: Optional[Return] = body.accept(self)
+            if completion is not None:
+                return completion
+            if increment is not None:
+                increment.accept(self)
+        return None
 
     @override
-    def visit_While_Stmt(self, stmt: While) -> None:
+    def visit_While_Stmt(self, stmt: While) -> Optional[Return]:
         while self._is_truthy(self._evaluate(stmt.condition)):
-            self._execute(stmt.body)
+            completion: Optional[Return] = stmt.body.accept(self)
+            if completion is not None:
+                return completion
+        return None
 
     @override
     def visit_Assign_Expr(self, expr: Assign) -> object:
         value: object = self._evaluate(expr.value)
-        distance: Optional[int] = self._locals.get(expr)
-        if distance is not None:
-            self._environment.assign_at(distance, expr.name, value)
-        else:
+        cell: Optional[GlobalCell] = expr.cell
+        if cell is not None and cell.value is not UNDEFINED:
+            cell.value = value
+            return value
+
+        access: Optional[int] = expr.access
+        if access is None:
+            expr.cell = self.globals.cell(expr.name.lexeme)
             self.globals.assign(expr.name, value)
+            return value
+
+        environment: Environment = self._environment
+        if access == LOCAL:
+            environment.values[expr.slot] = value  # type: ignore[reportArgumentType]
+        elif access == CELL:
+            environment.values[expr.slot].value = value  # type: ignore[reportAttributeAccessIssue]
+        else:
+            environment.cells[expr.slot].value = value  # type: ignore[reportCallIssue]
         return value
@@ -1,32 +1,78 @@
 # /bin/env python3
+import argparse
 import sys
-from typing import overload
+from typing import Callable, Optional, overload
 
 from Token import Token
 from TokenTypes import TokenType
 from RuntimeError import RuntimeError
 from Interpreter import Interpreter
+from ClosureInterpreter import ClosureInterpreter
+from Optimizer import Optimizer, count_nodes
 from Parser import Parser
+from Profiler import Profiler
+from ProgramCache import ProgramCache, Resolution, ResolutionRecorder, default_directory
+from Sampler import DEFAULT_INTERVAL, Sampler
 from Scanner import Scanner
+from Stats import Stats
 from Stmt import Stmt
 from LoxCallable import LoxCallable
 from LoxFunction import LoxFunction
 from Resolver import Resolver
+from VM import FRAMES_MAX, VM
 from LoxClass import LoxClass
 from LoxInstance import LoxInstance
 
 
+class _ArgumentParser(argparse.ArgumentParser):
+    def error(self, message: str):  # type: ignore[reportIncompatibleMethodOverride]
+        self.print_usage(sys.stderr)
+        print(f"{self.prog}: error: {message}", file=sys.stderr)
+        sys.exit(64)
+
+
 class Lox:
-    _interpreter: Interpreter = Interpreter(
+    _engines: dict[str, Callable[[], Interpreter | VM]] = {
+        "tree": lambda: Interpreter(LoxCallable, LoxFunction, LoxClass, LoxInstance),
+        "closure": lambda: ClosureInterpreter(
+            LoxCallable, LoxFunction, LoxClass, LoxInstance
+        ),
+        "vm": lambda: VM(Lox.error, Lox._max_depth),
+    }
+    _interpreter: Interpreter | VM = Interpreter(
         LoxCallable, LoxFunction, LoxClass, LoxInstance
     )
+    _max_depth = FRAMES_MAX
+    _streaming = False
+    _lazy = False
+    _cache: Optional[ProgramCache] = None
+    _profiler: Optional[Profiler] = None
+    _profile_output: Optional[str] = None
+    _sampler: Optional[Sampler] = None
+    _sample_output: str = ""
+    _stats: Optional[Stats] = None
+    _stats_output: Optional[str] = None
+    _optimizing = False
+    _optimization_report = False
+    _nodes_before = 0
+    _nodes_after = 0
+    # Whether the optimizer has run since the last report.
+    _optimized = False
     _had_error = False
     _had_runtime_error = False
 
     @staticmethod
     def _run_file(path: str):
         with open(path, encoding="utf-8") as f:
-            Lox._run(f.read())
+            source = f.read()
+        if Lox._cache is not None:
+            Lox._run_cached(source, Lox._cache)
+        else:
+            Lox._run(source)
+        Lox._report_optimization()
+        Lox._report_profile()
+        Lox._write_samples()
+        Lox._report_stats()
         if Lox._had_error:
             sys.exit(65)
         if Lox._had_runtime_error:
@@ -39,26 +85,163 @@ class Lox:
             if not line:
                 break
             Lox._run(line)
+            Lox._report_optimization()
             Lox._had_error = False
+            Lox._had_runtime_error = False
+        Lox._report_profile()
+        Lox._write_samples()
+        Lox._report_stats()
 
     @staticmethod
     def _run(source: str):
+        if Lox._streaming:
+            Lox._run_streaming(source)
+            return
+
         scanner: Scanner = Scanner(source, Lox.error)
         tokens: list[Token] = scanner.scan_tokens()
-        parser: Parser = Parser(tokens, Lox.error)
+        parser: Parser = Parser(tokens, Lox.error, lazy=Lox._lazy)
         statements: list[Stmt] = parser.parse()
 
         if Lox._had_error:
             return
 
-        resolver: Resolver = Resolver(Lox._interpreter, Lox.error)
-        resolver.resolve(statements)
+        statements = Lox._resolve(statements)
 
         if Lox._had_error:
             return
 
         Lox._interpreter.interpret(statements, Lox.runtime_error)
 
+    @staticmethod
+    def _resolve(statements: list[Stmt]) -> list[Stmt]:
+        """Resolves statements for the interpreter and returns those to run."""
+        if not Lox._optimizing:
+            Resolver(Lox._interpreter, Lox.error).resolve(statements)
+            return statements
+
+        recorder: ResolutionRecorder = ResolutionRecorder()
+        Resolver(recorder, Lox.error).resolve(statements)
+        if Lox._had_error:
+            return statements
+        return Lox._install(statements, recorder.resolutions)
+
+    @staticmethod
+    def _install(statements: list[Stmt], resolutions: list[Resolution]) -> list[Stmt]:
+        """Hands resolutions to the interpreter, optimizing first if asked to."""
+        if not Lox._optimizing:
+            for expr, access, slot in resolutions:
+                Lox._interpreter.resolve(expr, access, slot)
+            return statements
+
+        optimizer: Optimizer = Optimizer(
+            {expr: (access, slot) for expr, access, slot in resolutions}
+        )
+        optimized: list[Stmt] = optimizer.optimize(statements)
+        if Lox._optimization_report:
+            Lox._optimized = True
+            Lox._nodes_before += count_nodes(statements)
+            Lox._nodes_after += count_nodes(optimized)
+        for expr, (access, slot) in optimizer.locals.items():
+            Lox._interpreter.resolve(expr, access, slot)
+        return optimized
+
+    @staticmethod
+    def _report_optimization():
+        if Lox._optimized and not Lox._had_error:
+            print(
+                f"optimizer: {Lox._nodes_before} nodes before, {Lox._nodes_after} after",
+                file=sys.stderr,
+            )
+        Lox._optimized = False
+        Lox._nodes_before = 0
+        Lox._nodes_after = 0
+
+    @staticmethod
+    def _report_profile():
+        if Lox._profiler is None:
+            return
+        Lox._profiler.stop()
+        Lox._profiler.report(sys.stderr)
+        if Lox._profile_output is not None:
+            Lox._profiler.write(Lox._profile_output)
+
+    @staticmethod
+    def _write_samples():
+        if Lox._sampler is None:
+            return
+        Lox._sampler.stop()
+        Lox._sampler.write(Lox._sample_output)
+
+    @staticmethod
+    def _report_stats():
+        if Lox._stats is None:
+            return
+        Lox._stats.stop()
+        Lox._stats.report(sys.stderr)
+        if Lox._stats_output is not None:
+            Lox._stats.write(Lox._stats_output)
+
+    @staticmethod
+    def _run_cached(source: str, cache: ProgramCache):
+        program = cache.load(source)
+        if program is None:
+            statements: list[Stmt] = Parser(
+                Scanner(source, Lox.error).scan_tokens(), Lox.error
+            ).parse()
+
+            if Lox._had_error:
+                return
+
+            recorder: ResolutionRecorder = ResolutionRecorder()
+            Resolver(recorder, Lox.error).resolve(statements)
+
+            if Lox._had_error:
+                return
+
+            cache.store(source, statements, recorder.resolutions)
+            program = statements, recorder.resolutions
+
+        statements, resolutions = program
+        statements = Lox._install(statements, resolutions)
+        Lox._interpreter.interpret(statements, Lox.runtime_error)
+
+    @staticmethod
+    def _run_streaming(source: str):
+        """Resolves and executes each top-level declaration once it is parsed.
+
+        Nothing is held onto between declarations, so output starts right
+        away and executed top-level statements can be collected. Errors are
+        reported as they are found, and once any has been reported nothing
+        further runs, but statements before it may already have run. After a
+        syntax error the rest of the source is only parsed, as it would be by
+        _run. Execution stops at the first runtime error as usual.
+        """
+        had_syntax_error = False
+
+        def syntax_error(where: int | Token, message: str) -> None:
+            nonlocal had_syntax_error
+            had_syntax_error = True
+            Lox.error(where, message)  # type: ignore[reportCallIssue, reportArgumentType]
+
+        parser: Parser = Parser(
+            Scanner(source, syntax_error).tokens(), syntax_error, lazy=Lox._lazy
+        )
+
+        for statement in parser.declarations():
+            if had_syntax_error:
+                continue
+
+            statements: list[Stmt] = Lox._resolve([statement])
+
+            if Lox._had_error:
+                continue
+
+            Lox._interpreter.interpret(statements, Lox.runtime_error)
+
+            if Lox._had_runtime_error:
+                return
+
     @overload
     @staticmethod
     def error(line: int, message: str) -> None: ...
@@ -79,7 +262,7 @@ class Lox:
 
     @staticmethod
     def runtime_error(error: RuntimeError):
-        print(f"{error}\n[line {error.token.line}]", file=sys.stderr)
+        print(f"{error}\n[line {error.line}]", file=sys.stderr)
         Lox._had_runtime_error = True
 
     @staticmethod
@@ -89,11 +272,120 @@ class Lox:
 
     @staticmethod
     def main() -> None:
-        if len(sys.argv) > 2:
-            print("Usage: pylox [script]", file=sys.stderr)
-            sys.exit(64)
-        elif len(sys.argv) == 2:
-            Lox._run_file(sys.argv[1])
+        parser = _ArgumentParser(prog="pylox")
+        parser.add_argument(
+            "--engine",
+            choices=Lox._engines.keys(),
+            default="tree",
+            help="execution engine (default: tree)",
+        )
+        parser.add_argument(
+            "--max-depth",
+            type=int,
+            default=FRAMES_MAX,
+            metavar="N",
+            help=f"maximum Lox call depth on the vm engine (default: {FRAMES_MAX})",
+        )
+        front_end = parser.add_mutually_exclusive_group()
+        front_end.add_argument(
+            "--stream",
+            action="store_true",
+            help="execute each top-level declaration as soon as it is parsed",
+        )
+        front_end.add_argument(
+            "--cache",
+            action="store_true",
+            help="reuse parsed and resolved scripts from $PYLOX_CACHE_DIR "
+            "(default: ~/.cache/pylox)",
+        )
+        parser.add_argument(
+            "--lazy",
+            action="store_true",
+            help="parse and resolve the bodies of top-level functions and methods "
+            "when they are first called",
+        )
+        parser.add_argument(
+            "--optimize",
+            action="store_true",
+            help="fold constants and prune dead code before running",
+        )
+        parser.add_argument(
+            "--optimize-report",
+            action="store_true",
+            help="like --optimize, and report AST node counts before and after",
+        )
+        parser.add_argument(
+            "--profile",
+            action="store_true",
+            help="time every Lox call and report per function on exit",
+        )
+        parser.add_argument(
+            "--profile-output",
+            metavar="FILE",
+            help="like --profile, and also write the report to FILE as JSON",
+        )
+        parser.add_argument(
+            "--sample",
+            metavar="FILE",
+            help="sample the Lox call stack and write folded stacks to FILE",
+        )
+        parser.add_argument(
+            "--sample-interval",
+            type=float,
+            default=DEFAULT_INTERVAL * 1000,
+            metavar="MS",
+            help=f"milliseconds between samples (default: {DEFAULT_INTERVAL * 1000:g})",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="count allocations, calls, property reads and nodes; report on exit",
+        )
+        parser.add_argument(
+            "--stats-output",
+            metavar="FILE",
+            help="like --stats, and also write the counts to FILE as JSON",
+        )
+        parser.add_argument("script", nargs="?")
+        args = parser.parse_args()
+
+        if args.max_depth < 1:
+            parser.error("--max-depth must be at least 1")
+        profiling = args.profile or args.profile_output is not None
+        if profiling and args.engine == "vm":
+            parser.error("--profile needs the tree or closure engine")
+        counting = args.stats or args.stats_output is not None
+        if counting and args.engine == "vm":
+            parser.error("--stats needs the tree or closure engine")
+        if args.lazy and args.engine == "vm":
+            parser.error("--lazy needs the tree or closure engine")
+        if args.lazy and args.cache:
+            parser.error("--lazy can't be combined with --cache")
+        if args.sample_interval <= 0:
+            parser.error("--sample-interval must be positive")
+
+        Lox._max_depth = args.max_depth
+        Lox._interpreter = Lox._engines[args.engine]()
+        Lox._streaming = args.stream
+        Lox._lazy = args.lazy
+        Lox._optimizing = args.optimize or args.optimize_report
+        Lox._optimization_report = args.optimize_report
+        if profiling:
+            Lox._profiler = Profiler()
+            Lox._profile_output = args.profile_output
+            Lox._profiler.start(Lox._interpreter)
+        if counting:
+            Lox._stats = Stats()
+            Lox._stats_output = args.stats_output
+            Lox._stats.start(Lox._interpreter)
+        if args.sample is not None:
+            Lox._sampler = Sampler(args.sample_interval / 1000)
+            Lox._sample_output = args.sample
+            Lox._sampler.start(Lox._interpreter)
+        if args.cache:
+            Lox._cache = ProgramCache(default_directory())
+        if args.script is not None:
+            Lox._run_file(args.script)
         else:
             Lox._run_prompt()
 
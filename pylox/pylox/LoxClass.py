@@ -5,6 +5,7 @@ from LoxCallable import LoxCallable
 from Interpreter import Interpreter
 from LoxInstance import LoxInstance
 from LoxFunction import LoxFunction
+from Shape import Shape
 
 
 class LoxClass(LoxCallable):
@@ -16,33 +17,34 @@ class LoxClass(LoxCallable):
     ) -> None:
         self.super_class: Final[Optional[LoxClass]] = super_class
         self.name: Final[str] = name
-        self._methods: Final[dict[str, LoxFunction]] = methods
+        # Classes never change once created, so inherited methods are copied
+        # down and every lookup is a single dictionary access.
+        self._methods: Final[dict[str, LoxFunction]] = (
+            methods if super_class is None else super_class._methods | methods
+        )
+        self._initializer: Final[Optional[LoxFunction]] = self._methods.get("init")
+        self._arity: Final[int] = (
+            0 if self._initializer is None else self._initializer.arity()
+        )
+        # The shape every new instance starts out with.
+        self.shape: Final[Shape] = Shape({})
 
     def __str__(self) -> str:
         return self.name
 
     def find_method(self, name: str) -> Optional[LoxFunction]:
-        if name in self._methods:
-            return self._methods[name]
-
-        if self.super_class is not None:
-            return self.super_class.find_method(name)
-
-        return None
+        return self._methods.get(name)
 
     @override
     def call(
         self, interpreter: Interpreter, arguments: list[object]
     ) -> Optional[object]:
         instance: LoxInstance = LoxInstance(self)
-        initializer: Optional[LoxFunction] = self.find_method("init")
-        if initializer is not None:
-            initializer.bind(instance).call(interpreter, arguments)
+        if self._initializer is not None:
+            arguments.insert(0, instance)
+            self._initializer.invoke(interpreter, arguments)
         return instance
 
     @override
     def arity(self) -> int:
-        initializer: Optional[LoxFunction] = self.find_method("init")
-        if initializer is None:
-            return 0
-        return initializer.arity()
+        return self._arity
@@ -2,40 +2,85 @@ from __future__ import annotations
 from typing import Final, Optional
 from Interpreter import Interpreter
 from LoxCallable import LoxCallable
+from Parser import Parser
+from PreParser import LazyBody
+from Resolver import Resolver
 from Stmt import Function
-from Environment import Environment
+from Environment import Cell, Environment
 from Return import Return
 from LoxInstance import LoxInstance
 
 
 class LoxFunction(LoxCallable):
-    def __init__(self, declaration: Function, closure: Environment, is_initializer: bool) -> None:
+    def __init__(
+        self,
+        declaration: Function,
+        cells: tuple[Cell, ...],
+        is_initializer: bool,
+        receiver: Optional[LoxInstance] = None,
+    ) -> None:
         super().__init__()
-        self._closure: Final[Environment] = closure
+        # The captured variables the function uses, and nothing else of the
+        # scopes it was created in.
+        self._cells: Final[tuple[Cell, ...]] = cells
         self._declaration: Final[Function] = declaration
         self._is_initializer: Final[bool] = is_initializer
+        # The instance "this" refers to, once a method has been bound.
+        self._receiver: Final[Optional[LoxInstance]] = receiver
 
     def bind(self, instance: LoxInstance):
-        environment = Environment(self._closure)
-        environment.define("this", instance)
-        return LoxFunction(self._declaration, environment, self._is_initializer)
+        return LoxFunction(self._declaration, self._cells, self._is_initializer, instance)
 
     def call(
         self, interpreter: Interpreter, arguments: list[object]
     ) -> Optional[object]:
-        environment: Environment = Environment(self._closure)
-        for idx, param in enumerate(self._declaration.params):
-            environment.define(param.lexeme, arguments[idx])
+        if self._receiver is not None:
+            arguments.insert(0, self._receiver)
+        return self.invoke(interpreter, arguments)
 
-        try:
-            interpreter.execute_block(self._declaration.body, environment)
-        except Return as return_value:
-            if self._is_initializer:
-                return self._closure.get_at(0, "this")
-            return return_value.value
+    def invoke(self, interpreter: Interpreter, values: list[object]) -> Optional[object]:
+        """Runs the body with values in the first slots of its environment.
+
+        A method's environment starts with the instance "this" refers to,
+        followed by the arguments, so a caller holding the instance can
+        invoke the method without binding it first.
+        """
+        environment: Environment = self._environment(interpreter, values)
+        completion: Optional[Return] = interpreter.execute_block(
+            self._declaration.body, environment
+        )
 
         if self._is_initializer:
-            return self._closure.get_at(0, "this")
+            return self._this(values)
+        if completion is not None:
+            return completion.value
+        return None
+
+    def _environment(self, interpreter: Interpreter, values: list[object]) -> Environment:
+        # Parameters occupy the first slots, in order, so the freshly
+        # evaluated argument list becomes the environment's values.
+        declaration: Function = self._declaration
+        locals: Optional[int] = declaration.locals
+        if locals:
+            values += [None] * locals
+        elif locals is None:
+            self._load(interpreter)
+            return self._environment(interpreter, values)
+        for slot in declaration.captured_params:  # type: ignore[reportOptionalIterable]
+            values[slot] = Cell(values[slot])
+        return Environment(values, self._cells)
+
+    def _load(self, interpreter: Interpreter) -> None:
+        """Parses and resolves a body the Parser only pre-parsed."""
+        declaration: Function = self._declaration
+        lazy: LazyBody = declaration.lazy  # type: ignore[reportAssignmentType]
+        declaration.body.extend(Parser(lazy.tokens, lazy.error).parse())
+        Resolver(interpreter, lazy.error).resolve_lazy(declaration)
+
+    @staticmethod
+    def _this(values: list[object]) -> object:
+        this: object = values[0]
+        return this.value if type(this) is Cell else this
 
     def arity(self) -> int:
         return len(self._declaration.params)
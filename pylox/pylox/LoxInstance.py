@@ -1,7 +1,9 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Final, Optional
+from typing import TYPE_CHECKING, Optional
 from RuntimeError import RuntimeError
 
+from Expr import Get, Set
+from Shape import Shape
 from Token import Token
 
 
@@ -11,22 +13,89 @@ if TYPE_CHECKING:
 
 
 class LoxInstance:
+    __slots__ = ("_klass", "_shape", "_values")
+
     def __init__(self, klass: LoxClass) -> None:
         self._klass = klass
-        self._fields: Final[dict[str, object]] = {}
+        # Field values by slot, laid out by the shape.
+        self._shape: Shape = klass.shape
+        self._values: list[object] = []
 
     def __str__(self) -> str:
         return self._klass.name + " instance"
 
-    def get(self, name: Token) -> object:
-        if name.lexeme in self._fields:
-            return self._fields[name.lexeme]
+    def get(self, name: Token, site: Optional[Get] = None) -> object:
+        shape: Shape = self._shape
+        if site is not None and site.cached_shape is shape:
+            slot: int = site.cached_slot  # type: ignore[reportAssignmentType]
+        else:
+            slot = self._look_up_slot(name.lexeme, site)
+
+        if slot >= 0:
+            return self._values[slot]
+
+        return self._find_method(name, site).bind(self)
+
+    def get_method(self, site: Get) -> Optional[LoxFunction]:
+        """Returns the unbound method site would get, or None for a field."""
+        shape: Shape = self._shape
+        if site.cached_shape is shape:
+            if site.cached_slot >= 0:  # type: ignore[reportOptionalOperand]
+                return None
+        elif self._look_up_slot(site.name.lexeme, site) >= 0:
+            return None
+
+        return self._find_method(site.name, site)
+
+    def _look_up_slot(self, name: str, site: Optional[Get]) -> int:
+        """Returns the slot of field name, or -1 if there is no such field.
+
+        The answer only depends on the shape, so a site remembers it for the
+        last shape it saw.
+        """
+        shape: Shape = self._shape
+        slot: int = shape.slots.get(name, -1)
+        if site is not None and shape.shared:
+            site.cached_shape = shape
+            site.cached_slot = slot
+        return slot
+
+    def _find_method(self, name: Token, site: Optional[Get]) -> LoxFunction:
+        # A call site remembers the method it last found and on which class,
+        # so a monomorphic site skips the lookup.
+        if site is not None and site.cached_class is self._klass:
+            return site.cached_method  # type: ignore[reportReturnType]
 
         method: Optional[LoxFunction] = self._klass.find_method(name.lexeme)
         if method is not None:
-            return method.bind(self)
+            if site is not None:
+                site.cached_class = self._klass
+                site.cached_method = method
+            return method
 
         raise RuntimeError(name, f"Undefined property '{name.lexeme}'.")
 
-    def set(self, name: Token, value: object):
-        self._fields[name.lexeme] = value
+    def set(self, name: Token, value: object, site: Optional[Set] = None):
+        shape: Shape = self._shape
+        if site is not None and site.cached_shape is shape:
+            # The site last stored into an instance of this shape, either
+            # into an existing slot or by adding the field.
+            if site.cached_next is None:
+                self._values[site.cached_slot] = value  # type: ignore[reportArgumentType]
+            else:
+                self._values.append(value)
+                self._shape = site.cached_next
+            return
+
+        slot: int = shape.slots.get(name.lexeme, -1)
+        if slot >= 0:
+            self._values[slot] = value
+            next_shape: Optional[Shape] = None
+        else:
+            self._values.append(value)
+            next_shape = self._shape = shape.with_field(name.lexeme)
+
+        if site is not None and shape.shared and (next_shape is None or next_shape.shared):
+            site.cached_shape = shape
+            site.cached_slot = slot
+            site.cached_next = next_shape
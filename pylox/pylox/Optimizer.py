@@ -0,0 +1,354 @@
+from typing import Final, Optional, override
+
+from Expr import (
+    Assign,
+    Binary,
+    Call,
+    Expr,
+    Get,
+    Grouping,
+    Literal,
+    Logical,
+    Set,
+    Super,
+    This,
+    Unary,
+    Variable,
+    Visitor as ExprVisitor,
+)
+from Stmt import (
+    Block,
+    Class,
+    Expression,
+    For,
+    Function,
+    If,
+    Print,
+    Return,
+    Stmt,
+    Var,
+    Visitor as StmtVisitor,
+    While,
+)
+from Environment import UPVALUE, Upvalue
+from Token import Token
+from TokenTypes import TokenType
+
+# Returned by _fold_binary when evaluating would raise a runtime error, which
+# has to be left for the interpreter to report.
+_UNFOLDABLE: Final[object] = object()
+
+
+def _is_truthy(value: object) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        return value
+    return True
+
+
+def _is_equal(a: object, b: object) -> bool:
+    if type(a) is not type(b):
+        return False
+    return a == b
+
+
+def _fold_binary(operator: TokenType, left: object, right: object) -> object:
+    if operator == TokenType.EQUAL_EQUAL:
+        return _is_equal(left, right)
+    if operator == TokenType.BANG_EQUAL:
+        return not _is_equal(left, right)
+
+    if operator == TokenType.PLUS and isinstance(left, str) and isinstance(right, str):
+        return left + right
+    if not isinstance(left, float) or not isinstance(right, float):
+        return _UNFOLDABLE
+
+    match operator:
+        case TokenType.PLUS:
+            return left + right
+        case TokenType.MINUS:
+            return left - right
+        case TokenType.STAR:
+            return left * right
+        case TokenType.SLASH:
+            if right == 0:
+                return _UNFOLDABLE
+            return left / right
+        case TokenType.LESS:
+            return left < right
+        case TokenType.LESS_EQUAL:
+            return left <= right
+        case TokenType.GREATER:
+            return left > right
+        case TokenType.GREATER_EQUAL:
+            return left >= right
+        case _:
+            return _UNFOLDABLE
+
+
+def count_nodes(statements: list[Stmt]) -> int:
+    count = 0
+    pending: list[object] = list(statements)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, list):
+            pending.extend(node)
+        elif isinstance(node, (Expr, Stmt)):
+            count += 1
+            for cls in type(node).__mro__:
+                # Kinds of a node add no slots of their own.
+                pending.extend(getattr(node, name) for name in getattr(cls, "__slots__", ()))
+    return count
+
+
+class Optimizer(ExprVisitor[Expr], StmtVisitor[Optional[Stmt]]):
+    """Rewrites a resolved program into a cheaper one that behaves the same.
+
+    Constant operands are folded, groupings dropped, branches and loops with
+    a constant condition pruned and logical operators with a constant left
+    operand simplified. Local variables that are initialized with a constant
+    and never assigned are replaced by that constant. Anything that would
+    raise a runtime error is left for the interpreter to raise at run time.
+
+    Variable, This and Super nodes are kept as they are, so their
+    resolutions still apply; rebuilt Assign nodes take over the resolution of
+    the node they replace in locals, and rebuilt declarations keep the slots
+    and captures the Resolver recorded on them.
+    """
+
+    def __init__(self, locals: dict[Expr, tuple[int, int]]) -> None:
+        self.locals: Final[dict[Expr, tuple[int, int]]] = locals
+        # Each function, starting with the top-level code, knows its Var
+        # declarations by the slot the Resolver gave them, and the
+        # variables it captures by upvalue index.
+        self._functions: list[tuple[dict[int, Token], list[Upvalue]]] = [({}, [])]
+        self._assigned: set[Token] = set()
+        self._constants: dict[Token, Literal] = {}
+        self._rewriting = False
+
+    def optimize(self, statements: list[Stmt]) -> list[Stmt]:
+        # A first pass finds every local that gets assigned, which may be
+        # textually after some of its reads, before any read is replaced.
+        self._statements(statements)
+        self._rewriting = True
+        return self._statements(statements)
+
+    def _statements(self, statements: list[Stmt]) -> list[Stmt]:
+        optimized: list[Stmt] = []
+        for statement in statements:
+            result = statement.accept(self)
+            if result is not None:
+                optimized.append(result)
+        return optimized
+
+    def _statement(self, statement: Stmt) -> Stmt:
+        result = statement.accept(self)
+        return Block([]) if result is None else result
+
+    def _declaration(self, expr: Expr) -> Optional[Token]:
+        access, slot = self.locals.get(expr, (-1, -1))
+        if access < 0:
+            return None
+        depth: int = len(self._functions) - 1
+        # A captured variable is found by following the upvalues out to the
+        # function that declares it.
+        while access == UPVALUE:
+            is_local, slot = self._functions[depth][1][slot]
+            depth -= 1
+            if is_local:
+                break
+        return self._functions[depth][0].get(slot)
+
+    def _function(self, stmt: Function) -> Function:
+        self._functions.append(({}, stmt.upvalues or []))
+        body: list[Stmt] = self._statements(stmt.body)
+        self._functions.pop()
+        function: Function = Function(stmt.name, stmt.params, body)
+        function.slot = stmt.slot
+        function.captured = stmt.captured
+        function.locals = stmt.locals
+        function.captured_params = stmt.captured_params
+        function.upvalues = stmt.upvalues
+        # A lazy body is not there to optimize, and runs as it is parsed.
+        function.lazy = stmt.lazy
+        return function
+
+    @override
+    def visit_Block_Stmt(self, stmt: Block) -> Optional[Stmt]:
+        statements: list[Stmt] = self._statements(stmt.statements)
+        if not statements:
+            return None
+        return Block(statements)
+
+    @override
+    def visit_Class_Stmt(self, stmt: Class) -> Optional[Stmt]:
+        methods: list[Function] = [self._function(method) for method in stmt.methods]
+        klass: Class = Class(stmt.name, stmt.super_class, methods)
+        klass.slot = stmt.slot
+        klass.captured = stmt.captured
+        klass.super_slot = stmt.super_slot
+        return klass
+
+    @override
+    def visit_Expression_Stmt(self, stmt: Expression) -> Optional[Stmt]:
+        expression: Expr = stmt.expression.accept(self)
+        if isinstance(expression, Literal):
+            return None
+        return Expression(expression)
+
+    @override
+    def visit_Function_Stmt(self, stmt: Function) -> Optional[Stmt]:
+        return self._function(stmt)
+
+    @override
+    def visit_If_Stmt(self, stmt: If) -> Optional[Stmt]:
+        condition: Expr = stmt.condition.accept(self)
+        if isinstance(condition, Literal):
+            if _is_truthy(condition.value):
+                return stmt.thenBranch.accept(self)
+            if stmt.elseBranch is not None:
+                return stmt.elseBranch.accept(self)
+            return None
+
+        then_branch: Stmt = self._statement(stmt.thenBranch)
+        else_branch: Optional[Stmt] = None
+        if stmt.elseBranch is not None:
+            else_branch = stmt.elseBranch.accept(self)
+        return If(condition, then_branch, else_branch)  # type: ignore[reportArgumentType]
+
+    @override
+    def visit_Print_Stmt(self, stmt: Print) -> Optional[Stmt]:
+        return Print(stmt.expression.accept(self))
+
+    @override
+    def visit_Return_Stmt(self, stmt: Return) -> Optional[Stmt]:
+        if stmt.value is None:
+            return stmt
+        return Return(stmt.keyword, stmt.value.accept(self))
+
+    @override
+    def visit_Var_Stmt(self, stmt: Var) -> Optional[Stmt]:
+        initializer: Optional[Expr] = None
+        if stmt.initializer is not None:
+            initializer = stmt.initializer.accept(self)
+
+        if stmt.slot is not None:
+            self._functions[-1][0][stmt.slot] = stmt.name
+            if self._rewriting and stmt.name not in self._assigned:
+                if initializer is None:
+                    self._constants[stmt.name] = Literal(None, stmt.name)
+                elif isinstance(initializer, Literal):
+                    self._constants[stmt.name] = initializer
+
+        var: Var = Var(stmt.name, initializer)  # type: ignore[reportArgumentType]
+        var.slot = stmt.slot
+        var.captured = stmt.captured
+        return var
+
+    @override
+    def visit_For_Stmt(self, stmt: For) -> Optional[Stmt]:
+        initializer: Optional[Stmt] = None
+        if stmt.initializer is not None:
+            initializer = stmt.initializer.accept(self)
+        condition: Expr = stmt.condition.accept(self)
+        body: Stmt = self._statement(stmt.body)
+        increment: Optional[Expr] = None
+        if stmt.increment is not None:
+            increment = stmt.increment.accept(self)
+            if isinstance(increment, Literal):
+                increment = None
+        return For(initializer, condition, increment, body)
+
+    @override
+    def visit_While_Stmt(self, stmt: While) -> Optional[Stmt]:
+        condition: Expr = stmt.condition.accept(self)
+        if isinstance(condition, Literal) and not _is_truthy(condition.value):
+            return None
+        return While(condition, self._statement(stmt.body))
+
+    @override
+    def visit_Assign_Expr(self, expr: Assign) -> Expr:
+        value: Expr = expr.value.accept(self)
+        declaration: Optional[Token] = self._declaration(expr)
+        if declaration is not None:
+            self._assigned.add(declaration)
+
+        if not self._rewriting:
+            return expr
+        assign: Assign = Assign(expr.name, value)
+        if expr in self.locals:
+            self.locals[assign] = self.locals.pop(expr)
+        return assign
+
+    @override
+    def visit_Binary_Expr(self, expr: Binary) -> Expr:
+        left: Expr = expr.left.accept(self)
+        right: Expr = expr.right.accept(self)
+        if isinstance(left, Literal) and isinstance(right, Literal):
+            value: object = _fold_binary(expr.operator.type, left.value, right.value)
+            if value is not _UNFOLDABLE:
+                return Literal(value, expr.operator)
+        return type(expr)(left, expr.operator, right)
+
+    @override
+    def visit_Call_Expr(self, expr: Call) -> Expr:
+        callee: Expr = expr.callee.accept(self)
+        arguments: list[Expr] = [argument.accept(self) for argument in expr.arguments]
+        return Call(callee, expr.line, arguments)
+
+    @override
+    def visit_Get_Expr(self, expr: Get) -> Expr:
+        return Get(expr.object.accept(self), expr.name)
+
+    @override
+    def visit_Grouping_Expr(self, expr: Grouping) -> Expr:
+        return expr.expression.accept(self)
+
+    @override
+    def visit_Literal_Expr(self, expr: Literal) -> Expr:
+        return expr
+
+    @override
+    def visit_Logical_Expr(self, expr: Logical) -> Expr:
+        left: Expr = expr.left.accept(self)
+        right: Expr = expr.right.accept(self)
+        if isinstance(left, Literal):
+            if _is_truthy(left.value) == (expr.operator.type == TokenType.OR):
+                return left
+            return right
+        return type(expr)(left, expr.operator, right)
+
+    @override
+    def visit_Set_Expr(self, expr: Set) -> Expr:
+        return Set(expr.object.accept(self), expr.name, expr.value.accept(self))
+
+    @override
+    def visit_Super_Expr(self, expr: Super) -> Expr:
+        return expr
+
+    @override
+    def visit_This_Expr(self, expr: This) -> Expr:
+        return expr
+
+    @override
+    def visit_Unary_Expr(self, expr: Unary) -> Expr:
+        right: Expr = expr.right.accept(self)
+        if isinstance(right, Literal):
+            if expr.operator.type == TokenType.BANG:
+                return Literal(not _is_truthy(right.value), expr.operator)
+            if isinstance(right.value, float):
+                return Literal(-right.value, expr.operator)
+        return type(expr)(expr.operator, right)
+
+    @override
+    def visit_Variable_Expr(self, expr: Variable) -> Expr:
+        if not self._rewriting:
+            return expr
+        declaration: Optional[Token] = self._declaration(expr)
+        if declaration is None or declaration in self._assigned:
+            return expr
+        constant: Optional[Literal] = self._constants.get(declaration)
+        if constant is None:
+            return expr
+        return Literal(constant.value, expr.name)
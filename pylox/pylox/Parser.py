@@ -1,23 +1,87 @@
-from typing import Callable, Final, Optional
+from collections import deque
+from typing import Callable, Final, Iterable, Iterator, Optional
 
 from Expr import (
+    Add,
+    And,
     Assign,
     Binary,
     Call,
+    Divide,
+    Equal,
     Expr,
     Get,
+    Greater,
+    GreaterEqual,
     Grouping,
+    Less,
+    LessEqual,
     Literal,
     Logical,
+    Multiply,
+    Negate,
+    Not,
+    NotEqual,
+    Or,
     Set,
+    Subtract,
     Super,
     This,
     Unary,
     Variable,
 )
+from PreParser import LazyBody, PreParser
 from Token import Token
 from TokenTypes import TokenType
-from Stmt import Block, Class, Expression, Function, If, Return, Stmt, Print, Var, While
+from Stmt import Block, Class, Expression, For, Function, If, Return, Stmt, Print, Var, While
+
+# Operators get a node of their own kind, so an interpreter can evaluate
+# each one without looking at the operator token.
+_BINARY_KINDS: Final[dict[TokenType, type[Binary]]] = {
+    TokenType.PLUS: Add,
+    TokenType.MINUS: Subtract,
+    TokenType.STAR: Multiply,
+    TokenType.SLASH: Divide,
+    TokenType.LESS: Less,
+    TokenType.LESS_EQUAL: LessEqual,
+    TokenType.GREATER: Greater,
+    TokenType.GREATER_EQUAL: GreaterEqual,
+    TokenType.EQUAL_EQUAL: Equal,
+    TokenType.BANG_EQUAL: NotEqual,
+}
+_UNARY_KINDS: Final[dict[TokenType, type[Unary]]] = {
+    TokenType.MINUS: Negate,
+    TokenType.BANG: Not,
+}
+
+# Binding power of the binary and logical operators, loosest first. All of
+# them are left associative.
+_OR: Final[int] = 1
+_AND: Final[int] = 2
+_EQUALITY: Final[int] = 3
+_COMPARISON: Final[int] = 4
+_TERM: Final[int] = 5
+_FACTOR: Final[int] = 6
+
+_INFIX: Final[dict[TokenType, tuple[int, type[Binary] | type[Logical]]]] = {
+    TokenType.OR: (_OR, Or),
+    TokenType.AND: (_AND, And),
+    TokenType.EQUAL_EQUAL: (_EQUALITY, Equal),
+    TokenType.BANG_EQUAL: (_EQUALITY, NotEqual),
+    TokenType.GREATER: (_COMPARISON, Greater),
+    TokenType.GREATER_EQUAL: (_COMPARISON, GreaterEqual),
+    TokenType.LESS: (_COMPARISON, Less),
+    TokenType.LESS_EQUAL: (_COMPARISON, LessEqual),
+    TokenType.MINUS: (_TERM, Subtract),
+    TokenType.PLUS: (_TERM, Add),
+    TokenType.SLASH: (_FACTOR, Divide),
+    TokenType.STAR: (_FACTOR, Multiply),
+}
+_LITERALS: Final[dict[TokenType, object]] = {
+    TokenType.TRUE: True,
+    TokenType.FALSE: False,
+    TokenType.NIL: None,
+}
 
 
 class Parser:
@@ -25,38 +89,112 @@ class Parser:
 
     def __init__(
         self,
-        tokens: list[Token],
+        tokens: Iterable[Token],
         parse_error: Callable[[Token, str], None],
+        precedence_climbing: bool = True,
+        lazy: bool = False,
     ) -> None:
-        self._tokens: Final[list[Token]] = tokens
-        self._current: int = 0
+        # Only the current and previous tokens are ever looked at, so the
+        # tokens may come from a list or be scanned lazily.
+        self._tokens: Iterator[Token] = iter(tokens)
+        # Tokens read ahead by a pre-parse that was given up, to be read
+        # again before the rest of _tokens.
+        self._pushback: Final[deque[Token]] = deque()
+        self._current: Token = next(self._tokens)
+        self._previous_token: Token = self._current
         self._parse_error: Final[Callable[[Token, str], None]] = parse_error
+        # The recursive descent parser, one method per precedence level, is
+        # kept to check the precedence climbing one against.
+        self._precedence_climbing: Final[bool] = precedence_climbing
+        # Whether the bodies of top-level functions and methods are only
+        # pre-parsed, and parsed when they are first called.
+        self._lazy: Final[bool] = lazy
+        self._blocks: int = 0
 
     def parse(self) -> list[Stmt]:
-        statements: list[Stmt] = []
+        return list(self.declarations())
 
+    def declarations(self) -> Iterator[Stmt]:
+        """Yields each top-level declaration as soon as it has been parsed."""
         while not self._is_at_end():
-            statements.append(self._declaration())  # type: ignore[reportArgumentType]
+            yield self._declaration()  # type: ignore[reportReturnType]
+
+    def _expression(self) -> Expr:
+        # expression     → assignment ;
+        # assignment     → ( call "." )? IDENTIFIER "=" assignment
+        #                  | logic_or ;
+        if self._precedence_climbing:
+            expr: Expr = self._operation(_OR)
+        else:
+            expr = self._or()
 
-        return statements
+        if self._current.type == TokenType.EQUAL:
+            return self._assignment(expr)
+        return expr
 
-    def _expression(self):
-        return self._assignment()
+    def _assignment(self, target: Expr) -> Expr:
+        equals: Token = self._advance()
+        value: Expr = self._expression()
 
-    def _assignment(self) -> Expr:
-        expr: Expr = self._or()
+        if isinstance(target, Variable):
+            return Assign(target.name, value)
+        elif isinstance(target, Get):
+            return Set(target.object, target.name, value)
 
-        if self._match(TokenType.EQUAL):
-            equals: Token = self._previous()
-            value: Expr = self._assignment()
+        self._error(equals, "Invalid assignment target.")
+        return target
 
-            if isinstance(expr, Variable):
-                return Assign(expr.name, value)
-            elif isinstance(expr, Get):
-                return Set(expr.object, expr.name, value)
+    def _operation(self, precedence: int) -> Expr:
+        """Parses operators that bind at least as tightly as precedence.
 
-            self._error(equals, "Invalid assignment target.")
+        Operators of one level are folded in a loop and a right operand only
+        recurses for tighter ones, so an operand takes a couple of calls
+        rather than one for every level of the grammar.
+        """
+        expr: Expr = self._operand()
 
+        while True:
+            infix = _INFIX.get(self._current.type)
+            if infix is None or infix[0] < precedence:
+                return expr
+            operator: Token = self._advance()
+            right: Expr = self._operation(infix[0] + 1)
+            expr = infix[1](expr, operator, right)
+
+    def _operand(self) -> Expr:
+        """Parses a unary expression, dispatching on the token's type."""
+        operators: list[Token] = []
+        while self._current.type in _UNARY_KINDS:
+            operators.append(self._advance())
+
+        token: Token = self._current
+        type: TokenType = token.type
+        expr: Expr
+        if type == TokenType.IDENTIFIER:
+            expr = Variable(self._advance())
+        elif type == TokenType.NUMBER or type == TokenType.STRING:
+            expr = Literal(self._advance().literal, token)
+        elif type in _LITERALS:
+            expr = Literal(_LITERALS[type], self._advance())
+        else:
+            expr = self._primary()
+
+        while True:
+            type = self._current.type
+            if type == TokenType.LEFT_PAREN:
+                self._advance()
+                expr = self._finish_call(expr)
+            elif type == TokenType.DOT:
+                self._advance()
+                name = self._consume(
+                    TokenType.IDENTIFIER, "Expect property name after '.'."
+                )
+                expr = Get(expr, name)
+            else:
+                break
+
+        for operator in reversed(operators):
+            expr = _UNARY_KINDS[operator.type](operator, expr)
         return expr
 
     def _or(self) -> Expr:
@@ -65,7 +203,7 @@ class Parser:
         while self._match(TokenType.OR):
             operator = self._previous()
             right = self._and()
-            expr = Logical(expr, operator, right)
+            expr = Or(expr, operator, right)
 
         return expr
 
@@ -75,7 +213,7 @@ class Parser:
         while self._match(TokenType.AND):
             operator = self._previous()
             right = self._equality()
-            expr = Logical(expr, operator, right)
+            expr = And(expr, operator, right)
 
         return expr
 
@@ -101,12 +239,12 @@ class Parser:
         self._consume(TokenType.LEFT_BRACE, "Expect '{' before class body.")
         methods: list[Function] = []
         while not self._check(TokenType.RIGHT_BRACE) and not self._is_at_end():
-            methods.append(self._function("method"))
+            methods.append(self._function("method", super_class is not None))
 
         self._consume(TokenType.RIGHT_BRACE, "Expect '}' after class body.")
         return Class(name, super_class, methods)
 
-    def _function(self, kind: str) -> Function:
+    def _function(self, kind: str, superclass: bool = False) -> Function:
         name: Token = self._consume(TokenType.IDENTIFIER, f"Expect {kind} name.")
         self._consume(TokenType.LEFT_PAREN, f"Expect '(' after {kind} name.")
 
@@ -124,9 +262,55 @@ class Parser:
 
         self._consume(TokenType.RIGHT_PAREN, "Expect ')' after parameters.")
         self._consume(TokenType.LEFT_BRACE, f"Expect '{{' before {kind} body.")
+        # Functions in a block may capture its variables, which the
+        # Resolver has to know about before the block runs.
+        if self._lazy and self._blocks == 0:
+            lazy: Optional[LazyBody] = self._pre_parse(name, arguments, kind, superclass)
+            if lazy is not None:
+                function: Function = Function(name, arguments, [])
+                function.lazy = lazy
+                return function
+
         body: list[Stmt] = self._block()
         return Function(name, arguments, body)
 
+    def _pre_parse(
+        self, name: Token, params: list[Token], kind: str, superclass: bool
+    ) -> Optional[LazyBody]:
+        """Skips a function body that is sure to parse and resolve.
+
+        Returns None, with nothing consumed, for a body that may not.
+        """
+        tokens: list[Token] = []
+        depth: int = 0
+        token: Token = self._current
+        while token.type != TokenType.EOF:
+            if token.type == TokenType.LEFT_BRACE:
+                depth += 1
+            elif token.type == TokenType.RIGHT_BRACE:
+                if depth == 0:
+                    break
+                depth -= 1
+            tokens.append(token)
+            token = self._next_token()
+        tokens.append(Token(TokenType.EOF, "", None, token.line))
+
+        method: bool = kind == "method"
+        initializer: bool = method and name.lexeme == "init"
+        if token.type != TokenType.EOF and PreParser(
+            tokens, params, initializer, method, superclass
+        ).check():
+            # Consume the closing brace.
+            self._previous_token = token
+            self._current = self._next_token()
+            return LazyBody(tokens, method, self._parse_error)
+
+        # Put back what was read past the current token.
+        if len(tokens) > 1:
+            self._pushback.appendleft(token)
+            self._pushback.extendleft(reversed(tokens[1:-1]))
+        return None
+
     def _statement(self) -> Stmt:
         if self._match(TokenType.FOR):
             return self._for_statement()
@@ -144,6 +328,7 @@ class Parser:
         return self._expression_statement()
 
     def _for_statement(self) -> Stmt:
+        keyword: Token = self._previous()
         self._consume(TokenType.LEFT_PAREN, "Expect '(' after 'for'.")
 
         initializer: Optional[Stmt]
@@ -166,18 +351,10 @@ class Parser:
 
         body: Stmt = self._statement()
 
-        if increment:
-            body = Block([body, Expression(increment)])
-
         if not condition:
-            condition = Literal(True)
-
-        body = While(condition, body)
+            condition = Literal(True, keyword)
 
-        if initializer:
-            body = Block([initializer, body])
-
-        return body
+        return For(initializer, condition, increment, body)
 
     def _if_statement(self) -> Stmt:
         self._consume(TokenType.LEFT_PAREN, "Expect '(' after 'if'.")
@@ -231,8 +408,10 @@ class Parser:
     def _block(self):
         statements: list[Stmt] = []
 
+        self._blocks += 1
         while not self._check(TokenType.RIGHT_BRACE) and not self._is_at_end():
             statements.append(self._declaration())  # type: ignore[reportArgumentType]
+        self._blocks -= 1
 
         self._consume(TokenType.RIGHT_BRACE, "Expect '}' after block.")
         return statements
@@ -244,7 +423,7 @@ class Parser:
         while self._match(TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL):
             operator: Token = self._previous()
             right: Expr = self._comparision()
-            expr = Binary(expr, operator, right)
+            expr = _BINARY_KINDS[operator.type](expr, operator, right)
 
         return expr
 
@@ -260,7 +439,7 @@ class Parser:
         ):
             operator: Token = self._previous()
             right: Expr = self._term()
-            expr = Binary(expr, operator, right)
+            expr = _BINARY_KINDS[operator.type](expr, operator, right)
 
         return expr
 
@@ -273,7 +452,7 @@ class Parser:
         ):
             operator: Token = self._previous()
             right: Expr = self._factor()
-            expr = Binary(expr, operator, right)
+            expr = _BINARY_KINDS[operator.type](expr, operator, right)
 
         return expr
 
@@ -287,7 +466,7 @@ class Parser:
         ):
             operator: Token = self._previous()
             right: Expr = self._unary()
-            expr = Binary(expr, operator, right)
+            expr = _BINARY_KINDS[operator.type](expr, operator, right)
 
         return expr
 
@@ -297,7 +476,7 @@ class Parser:
         if self._match(TokenType.BANG, TokenType.MINUS):
             operator: Token = self._previous()
             right: Expr = self._unary()
-            return Unary(operator, right)
+            return _UNARY_KINDS[operator.type](operator, right)
 
         return self._call()
 
@@ -332,21 +511,21 @@ class Parser:
             TokenType.RIGHT_PAREN, "Expect ')' after arguments."
         )
 
-        return Call(expr, paren, arguments)
+        return Call(expr, paren.line, arguments)
 
     def _primary(self) -> Expr:
         # primary        → NUMBER | STRING | "true" | "false" | "nil"
         #                  | "(" expression ")" ;
         if self._match(TokenType.TRUE):
-            return Literal(True)
+            return Literal(True, self._previous())
         if self._match(TokenType.FALSE):
-            return Literal(False)
+            return Literal(False, self._previous())
         if self._match(TokenType.NIL):
-            return Literal(None)
+            return Literal(None, self._previous())
         if self._match(TokenType.IDENTIFIER):
             return Variable(self._previous())
         if self._match(TokenType.NUMBER, TokenType.STRING):
-            return Literal(self._previous().literal)
+            return Literal(self._previous().literal, self._previous())
         if self._match(TokenType.THIS):
             return This(self._previous())
 
@@ -359,7 +538,9 @@ class Parser:
             keyword = self._previous()
             self._consume(TokenType.DOT, "Expect '.' after 'super'.")
             method = self._consume(TokenType.IDENTIFIER, "Expect superclass method name.")
-            return Super(keyword, method)
+            # The instance the method is bound to is read like "this".
+            this = Token(TokenType.THIS, "this", None, keyword.line)
+            return Super(keyword, method, This(this))
 
         raise self._error(self._peek(), "Expect expression.")
 
@@ -413,14 +594,23 @@ class Parser:
 
     def _advance(self) -> Token:
         if not self._is_at_end():
-            self._current += 1
-        return self._previous()
+            self._previous_token = self._current
+            if self._pushback:
+                self._current = self._pushback.popleft()
+            else:
+                self._current = next(self._tokens)
+        return self._previous_token
+
+    def _next_token(self) -> Token:
+        if self._pushback:
+            return self._pushback.popleft()
+        return next(self._tokens)
 
     def _is_at_end(self) -> bool:
-        return self._tokens[self._current].type == TokenType.EOF
+        return self._current.type == TokenType.EOF
 
     def _peek(self) -> Token:
-        return self._tokens[self._current]
+        return self._current
 
     def _previous(self) -> Token:
-        return self._tokens[self._current - 1]
+        return self._previous_token
@@ -0,0 +1,308 @@
+from typing import Callable, Final, Optional
+
+from Token import Token
+from TokenTypes import TokenType
+
+_OPERATORS: Final[frozenset[TokenType]] = frozenset(
+    (
+        TokenType.OR,
+        TokenType.AND,
+        TokenType.EQUAL_EQUAL,
+        TokenType.BANG_EQUAL,
+        TokenType.GREATER,
+        TokenType.GREATER_EQUAL,
+        TokenType.LESS,
+        TokenType.LESS_EQUAL,
+        TokenType.MINUS,
+        TokenType.PLUS,
+        TokenType.SLASH,
+        TokenType.STAR,
+    )
+)
+_LITERALS: Final[frozenset[TokenType]] = frozenset(
+    (
+        TokenType.NUMBER,
+        TokenType.STRING,
+        TokenType.TRUE,
+        TokenType.FALSE,
+        TokenType.NIL,
+    )
+)
+
+
+class LazyBody:
+    """The body of a function the Parser has pre-parsed but not parsed.
+
+    It is parsed and resolved the first time the function is called.
+    """
+
+    __slots__ = ("tokens", "method", "error", "super_slot")
+
+    def __init__(
+        self,
+        tokens: list[Token],
+        method: bool,
+        error: Callable[[Token, str], None],
+    ) -> None:
+        # The tokens between the braces, followed by an EOF.
+        self.tokens: Final[list[Token]] = tokens
+        self.method: Final[bool] = method
+        self.error: Final[Callable[[Token, str], None]] = error
+        # Set by the Resolver for a method of a subclass, which is given a
+        # cell for "super" before anyone knows whether it uses it.
+        self.super_slot: Optional[int] = None
+
+
+class _Rejected(Exception): ...
+
+
+class PreParser:
+    """Tells whether a function body will parse and resolve without errors.
+
+    It walks the body's tokens through the grammar without building any
+    nodes. It is conservative rather than exact: besides syntax errors it
+    turns down a body that declares a name twice in a scope, mentions a
+    variable in its own initializer, uses "this" or "super" outside a
+    method or returns a value from "init", and anything it does not follow
+    at all, like a nested class or a call with 255 arguments. A body it
+    turns down is parsed right away, so its errors are reported as usual.
+    """
+
+    def __init__(
+        self,
+        tokens: list[Token],
+        params: list[Token],
+        initializer: bool,
+        method: bool,
+        superclass: bool,
+    ) -> None:
+        self._types: Final[list[TokenType]] = [token.type for token in tokens]
+        self._lexemes: Final[list[str]] = [token.lexeme for token in tokens]
+        self._params: Final[list[Token]] = params
+        self._current: int = 0
+        self._scopes: Final[list[set[str]]] = []
+        # Whether the innermost function is the initializer.
+        self._initializer: bool = initializer
+        self._method: Final[bool] = method
+        self._superclass: Final[bool] = superclass
+
+    def check(self) -> bool:
+        try:
+            self._begin_function(self._params)
+            while self._types[self._current] != TokenType.EOF:
+                self._declaration()
+        except _Rejected:
+            return False
+        return True
+
+    def _begin_function(self, params: list[Token]) -> None:
+        if len(params) >= 255:
+            raise _Rejected()
+        self._scopes.append(set())
+        for param in params:
+            self._declare(param.lexeme)
+
+    def _declare(self, name: str) -> None:
+        scope: set[str] = self._scopes[-1]
+        if name in scope:
+            raise _Rejected()
+        scope.add(name)
+
+    def _declaration(self) -> None:
+        type: TokenType = self._types[self._current]
+        if type == TokenType.FUN:
+            self._current += 1
+            self._function()
+        elif type == TokenType.VAR:
+            self._current += 1
+            self._var_declaration()
+        elif type == TokenType.CLASS:
+            raise _Rejected()
+        else:
+            self._statement()
+
+    def _function(self) -> None:
+        name: str = self._lexemes[self._current]
+        self._consume(TokenType.IDENTIFIER)
+        self._declare(name)
+        self._consume(TokenType.LEFT_PAREN)
+        params: list[str] = []
+        if self._types[self._current] != TokenType.RIGHT_PAREN:
+            params.append(self._lexemes[self._current])
+            self._consume(TokenType.IDENTIFIER)
+            while self._types[self._current] == TokenType.COMMA:
+                self._current += 1
+                params.append(self._lexemes[self._current])
+                self._consume(TokenType.IDENTIFIER)
+        self._consume(TokenType.RIGHT_PAREN)
+        self._consume(TokenType.LEFT_BRACE)
+
+        if len(params) >= 255:
+            raise _Rejected()
+        scope: set[str] = set(params)
+        if len(scope) != len(params):
+            raise _Rejected()
+        self._scopes.append(scope)
+        initializer: bool = self._initializer
+        self._initializer = False
+        self._block_rest()
+        self._initializer = initializer
+        self._scopes.pop()
+
+    def _var_declaration(self) -> None:
+        name: str = self._lexemes[self._current]
+        self._consume(TokenType.IDENTIFIER)
+        self._declare(name)
+        if self._types[self._current] == TokenType.EQUAL:
+            self._current += 1
+            start: int = self._current
+            self._expression()
+            if name in self._lexemes[start : self._current]:
+                raise _Rejected()
+        self._consume(TokenType.SEMICOLON)
+
+    def _statement(self) -> None:
+        types: list[TokenType] = self._types
+        type: TokenType = types[self._current]
+        if type == TokenType.FOR:
+            self._current += 1
+            self._for_statement()
+        elif type == TokenType.RETURN:
+            self._current += 1
+            if types[self._current] != TokenType.SEMICOLON:
+                if self._initializer:
+                    raise _Rejected()
+                self._expression()
+            self._consume(TokenType.SEMICOLON)
+        elif type == TokenType.WHILE or type == TokenType.IF:
+            self._current += 1
+            self._consume(TokenType.LEFT_PAREN)
+            self._expression()
+            self._consume(TokenType.RIGHT_PAREN)
+            self._statement()
+            if type == TokenType.IF and types[self._current] == TokenType.ELSE:
+                self._current += 1
+                self._statement()
+        elif type == TokenType.PRINT:
+            self._current += 1
+            self._expression()
+            self._consume(TokenType.SEMICOLON)
+        elif type == TokenType.LEFT_BRACE:
+            self._current += 1
+            self._scopes.append(set())
+            self._block_rest()
+            self._scopes.pop()
+        else:
+            self._expression()
+            self._consume(TokenType.SEMICOLON)
+
+    def _for_statement(self) -> None:
+        types: list[TokenType] = self._types
+        self._consume(TokenType.LEFT_PAREN)
+        # As in the Resolver, only a variable gets a scope of its own.
+        scoped: bool = types[self._current] == TokenType.VAR
+        if scoped:
+            self._current += 1
+            self._scopes.append(set())
+            self._var_declaration()
+        elif types[self._current] == TokenType.SEMICOLON:
+            self._current += 1
+        else:
+            self._expression()
+            self._consume(TokenType.SEMICOLON)
+
+        if types[self._current] != TokenType.SEMICOLON:
+            self._expression()
+        self._consume(TokenType.SEMICOLON)
+        if types[self._current] != TokenType.RIGHT_PAREN:
+            self._expression()
+        self._consume(TokenType.RIGHT_PAREN)
+        self._statement()
+        if scoped:
+            self._scopes.pop()
+
+    def _block_rest(self) -> None:
+        """Checks the declarations of a block whose '{' has been consumed."""
+        types: list[TokenType] = self._types
+        while types[self._current] != TokenType.RIGHT_BRACE:
+            if types[self._current] == TokenType.EOF:
+                raise _Rejected()
+            self._declaration()
+        self._current += 1
+
+    def _expression(self) -> None:
+        # Precedence makes no difference to whether an expression parses,
+        # but an assignment's target has to be a lone variable or property.
+        while True:
+            assignable: bool = self._operand()
+            while self._types[self._current] in _OPERATORS:
+                self._current += 1
+                self._operand()
+                assignable = False
+            if self._types[self._current] != TokenType.EQUAL:
+                return
+            if not assignable:
+                raise _Rejected()
+            self._current += 1
+
+    def _operand(self) -> bool:
+        """Checks a unary expression and returns whether it can be assigned."""
+        types: list[TokenType] = self._types
+        unary: bool = False
+        while types[self._current] == TokenType.BANG or types[self._current] == TokenType.MINUS:
+            self._current += 1
+            unary = True
+
+        type: TokenType = types[self._current]
+        self._current += 1
+        assignable: bool = False
+        if type == TokenType.IDENTIFIER:
+            assignable = True
+        elif type in _LITERALS:
+            pass
+        elif type == TokenType.LEFT_PAREN:
+            self._expression()
+            self._consume(TokenType.RIGHT_PAREN)
+        elif type == TokenType.THIS:
+            if not self._method:
+                raise _Rejected()
+        elif type == TokenType.SUPER:
+            if not self._superclass:
+                raise _Rejected()
+            self._consume(TokenType.DOT)
+            self._consume(TokenType.IDENTIFIER)
+        else:
+            raise _Rejected()
+
+        while True:
+            type = types[self._current]
+            if type == TokenType.LEFT_PAREN:
+                self._current += 1
+                self._arguments()
+                assignable = False
+            elif type == TokenType.DOT:
+                self._current += 1
+                self._consume(TokenType.IDENTIFIER)
+                assignable = True
+            else:
+                return assignable and not unary
+
+    def _arguments(self) -> None:
+        if self._types[self._current] == TokenType.RIGHT_PAREN:
+            self._current += 1
+            return
+
+        count: int = 1
+        self._expression()
+        while self._types[self._current] == TokenType.COMMA:
+            count += 1
+            if count >= 255:
+                raise _Rejected()
+            self._current += 1
+            self._expression()
+        self._consume(TokenType.RIGHT_PAREN)
+
+    def _consume(self, type: TokenType) -> None:
+        if self._types[self._current] != type:
+            raise _Rejected()
+        self._current += 1
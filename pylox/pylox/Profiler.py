@@ -0,0 +1,156 @@
+import json
+import sys
+import time
+from types import CodeType
+from typing import Final, Optional, TextIO
+
+from ClosureCompiler import CompiledFunction
+from Interpreter import Interpreter
+from LoxCallable import LoxCallable
+from LoxClass import LoxClass
+from LoxFunction import LoxFunction
+from Stmt import Function
+
+_monitoring = sys.monitoring
+_TOOL: Final[int] = _monitoring.PROFILER_ID
+
+
+class _Entry:
+    __slots__ = ("label", "calls", "active", "inclusive", "exclusive")
+
+    def __init__(self, label: str) -> None:
+        self.label: Final[str] = label
+        self.calls: int = 0
+        # Calls on the stack right now; recursive calls are only counted
+        # once in inclusive time.
+        self.active: int = 0
+        self.inclusive: int = 0
+        self.exclusive: int = 0
+
+
+class Profiler:
+    """Counts and times every call to a Lox function, method or native.
+
+    Nothing is instrumented until start: the profiler asks sys.monitoring for
+    events from the Python functions that run Lox calls, and only from those,
+    so the call path is unchanged when profiling is off. Times are in
+    nanoseconds; exclusive time leaves out the time spent in callees.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Final[dict[object, _Entry]] = {}
+        # One [frame, entry, start, time in callees] per call in progress.
+        self._stack: Final[list[list]] = []
+        self._natives: Final[dict[CodeType, str]] = {}
+        self._invokes: Final[set[CodeType]] = {
+            LoxFunction.invoke.__code__,
+            CompiledFunction.invoke.__code__,
+        }
+
+    def start(self, interpreter: Interpreter) -> None:
+        for name, value in interpreter.globals.items():
+            if isinstance(value, LoxCallable) and not isinstance(
+                value, (LoxFunction, LoxClass)
+            ):
+                self._natives[type(value).call.__code__] = name
+
+        _monitoring.use_tool_id(_TOOL, "pylox")
+        _monitoring.register_callback(_TOOL, _monitoring.events.PY_START, self._enter)
+        _monitoring.register_callback(_TOOL, _monitoring.events.PY_RETURN, self._leave)
+        _monitoring.register_callback(_TOOL, _monitoring.events.PY_UNWIND, self._unwind)
+        for code in self._invokes | self._natives.keys():
+            _monitoring.set_local_events(
+                _TOOL, code, _monitoring.events.PY_START | _monitoring.events.PY_RETURN
+            )
+        # Runtime errors end the program, so unwinding is rare enough to
+        # watch everywhere.
+        _monitoring.set_events(_TOOL, _monitoring.events.PY_UNWIND)
+
+    def stop(self) -> None:
+        for code in self._invokes | self._natives.keys():
+            _monitoring.set_local_events(_TOOL, code, 0)
+        _monitoring.set_events(_TOOL, 0)
+        _monitoring.free_tool_id(_TOOL)
+
+    def _entry(self, code: CodeType, frame) -> _Entry:
+        key: object
+        if code in self._invokes:
+            declaration: Function = frame.f_locals["self"]._declaration
+            key = declaration
+            label = f"{declaration.name.lexeme} (line {declaration.name.line})"
+        else:
+            key = code
+            label = f"{self._natives[code]} (native)"
+
+        entry: Optional[_Entry] = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry(label)
+        return entry
+
+    def _enter(self, code: CodeType, offset: int) -> None:
+        _ = offset
+        frame = sys._getframe(1)
+        entry: _Entry = self._entry(code, frame)
+        entry.calls += 1
+        entry.active += 1
+        self._stack.append([frame, entry, time.perf_counter_ns(), 0])
+
+    def _leave(self, code: CodeType, offset: int, value: object) -> None:
+        _ = code
+        _ = offset
+        _ = value
+        self._close(sys._getframe(1), time.perf_counter_ns())
+
+    def _unwind(self, code: CodeType, offset: int, exception: BaseException) -> None:
+        _ = offset
+        _ = exception
+        if code in self._invokes or code in self._natives:
+            self._close(sys._getframe(1), time.perf_counter_ns())
+
+    def _close(self, frame, now: int) -> None:
+        stack = self._stack
+        # A frame that failed to start its entry, say at the recursion limit,
+        # has nothing to close.
+        if not stack or stack[-1][0] is not frame:
+            return
+
+        _, entry, start, callees = stack.pop()
+        elapsed: int = now - start
+        entry.active -= 1
+        if entry.active == 0:
+            entry.inclusive += elapsed
+        entry.exclusive += elapsed - callees
+        if stack:
+            stack[-1][3] += elapsed
+
+    def _sorted(self) -> list[_Entry]:
+        return sorted(self._entries.values(), key=lambda e: e.exclusive, reverse=True)
+
+    def report(self, file: TextIO) -> None:
+        print(
+            f"{'calls':>10} {'inclusive ms':>13} {'exclusive ms':>13}  function",
+            file=file,
+        )
+        for entry in self._sorted():
+            print(
+                f"{entry.calls:>10} {entry.inclusive / 1e6:>13.3f}"
+                f" {entry.exclusive / 1e6:>13.3f}  {entry.label}",
+                file=file,
+            )
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                [
+                    {
+                        "function": entry.label,
+                        "calls": entry.calls,
+                        "inclusive_ns": entry.inclusive,
+                        "exclusive_ns": entry.exclusive,
+                    }
+                    for entry in self._sorted()
+                ],
+                f,
+                indent=2,
+            )
+            f.write("\n")
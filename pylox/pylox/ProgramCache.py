@@ -0,0 +1,139 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from typing import Final, Optional
+
+from Expr import Expr
+from Stmt import Stmt
+
+type Resolution = tuple[Expr, int, int]
+
+# Everything that decides what a cached program looks like. Changing any of
+# these files, or the Python version, moves every program to a new key.
+_FRONT_END_MODULES: Final[tuple[str, ...]] = (
+    "Environment.py",
+    "Expr.py",
+    "Parser.py",
+    "Resolver.py",
+    "Scanner.py",
+    "Stmt.py",
+    "Token.py",
+    "TokenTypes.py",
+)
+
+DEFAULT_MAX_BYTES: Final[int] = 64 * 1024 * 1024
+
+
+class ResolutionRecorder:
+    """Stands in for the interpreter during resolution to keep what it's told."""
+
+    def __init__(self) -> None:
+        self.resolutions: Final[list[Resolution]] = []
+
+    def resolve(self, expr: Expr, access: int, slot: int):
+        self.resolutions.append((expr, access, slot))
+
+
+def default_directory() -> str:
+    if "PYLOX_CACHE_DIR" in os.environ:
+        return os.environ["PYLOX_CACHE_DIR"]
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "pylox")
+
+
+class ProgramCache:
+    """Parsed and resolved programs stored on disk, keyed by source hash.
+
+    An entry is the statement list together with the resolutions the
+    Resolver reported for it, pickled as one object so the side table keeps
+    pointing at the very nodes in the statement list. Entries are written to
+    a temporary file and renamed into place, so concurrent runs only ever see
+    whole entries. Loading an entry touches it, and storing one evicts the
+    least recently used entries while the directory is over max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self._directory: Final[str] = directory
+        self._max_bytes: Final[int] = max_bytes
+        self._version: Final[bytes] = ProgramCache._front_end_version()
+
+    @staticmethod
+    def _front_end_version() -> bytes:
+        digest = hashlib.sha256(sys.version.encode())
+        here = os.path.dirname(os.path.abspath(__file__))
+        for module in _FRONT_END_MODULES:
+            with open(os.path.join(here, module), "rb") as f:
+                digest.update(f.read())
+        return digest.digest()
+
+    def _path(self, source: str) -> str:
+        digest = hashlib.sha256(self._version)
+        digest.update(source.encode("utf-8", "surrogatepass"))
+        return os.path.join(self._directory, f"{digest.hexdigest()}.pickle")
+
+    def load(self, source: str) -> Optional[tuple[list[Stmt], list[Resolution]]]:
+        path = self._path(source)
+        try:
+            with open(path, "rb") as f:
+                program = pickle.load(f)
+        except Exception:
+            # A missing or damaged entry is just a miss; storing replaces it.
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return program
+
+    def store(
+        self, source: str, statements: list[Stmt], resolutions: list[Resolution]
+    ) -> None:
+        try:
+            os.makedirs(self._directory, mode=0o700, exist_ok=True)
+            data = pickle.dumps((statements, resolutions), pickle.HIGHEST_PROTOCOL)
+            fd, temporary = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temporary, self._path(source))
+            except BaseException:
+                os.unlink(temporary)
+                raise
+        except (OSError, pickle.PicklingError, RecursionError):
+            # Caching is best effort; the program has already been compiled.
+            return
+
+        self._evict()
+
+    def _evict(self) -> None:
+        entries: list[tuple[float, int, str]] = []
+        try:
+            names = os.listdir(self._directory)
+        except OSError:
+            return
+
+        for name in names:
+            if not name.endswith(".pickle"):
+                continue
+            path = os.path.join(self._directory, name)
+            try:
+                status = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self._max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -1,5 +1,6 @@
+from __future__ import annotations
 from enum import Enum, auto
-from typing import Callable, Final, override
+from typing import Callable, Final, Optional, override
 from Expr import (
     Assign,
     Binary,
@@ -20,6 +21,7 @@ from Stmt import (
     Block,
     Class,
     Expression,
+    For,
     Function,
     If,
     Print,
@@ -29,8 +31,12 @@ from Stmt import (
     Visitor as StmtVisitor,
     While,
 )
+from Environment import CELL, LOCAL, UPVALUE, Upvalue
 from Interpreter import Interpreter
+from PreParser import LazyBody
+from ProgramCache import ResolutionRecorder
 from Token import Token
+from VM import VM
 
 
 class _FunctionType(Enum):
@@ -46,14 +52,50 @@ class _ClassType(Enum):
     SUBCLASS = auto()
 
 
+class _Function:
+    """A function being resolved, or the top-level code."""
+
+    def __init__(self, enclosing: Optional[_Function]) -> None:
+        self.enclosing: Final[Optional[_Function]] = enclosing
+        # Slots handed out so far; every local of the function gets its own.
+        self.size: int = 0
+        self.upvalues: Final[list[Upvalue]] = []
+
+    def next_slot(self) -> int:
+        self.size += 1
+        return self.size - 1
+
+    def capture(self, upvalue: Upvalue) -> int:
+        if upvalue not in self.upvalues:
+            self.upvalues.append(upvalue)
+        return self.upvalues.index(upvalue)
+
+
+class _Local:
+    def __init__(
+        self,
+        function: _Function,
+        declaration: Optional[Var | Function | Class] = None,
+    ) -> None:
+        self.function: Final[_Function] = function
+        self.slot: Final[int] = function.next_slot()
+        self.declaration: Final[Optional[Var | Function | Class]] = declaration
+        self.defined: bool = False
+        self.captured: bool = False
+        # Uses by the declaring function itself, which can only be told
+        # whether to go through a cell once the whole scope has been seen.
+        self.uses: Final[list[Expr]] = []
+
+
 class Resolver(ExprVistor[None], StmtVisitor[None]):
     def __init__(
         self,
-        interpreter: Interpreter,
+        interpreter: Interpreter | VM | ResolutionRecorder,
         error: Callable[[Token, str], None],
     ) -> None:
-        self._interpreter: Final[Interpreter] = interpreter
-        self._scopes: Final[list[dict[str, bool]]] = []
+        self._interpreter: Final[Interpreter | VM | ResolutionRecorder] = interpreter
+        self._scopes: Final[list[dict[str, _Local]]] = []
+        self._function: _Function = _Function(None)
         self._error: Callable[[Token, str], None] = error
         self._current_function: _FunctionType = _FunctionType.NONE
         self._current_class: _ClassType = _ClassType.NONE
@@ -68,7 +110,7 @@ class Resolver(ExprVistor[None], StmtVisitor[None]):
     def visit_Class_Stmt(self, stmt: Class) -> None:
         enclosing_class: _ClassType = self._current_class
         self._current_class = _ClassType.CLASS
-        self._declare(stmt.name)
+        self._declare(stmt.name, stmt)
         self._define(stmt.name)
 
         if stmt.super_class is not None and stmt.name.lexeme == stmt.super_class.name.lexeme:
@@ -78,10 +120,7 @@ class Resolver(ExprVistor[None], StmtVisitor[None]):
             self._current_class = _ClassType.SUBCLASS
             self._resolve(stmt.super_class)
             self._begin_scope()
-            self._scopes[-1]["super"] = True
-
-        self._begin_scope()
-        self._scopes[-1]["this"] = True
+            stmt.super_slot = self._define_synthetic("super").slot
 
         for method in stmt.methods:
             declaration = _FunctionType.METHOD
@@ -92,20 +131,21 @@ class Resolver(ExprVistor[None], StmtVisitor[None]):
         if stmt.super_class is not None:
             self._end_scope()
 
-        self._end_scope()
         self._current_class = enclosing_class
 
     @override
     def visit_Var_Stmt(self, stmt: Var) -> None:
-        self._declare(stmt.name)
+        self._declare(stmt.name, stmt)
         if stmt.initializer:
             self._resolve(stmt.initializer)
         self._define(stmt.name)
 
     @override
     def visit_Variable_Expr(self, expr: Variable) -> None:
-        if self._scopes and self._scopes[-1].get(expr.name.lexeme) is False:
-            self._error(expr.name, "Can't read local variable in its own initializer.")
+        if self._scopes:
+            local = self._scopes[-1].get(expr.name.lexeme)
+            if local is not None and not local.defined:
+                self._error(expr.name, "Can't read local variable in its own initializer.")
 
         self._resolve_local(expr, expr.name)
 
@@ -114,9 +154,24 @@ class Resolver(ExprVistor[None], StmtVisitor[None]):
         self._resolve(expr.value)
         self._resolve_local(expr, expr.name)
 
+    @override
+    def visit_For_Stmt(self, stmt: For) -> None:
+        # A variable declared by the initializer is shared by all iterations.
+        scoped: bool = isinstance(stmt.initializer, Var)
+        if scoped:
+            self._begin_scope()
+        if stmt.initializer is not None:
+            self._resolve(stmt.initializer)
+        self._resolve(stmt.condition)
+        self._resolve(stmt.body)
+        if stmt.increment is not None:
+            self._resolve(stmt.increment)
+        if scoped:
+            self._end_scope()
+
     @override
     def visit_Function_Stmt(self, stmt: Function) -> None:
-        self._declare(stmt.name)
+        self._declare(stmt.name, stmt)
         self._define(stmt.name)
         self._resolve_function(stmt, _FunctionType.FUNCTION)
 
@@ -177,6 +232,7 @@ class Resolver(ExprVistor[None], StmtVisitor[None]):
             self._error(expr.keyword, "Can't use 'super' in a class with no superclass.")
 
         self._resolve_local(expr, expr.keyword)
+        self._resolve_local(expr.this, expr.this.keyword)
 
     @override
     def visit_This_Expr(self, expr: This) -> None:
@@ -214,34 +270,122 @@ class Resolver(ExprVistor[None], StmtVisitor[None]):
         self._scopes.append({})
 
     def _end_scope(self):
-        self._scopes.pop()
-
-    def _declare(self, name: Token):
+        # Whether a local was captured is only known now, so this is when
+        # its declaration and its uses in its own function are told.
+        for local in self._scopes.pop().values():
+            access: int = CELL if local.captured else LOCAL
+            for expr in local.uses:
+                self._interpreter.resolve(expr, access, local.slot)
+            if local.declaration is not None:
+                local.declaration.slot = local.slot
+                local.declaration.captured = local.captured
+
+    def _declare(self, name: Token, declaration: Optional[Var | Function | Class] = None):
         if not self._scopes:
             return
-        scope: dict[str, bool] = self._scopes[-1]
-        if scope.get(name.lexeme):
+        scope: dict[str, _Local] = self._scopes[-1]
+        existing = scope.get(name.lexeme)
+        if existing is not None and existing.defined:
             self._error(name, "Already a variable with this name in this scope.")
-        scope[name.lexeme] = False
+        scope[name.lexeme] = _Local(self._function, declaration)
 
     def _define(self, name: Token):
         if not self._scopes:
             return
-        self._scopes[-1][name.lexeme] = True
+        self._scopes[-1][name.lexeme].defined = True
+
+    def _define_synthetic(self, name: str) -> _Local:
+        local = _Local(self._function)
+        local.defined = True
+        self._scopes[-1][name] = local
+        return local
 
     def _resolve_local(self, expr: Expr, name: Token):
         for i in range(len(self._scopes) - 1, -1, -1):
-            if self._scopes[i].get(name.lexeme) is not None:
-                self._interpreter.resolve(expr, len(self._scopes) - 1 - i)
+            local = self._scopes[i].get(name.lexeme)
+            if local is not None:
+                if local.function is self._function:
+                    local.uses.append(expr)
+                else:
+                    index: int = self._capture(self._function, local)
+                    self._interpreter.resolve(expr, UPVALUE, index)
                 return
 
+    def _capture(self, function: _Function, local: _Local) -> int:
+        """Returns the index of local among the cells function captures.
+
+        Functions between the two capture it as well, so that each one can
+        hand the cell down when it creates the next.
+        """
+        enclosing: _Function = function.enclosing  # type: ignore[reportAssignmentType]
+        if local.function is enclosing:
+            local.captured = True
+            return function.capture((True, local.slot))
+        return function.capture((False, self._capture(enclosing, local)))
+
+    def resolve_lazy(self, function: Function) -> None:
+        """Resolves the body of a lazy function once it has been parsed.
+
+        Lazy functions are declared at the top level, where the only local
+        they can see is "super", which is put back in the slot it had.
+        """
+        lazy: LazyBody = function.lazy  # type: ignore[reportAssignmentType]
+        function.lazy = None
+        function_type: _FunctionType = _FunctionType.FUNCTION
+        if lazy.method:
+            self._current_class = _ClassType.CLASS
+            function_type = _FunctionType.METHOD
+            if function.name.lexeme == "init":
+                function_type = _FunctionType.INITIALIZER
+        if lazy.super_slot is not None:
+            self._current_class = _ClassType.SUBCLASS
+            self._begin_scope()
+            self._function.size = lazy.super_slot
+            self._define_synthetic("super")
+
+        self._resolve_function(function, function_type)
+
+        if lazy.super_slot is not None:
+            self._end_scope()
+
     def _resolve_function(self, function: Function, function_type: _FunctionType):
+        if function.lazy is not None:
+            # The body is resolved when it is first called. A method of a
+            # subclass is given a cell for "super" in case it uses it.
+            function.upvalues = []
+            if self._current_class == _ClassType.SUBCLASS:
+                local: _Local = self._scopes[-1]["super"]
+                local.captured = True
+                function.lazy.super_slot = local.slot
+                function.upvalues.append((True, local.slot))
+            return
+
         enclosing_function: _FunctionType = self._current_function
         self._current_function = function_type
+        self._function = _Function(self._function)
+        # Cells a lazy function was created with keep their places.
+        if function.upvalues:
+            self._function.upvalues.extend(function.upvalues)
         self._begin_scope()
+        is_method: bool = function_type in (_FunctionType.METHOD, _FunctionType.INITIALIZER)
+        if is_method:
+            # "this" takes the first slot of a method's environment, so a
+            # call can hand over the instance along with the arguments.
+            self._define_synthetic("this")
         for param in function.params:
             self._declare(param)
             self._define(param)
         self.resolve(function.body)
+
+        # The caller fills in the first slots, with "this" and the arguments.
+        given: int = len(function.params) + (1 if is_method else 0)
+        function.captured_params = [
+            local.slot
+            for local in self._scopes[-1].values()
+            if local.slot < given and local.captured
+        ]
+        function.locals = self._function.size - given
+        function.upvalues = self._function.upvalues
         self._end_scope()
+        self._function = self._function.enclosing  # type: ignore[reportAttributeAccessIssue]
         self._current_function = enclosing_function
@@ -1,8 +1,15 @@
-
 from typing import Final
 
 
-class Return(RuntimeError):
+class Return:
+    """What a statement completes with when a return statement ran in it.
+
+    Statements complete with None normally. Blocks, branches and loops pass
+    a Return up to the function being called, which unwraps the value, so
+    returning never raises a Python exception.
+    """
+
+    __slots__ = ("value",)
+
     def __init__(self, value: object) -> None:
-        super().__init__()
         self.value: Final[object] = value
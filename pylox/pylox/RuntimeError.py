@@ -4,6 +4,6 @@ from Token import Token
 
 
 class RuntimeError(RuntimeError):
-    def __init__(self, token: Token, message: str) -> None:
+    def __init__(self, where: Token | int, message: str) -> None:
         super().__init__(message)
-        self.token: Final[Token] = token
+        self.line: Final[int] = where if isinstance(where, int) else where.line
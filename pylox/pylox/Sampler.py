@@ -0,0 +1,127 @@
+import sys
+import threading
+from types import CodeType, FrameType
+from typing import Callable, Final, Optional
+
+from ClosureCompiler import ClosureCompiler, CompiledFunction
+from ClosureInterpreter import ClosureInterpreter
+from Interpreter import Interpreter
+from LoxCallable import LoxCallable
+from LoxClass import LoxClass
+from LoxFunction import LoxFunction
+from VM import VM
+
+DEFAULT_INTERVAL: Final[float] = 0.01
+
+
+def _nested_code(function: Callable, name: str) -> CodeType:
+    for constant in function.__code__.co_consts:
+        if isinstance(constant, CodeType) and constant.co_name == name:
+            return constant
+    raise AssertionError(f"{function.__qualname__} defines no {name}.")
+
+
+# Python functions running a Lox call, and those evaluating a call expression
+# with the Lox line of the call in one of their locals.
+_INVOKES: Final[frozenset[CodeType]] = frozenset(
+    (LoxFunction.invoke.__code__, CompiledFunction.invoke.__code__)
+)
+_CALL_SITES: Final[dict[CodeType, Callable[[dict], int]]] = {
+    Interpreter.visit_Call_Expr.__code__: lambda f_locals: f_locals["expr"].line,
+    Interpreter._invoke.__code__: lambda f_locals: f_locals["expr"].line,
+    _nested_code(ClosureCompiler.visit_Call_Expr, "call"): lambda f_locals: f_locals["line"],
+    _nested_code(ClosureCompiler._invoke, "invoke"): lambda f_locals: f_locals["line"],
+}
+_INTERPRETS: Final[frozenset[CodeType]] = frozenset(
+    (Interpreter.interpret.__code__, ClosureInterpreter.interpret.__code__)
+)
+_VM_RUN: Final[CodeType] = VM._run.__code__
+
+
+class Sampler:
+    """Periodically records the Lox call stack of the thread running Lox.
+
+    A background thread looks at the Python frames of the running program
+    every interval seconds and translates them to Lox frames, so nothing is
+    added to the call path. Each Lox frame is named after its function and,
+    unless it is the innermost, the line it made the call to the next one on.
+    Stacks are counted in the folded format flamegraph tools read.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL) -> None:
+        self._interval: Final[float] = interval
+        self._stacks: Final[dict[str, int]] = {}
+        self._natives: Final[dict[CodeType, str]] = {}
+        self._stopped: Final[threading.Event] = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._target: int = 0
+
+    def start(self, interpreter: Interpreter | VM) -> None:
+        if isinstance(interpreter, Interpreter):
+            for name, value in interpreter.globals.items():
+                if isinstance(value, LoxCallable) and not isinstance(
+                    value, (LoxFunction, LoxClass)
+                ):
+                    self._natives[type(value).call.__code__] = name
+
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="pylox sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            frame: Optional[FrameType] = sys._current_frames().get(self._target)
+            if frame is None:
+                return
+            stack: list[str] = self._lox_stack(frame)
+            if stack:
+                folded = ";".join(reversed(stack))
+                self._stacks[folded] = self._stacks.get(folded, 0) + 1
+
+    def _lox_stack(self, frame: Optional[FrameType]) -> list[str]:
+        """Lox frames from the innermost out, down to the top level."""
+        stack: list[str] = []
+        # The line of the call made by the next Lox frame out.
+        line: Optional[int] = None
+        while frame is not None:
+            code: CodeType = frame.f_code
+            if code in _INVOKES:
+                name = frame.f_locals["self"]._declaration.name.lexeme
+                stack.append(name if line is None else f"{name}:{line}")
+                line = None
+            elif code in _CALL_SITES:
+                if line is None:
+                    line = _CALL_SITES[code](frame.f_locals)
+            elif code in self._natives:
+                stack.append(self._natives[code])
+            elif code in _INTERPRETS:
+                stack.append("<script>" if line is None else f"<script>:{line}")
+                return stack
+            elif code is _VM_RUN:
+                return self._vm_stack(frame.f_locals["self"])
+            frame = frame.f_back
+
+        # Not running Lox code.
+        return []
+
+    def _vm_stack(self, vm: VM) -> list[str]:
+        stack: list[str] = []
+        frames = list(vm._frames)
+        for depth, frame in enumerate(reversed(frames)):
+            function = frame.closure.function
+            name = "<script>" if function.name is None else function.name
+            if depth == 0:
+                stack.append(name)
+            else:
+                stack.append(f"{name}:{function.chunk.lines[frame.ip - 1]}")
+        return stack
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for folded, count in sorted(self._stacks.items()):
+                f.write(f"{folded} {count}\n")
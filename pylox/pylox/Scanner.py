@@ -1,7 +1,51 @@
-from typing import Callable, Final
+import re
+import sys
+from typing import Callable, Final, Iterator
 from Token import Token
 from TokenTypes import TokenType
 
+# One match consumes a whole whitespace run, comment, newline run, number,
+# identifier, string or operator. Numbers and identifiers followed by a
+# non-ASCII character do not match, nor does anything else outside ASCII,
+# so those fall back to the character-at-a-time scanner, which accepts the
+# same Unicode letters and digits as str.isalpha() and str.isdigit().
+_TOKEN_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r"""
+    ([ \t\r]+|//[^\n]*)                                          # 1: skipped
+    |([A-Za-z_][A-Za-z0-9_]*+)(?![^\x00-\x7f])                    # 2: identifier
+    |(!=|==|<=|>=|[(){},.\-+;*/!=<>])                             # 3: operator
+    |(\n+)                                                        # 4: newlines
+    |([0-9]++(?:\.[0-9]++)?+)(?![^\x00-\x7f]|\.[^\x00-\x7f])     # 5: number
+    |"([^"]*)"                                                    # 6: string
+    """,
+    re.VERBOSE,
+)
+
+_OPERATORS: Final[dict[str, TokenType]] = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    ";": TokenType.SEMICOLON,
+    "*": TokenType.STAR,
+    "/": TokenType.SLASH,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+}
+
+# How much source tokens() scans with the table-driven path between yields.
+_STREAM_CHUNK: Final[int] = 1 << 16
+
 
 class Scanner:
     keywords = {
@@ -23,15 +67,24 @@ class Scanner:
         "while": TokenType.WHILE,
     }
 
-    def __init__(self, source: str, error: Callable[[int, str], None]) -> None:
+    def __init__(
+        self,
+        source: str,
+        error: Callable[[int, str], None],
+        table_driven: bool = True,
+    ) -> None:
         self._source: Final[str] = source
         self._tokens: Final[list[Token]] = []
         self._start = 0
         self._current = 0
         self._line = 1
         self._error: Final[Callable[[int, str], None]] = error
+        self._table_driven: Final[bool] = table_driven
 
     def scan_tokens(self) -> list[Token]:
+        if self._table_driven:
+            self._scan_table_driven(len(self._source))
+
         while not self._is_at_end():
             self._start = self._current
             self._scan_token()
@@ -39,6 +92,74 @@ class Scanner:
         self._tokens.append(Token(TokenType.EOF, "", None, self._line))
         return self._tokens
 
+    def tokens(self) -> Iterator[Token]:
+        """Yields the tokens scan_tokens() would return while scanning lazily.
+
+        Errors are reported as the scan reaches them, which with the
+        table-driven path may be up to a chunk of source ahead of the last
+        token yielded.
+        """
+        scanned: list[Token] = self._tokens
+        while not self._is_at_end():
+            if self._table_driven:
+                self._scan_table_driven(self._current + _STREAM_CHUNK)
+            else:
+                self._start = self._current
+                self._scan_token()
+            yield from scanned
+            scanned.clear()
+
+        yield Token(TokenType.EOF, "", None, self._line)
+
+    def _scan_table_driven(self, stop: int) -> None:
+        source: str = self._source
+        stop = min(len(source), stop)
+        tokens: list[Token] = self._tokens
+        append = tokens.append
+        match = _TOKEN_PATTERN.match
+        keywords: dict[str, TokenType] = Scanner.keywords
+        operators: dict[str, TokenType] = _OPERATORS
+        intern = sys.intern
+        identifier: TokenType = TokenType.IDENTIFIER
+        number: TokenType = TokenType.NUMBER
+        string: TokenType = TokenType.STRING
+        line: int = self._line
+        position: int = self._current
+
+        while position < stop:
+            m = match(source, position)
+            if m is None:
+                # Unexpected characters, unterminated strings and non-ASCII
+                # input take the character-at-a-time path for one token.
+                self._start = self._current = position
+                self._line = line
+                self._scan_token()
+                position = self._current
+                line = self._line
+                continue
+
+            end: int = m.end()
+            group = m.lastindex
+            if group == 2:
+                text = intern(m.group(2))
+                append(Token(keywords.get(text, identifier), text, None, line))
+            elif group == 3:
+                text = m.group(3)
+                append(Token(operators[text], text, None, line))
+            elif group == 4:
+                line += end - position
+            elif group == 5:
+                text = m.group(5)
+                append(Token(number, text, float(text), line))
+            elif group == 6:
+                value = m.group(6)
+                line += value.count("\n")
+                append(Token(string, source[position:end], value, line))
+            position = end
+
+        self._current = position
+        self._line = line
+
     def _is_at_end(self) -> bool:
         return self._current >= len(self._source)
 
@@ -175,11 +296,13 @@ class Scanner:
         while self._is_alpha_numeric(self._peek()):
             self._advance()
 
-        text = self._source[self._start : self._current]
+        # Identifiers recur throughout a program, so every occurrence shares
+        # one interned lexeme instead of holding its own slice of the source.
+        text = sys.intern(self._source[self._start : self._current])
 
         type = Scanner.keywords.get(text)
 
         if not type:
             type = TokenType.IDENTIFIER
 
-        self._add_token(type)
+        self._tokens.append(Token(type, text, None, self._line))
@@ -0,0 +1,54 @@
+from __future__ import annotations
+from typing import Final, Optional
+
+# Past either limit an instance gets a shape of its own, which it grows in
+# place like a dictionary, instead of joining or extending the shared tree.
+MAX_FIELDS: Final[int] = 64
+MAX_SHAPES: Final[int] = 64
+
+
+class Shape:
+    """The layout of an instance's fields: the slot each field name is in.
+
+    Every class has a root shape with no fields. Adding a field moves an
+    instance to the next shape in its class's transition tree, so instances
+    whose fields were added in the same order share one shape and keep only
+    a list of values. Slots are never reused or moved, so a (shape, slot)
+    pair stays valid for as long as the shape exists.
+    """
+
+    __slots__ = ("slots", "shared", "_root", "_count", "_transitions")
+
+    def __init__(
+        self,
+        slots: dict[str, int],
+        root: Optional[Shape] = None,
+        shared: bool = True,
+    ) -> None:
+        self.slots: Final[dict[str, int]] = slots
+        # Unshared shapes belong to a single instance and change with it, so
+        # call sites must not remember them.
+        self.shared: Final[bool] = shared
+        self._root: Final[Shape] = self if root is None else root
+        # The number of shapes in the tree, kept on the root.
+        self._count: int = 1
+        self._transitions: Final[dict[str, Shape]] = {}
+
+    def with_field(self, name: str) -> Shape:
+        """Returns the shape of an instance of this shape once name is added."""
+        if not self.shared:
+            self.slots[name] = len(self.slots)
+            return self
+
+        shape: Optional[Shape] = self._transitions.get(name)
+        if shape is not None:
+            return shape
+
+        slots: dict[str, int] = self.slots | {name: len(self.slots)}
+        root: Shape = self._root
+        if len(slots) > MAX_FIELDS or root._count >= MAX_SHAPES:
+            return Shape(slots, root, shared=False)
+
+        root._count += 1
+        shape = self._transitions[name] = Shape(slots, root)
+        return shape
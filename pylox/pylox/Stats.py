@@ -0,0 +1,129 @@
+import json
+import sys
+from collections import defaultdict
+from types import CodeType
+from typing import Final, TextIO
+
+from ClosureCompiler import CompiledFunction
+from Environment import Environment
+from Interpreter import Interpreter
+from LoxCallable import LoxCallable
+from LoxClass import LoxClass
+from LoxFunction import LoxFunction
+from LoxInstance import LoxInstance
+
+_monitoring = sys.monitoring
+# The Profiler has PROFILER_ID; 3 is one of the ids without a predefined use.
+_TOOL: Final[int] = 3
+
+_ENVIRONMENTS: Final[frozenset[CodeType]] = frozenset((Environment.__init__.__code__,))
+_BINDS: Final[frozenset[CodeType]] = frozenset(
+    (LoxFunction.bind.__code__, CompiledFunction.bind.__code__)
+)
+_INSTANCES: Final[frozenset[CodeType]] = frozenset((LoxInstance.__init__.__code__,))
+_LOX_CALLS: Final[frozenset[CodeType]] = frozenset(
+    (LoxFunction.invoke.__code__, CompiledFunction.invoke.__code__)
+)
+# Every property read goes through one of the lookups, and only reads that
+# find no field go on to the method lookup.
+_PROPERTY_LOOKUPS: Final[frozenset[CodeType]] = frozenset(
+    (LoxInstance.get.__code__, LoxInstance.get_method.__code__)
+)
+_METHOD_LOOKUPS: Final[frozenset[CodeType]] = frozenset(
+    (LoxInstance._find_method.__code__,)
+)
+# Except for the reads of Get nodes that have specialized to load a field
+# straight out of its slot. (A read that makes one of them go back to the
+# generic lookup is counted twice, once per site at most.)
+_FIELD_LOADS: Final[frozenset[CodeType]] = frozenset(
+    (Interpreter.visit_FieldGet_Expr.__code__,)
+)
+# The tree-walking Interpreter evaluates each node in its visitor method.
+_NODES: Final[dict[CodeType, str]] = {
+    method.__code__: name.split("_")[1]
+    for name, method in vars(Interpreter).items()
+    if name.startswith("visit_")
+}
+
+
+class Stats:
+    """Counts runtime events: allocations, calls, property reads and nodes.
+
+    Like the Profiler, Stats has sys.monitoring report the start of the
+    Python functions that allocate or run things for Lox, and only once
+    start is called, so an ordinary run counts nothing and pays nothing.
+    """
+
+    def __init__(self) -> None:
+        self._counts: Final[defaultdict[CodeType, int]] = defaultdict(int)
+        self._natives: Final[set[CodeType]] = set()
+
+    def _codes(self) -> set[CodeType]:
+        return self._natives.union(
+            _ENVIRONMENTS,
+            _BINDS,
+            _INSTANCES,
+            _LOX_CALLS,
+            _PROPERTY_LOOKUPS,
+            _METHOD_LOOKUPS,
+            _NODES,
+        )
+
+    def start(self, interpreter: Interpreter) -> None:
+        for _, value in interpreter.globals.items():
+            if isinstance(value, LoxCallable) and not isinstance(
+                value, (LoxFunction, LoxClass)
+            ):
+                self._natives.add(type(value).call.__code__)
+
+        _monitoring.use_tool_id(_TOOL, "pylox stats")
+        _monitoring.register_callback(_TOOL, _monitoring.events.PY_START, self._count)
+        for code in self._codes():
+            _monitoring.set_local_events(_TOOL, code, _monitoring.events.PY_START)
+
+    def stop(self) -> None:
+        for code in self._codes():
+            _monitoring.set_local_events(_TOOL, code, 0)
+        _monitoring.free_tool_id(_TOOL)
+
+    def _count(self, code: CodeType, offset: int) -> None:
+        _ = offset
+        self._counts[code] += 1
+
+    def _total(self, codes: frozenset[CodeType] | set[CodeType]) -> int:
+        return sum(self._counts[code] for code in codes)
+
+    def summary(self) -> dict[str, object]:
+        method_reads = self._total(_METHOD_LOOKUPS)
+        nodes: dict[str, int] = {}
+        for code, name in _NODES.items():
+            if self._counts[code]:
+                nodes[name] = self._counts[code]
+        return {
+            "environments": self._total(_ENVIRONMENTS),
+            "bound_methods": self._total(_BINDS),
+            "instances": self._total(_INSTANCES),
+            "lox_calls": self._total(_LOX_CALLS),
+            "native_calls": self._total(self._natives),
+            "field_reads": self._total(_PROPERTY_LOOKUPS)
+            - method_reads
+            + self._total(_FIELD_LOADS),
+            "method_reads": method_reads,
+            "nodes": dict(sorted(nodes.items(), key=lambda item: item[1], reverse=True)),
+        }
+
+    def report(self, file: TextIO) -> None:
+        summary = self.summary()
+        nodes: dict[str, int] = summary.pop("nodes")  # type: ignore[reportAssignmentType]
+        for name, count in summary.items():
+            print(f"{name.replace('_', ' '):>16}: {count}", file=file)
+        # The closure and vm engines don't visit nodes at run time.
+        if nodes:
+            print("nodes evaluated:", file=file)
+            for name, count in nodes.items():
+                print(f"{name:>16}: {count}", file=file)
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+            f.write("\n")
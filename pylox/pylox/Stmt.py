@@ -1,12 +1,19 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Final, Optional, override
+from typing import TYPE_CHECKING, Final, Optional, override
 
 from Token import Token
 from Expr import Expr, Variable
 
+if TYPE_CHECKING:
+    from Environment import Upvalue
+    from PreParser import LazyBody
+
 
 class Stmt(ABC):
+    # Nodes have no per-instance __dict__; every subclass lists its fields.
+    __slots__ = ()
+
     @abstractmethod
     def accept[R](self, visitor: Visitor[R]) -> R: ...
 
@@ -21,6 +28,9 @@ class Visitor[R]:
     @abstractmethod
     def visit_Expression_Stmt(self, stmt: Expression) -> R: ...
 
+    @abstractmethod
+    def visit_For_Stmt(self, stmt: For) -> R: ...
+
     @abstractmethod
     def visit_Function_Stmt(self, stmt: Function) -> R: ...
 
@@ -41,6 +51,8 @@ class Visitor[R]:
 
 
 class Block(Stmt):
+    __slots__ = ("statements",)
+
     def __init__(self, statements: list[Stmt]):
         super().__init__()
         self.statements: Final[list[Stmt]] = statements
@@ -51,6 +63,8 @@ class Block(Stmt):
 
 
 class Class(Stmt):
+    __slots__ = ("name", "super_class", "methods", "slot", "captured", "super_slot")
+
     def __init__(
         self, name: Token, super_class: Optional[Variable], methods: list[Function]
     ):
@@ -58,6 +72,9 @@ class Class(Stmt):
         self.name: Final[Token] = name
         self.super_class: Final[Optional[Variable]] = super_class
         self.methods: Final[list[Function]] = methods
+        self.slot: Optional[int] = None
+        self.captured: Optional[bool] = None
+        self.super_slot: Optional[int] = None
 
     @override
     def accept[R](self, visitor: Visitor[R]) -> R:
@@ -65,6 +82,8 @@ class Class(Stmt):
 
 
 class Expression(Stmt):
+    __slots__ = ("expression",)
+
     def __init__(self, expression: Expr):
         super().__init__()
         self.expression: Final[Expr] = expression
@@ -74,12 +93,37 @@ class Expression(Stmt):
         return visitor.visit_Expression_Stmt(self)
 
 
+class For(Stmt):
+    __slots__ = ("initializer", "condition", "increment", "body")
+
+    def __init__(
+        self, initializer: Optional[Stmt], condition: Expr, increment: Optional[Expr], body: Stmt
+    ):
+        super().__init__()
+        self.initializer: Final[Optional[Stmt]] = initializer
+        self.condition: Final[Expr] = condition
+        self.increment: Final[Optional[Expr]] = increment
+        self.body: Final[Stmt] = body
+
+    @override
+    def accept[R](self, visitor: Visitor[R]) -> R:
+        return visitor.visit_For_Stmt(self)
+
+
 class Function(Stmt):
+    __slots__ = ("name", "params", "body", "slot", "captured", "locals", "captured_params", "upvalues", "lazy")
+
     def __init__(self, name: Token, params: list[Token], body: list[Stmt]):
         super().__init__()
         self.name: Final[Token] = name
         self.params: Final[list[Token]] = params
         self.body: Final[list[Stmt]] = body
+        self.slot: Optional[int] = None
+        self.captured: Optional[bool] = None
+        self.locals: Optional[int] = None
+        self.captured_params: Optional[list[int]] = None
+        self.upvalues: Optional[list[Upvalue]] = None
+        self.lazy: Optional[LazyBody] = None
 
     @override
     def accept[R](self, visitor: Visitor[R]) -> R:
@@ -87,6 +131,8 @@ class Function(Stmt):
 
 
 class If(Stmt):
+    __slots__ = ("condition", "thenBranch", "elseBranch")
+
     def __init__(self, condition: Expr, thenBranch: Stmt, elseBranch: Stmt):
         super().__init__()
         self.condition: Final[Expr] = condition
@@ -99,6 +145,8 @@ class If(Stmt):
 
 
 class Print(Stmt):
+    __slots__ = ("expression",)
+
     def __init__(self, expression: Expr):
         super().__init__()
         self.expression: Final[Expr] = expression
@@ -109,6 +157,8 @@ class Print(Stmt):
 
 
 class Return(Stmt):
+    __slots__ = ("keyword", "value")
+
     def __init__(self, keyword: Token, value: Expr):
         super().__init__()
         self.keyword: Final[Token] = keyword
@@ -120,10 +170,14 @@ class Return(Stmt):
 
 
 class Var(Stmt):
+    __slots__ = ("name", "initializer", "slot", "captured")
+
     def __init__(self, name: Token, initializer: Expr):
         super().__init__()
         self.name: Final[Token] = name
         self.initializer: Final[Expr] = initializer
+        self.slot: Optional[int] = None
+        self.captured: Optional[bool] = None
 
     @override
     def accept[R](self, visitor: Visitor[R]) -> R:
@@ -131,6 +185,8 @@ class Var(Stmt):
 
 
 class While(Stmt):
+    __slots__ = ("condition", "body")
+
     def __init__(self, condition: Expr, body: Stmt):
         super().__init__()
         self.condition: Final[Expr] = condition
@@ -3,6 +3,8 @@ from typing import Final
 
 
 class Token:
+    __slots__ = ("type", "lexeme", "literal", "line")
+
     def __init__(
         self,
         type: TokenType,
@@ -0,0 +1,548 @@
+from __future__ import annotations
+import time
+from typing import Callable, Final, NoReturn, Optional
+
+from Chunk import OpCode
+from Compiler import Compiler
+from Expr import Expr
+from RuntimeError import RuntimeError
+from Stmt import Stmt
+from Token import Token
+from VMObject import (
+    ObjBoundMethod,
+    ObjClass,
+    ObjClosure,
+    ObjFunction,
+    ObjInstance,
+    ObjNative,
+    ObjUpvalue,
+)
+
+FRAMES_MAX: Final[int] = 1024
+
+_CONSTANT: Final[int] = OpCode.CONSTANT.value
+_NIL: Final[int] = OpCode.NIL.value
+_TRUE: Final[int] = OpCode.TRUE.value
+_FALSE: Final[int] = OpCode.FALSE.value
+_POP: Final[int] = OpCode.POP.value
+_GET_LOCAL: Final[int] = OpCode.GET_LOCAL.value
+_SET_LOCAL: Final[int] = OpCode.SET_LOCAL.value
+_GET_GLOBAL: Final[int] = OpCode.GET_GLOBAL.value
+_DEFINE_GLOBAL: Final[int] = OpCode.DEFINE_GLOBAL.value
+_SET_GLOBAL: Final[int] = OpCode.SET_GLOBAL.value
+_GET_UPVALUE: Final[int] = OpCode.GET_UPVALUE.value
+_SET_UPVALUE: Final[int] = OpCode.SET_UPVALUE.value
+_GET_PROPERTY: Final[int] = OpCode.GET_PROPERTY.value
+_SET_PROPERTY: Final[int] = OpCode.SET_PROPERTY.value
+_GET_SUPER: Final[int] = OpCode.GET_SUPER.value
+_EQUAL: Final[int] = OpCode.EQUAL.value
+_NOT_EQUAL: Final[int] = OpCode.NOT_EQUAL.value
+_GREATER: Final[int] = OpCode.GREATER.value
+_GREATER_EQUAL: Final[int] = OpCode.GREATER_EQUAL.value
+_LESS: Final[int] = OpCode.LESS.value
+_LESS_EQUAL: Final[int] = OpCode.LESS_EQUAL.value
+_ADD: Final[int] = OpCode.ADD.value
+_SUBTRACT: Final[int] = OpCode.SUBTRACT.value
+_MULTIPLY: Final[int] = OpCode.MULTIPLY.value
+_DIVIDE: Final[int] = OpCode.DIVIDE.value
+_NOT: Final[int] = OpCode.NOT.value
+_NEGATE: Final[int] = OpCode.NEGATE.value
+_PRINT: Final[int] = OpCode.PRINT.value
+_JUMP: Final[int] = OpCode.JUMP.value
+_JUMP_IF_FALSE: Final[int] = OpCode.JUMP_IF_FALSE.value
+_LOOP: Final[int] = OpCode.LOOP.value
+_CALL: Final[int] = OpCode.CALL.value
+_INVOKE: Final[int] = OpCode.INVOKE.value
+_SUPER_INVOKE: Final[int] = OpCode.SUPER_INVOKE.value
+_TAIL_CALL: Final[int] = OpCode.TAIL_CALL.value
+_TAIL_INVOKE: Final[int] = OpCode.TAIL_INVOKE.value
+_CLOSURE: Final[int] = OpCode.CLOSURE.value
+_CLOSE_UPVALUE: Final[int] = OpCode.CLOSE_UPVALUE.value
+_RETURN: Final[int] = OpCode.RETURN.value
+_CLASS: Final[int] = OpCode.CLASS.value
+_INHERIT: Final[int] = OpCode.INHERIT.value
+_METHOD: Final[int] = OpCode.METHOD.value
+
+
+class _CallFrame:
+    __slots__ = ("closure", "ip", "base")
+
+    def __init__(self, closure: ObjClosure, base: int) -> None:
+        self.closure: Final[ObjClosure] = closure
+        self.ip: int = 0
+        self.base: Final[int] = base
+
+
+class VM:
+    """A stack-based virtual machine executing bytecode from the Compiler.
+
+    Lox calls push a _CallFrame instead of recursing in Python, so the depth
+    of Lox recursion is bounded by max_frames rather than by the host stack.
+    A call to a Lox function in tail position replaces the caller's frame,
+    so tail recursion runs in constant space.
+    """
+
+    def __init__(
+        self, error: Callable[[Token, str], None], max_frames: int = FRAMES_MAX
+    ) -> None:
+        self.globals: Final[dict[str, object]] = {}
+        self._max_frames: Final[int] = max_frames
+        self._compiler: Final[Compiler] = Compiler(error)
+        self._stack: list[object] = []
+        self._frames: list[_CallFrame] = []
+        self._open_upvalues: dict[int, ObjUpvalue] = {}
+
+        self.globals["clock"] = ObjNative(0, time.time)
+
+    def resolve(self, expr: Expr, access: int, slot: int):
+        # The Compiler resolves variables to stack slots and upvalues itself.
+        _ = expr
+        _ = access
+        _ = slot
+
+    def interpret(
+        self,
+        statements: list[Stmt],
+        runtime_error: Callable[[RuntimeError], None],
+    ):
+        function: Optional[ObjFunction] = self._compiler.compile(statements)
+        if function is None:
+            return
+
+        closure = ObjClosure(function, [])
+        self._stack.append(closure)
+        self._call(closure, 0)
+        try:
+            self._run()
+        except RuntimeError as e:
+            self._reset_stack()
+            runtime_error(e)
+
+    def _reset_stack(self) -> None:
+        self._stack.clear()
+        self._frames.clear()
+        self._open_upvalues.clear()
+
+    def _runtime_error(self, message: str) -> NoReturn:
+        frame: _CallFrame = self._frames[-1]
+        # The instruction pointer has already moved past the failing
+        # instruction, whose bytes all share one line.
+        line: int = frame.closure.function.chunk.lines[frame.ip - 1]
+        raise RuntimeError(line, message)
+
+    def _call(self, closure: ObjClosure, arg_count: int) -> None:
+        arity: int = closure.function.arity
+        if arg_count != arity:
+            self._runtime_error(f"Expected {arity} arguments but got {arg_count}.")
+
+        if len(self._frames) == self._max_frames:
+            self._runtime_error("Stack overflow.")
+
+        self._frames.append(_CallFrame(closure, len(self._stack) - arg_count - 1))
+
+    def _tail_call(self, closure: ObjClosure, arg_count: int) -> None:
+        arity: int = closure.function.arity
+        if arg_count != arity:
+            self._runtime_error(f"Expected {arity} arguments but got {arg_count}.")
+
+        # The callee and its arguments slide down over the returning frame's
+        # slots, so its locals have to be closed over first.
+        stack: list[object] = self._stack
+        base: int = self._frames[-1].base
+        if self._open_upvalues:
+            self._close_upvalues(base)
+        stack[base:] = stack[len(stack) - arg_count - 1 :]
+        self._frames[-1] = _CallFrame(closure, base)
+
+    def _call_value(self, callee: object, arg_count: int) -> None:
+        stack: list[object] = self._stack
+        callee_type = type(callee)
+
+        if callee_type is ObjClosure:
+            self._call(callee, arg_count)  # type: ignore[reportArgumentType]
+        elif callee_type is ObjBoundMethod:
+            stack[-arg_count - 1] = callee.receiver  # type: ignore[reportAttributeAccessIssue]
+            self._call(callee.method, arg_count)  # type: ignore[reportAttributeAccessIssue]
+        elif callee_type is ObjClass:
+            stack[-arg_count - 1] = ObjInstance(callee)  # type: ignore[reportArgumentType]
+            initializer: Optional[ObjClosure] = callee.methods.get("init")  # type: ignore[reportAttributeAccessIssue]
+            if initializer is not None:
+                self._call(initializer, arg_count)
+            elif arg_count != 0:
+                self._runtime_error(f"Expected 0 arguments but got {arg_count}.")
+        elif callee_type is ObjNative:
+            arity: int = callee.arity  # type: ignore[reportAttributeAccessIssue]
+            if arg_count != arity:
+                self._runtime_error(f"Expected {arity} arguments but got {arg_count}.")
+            result = callee.function(*stack[len(stack) - arg_count :])  # type: ignore[reportAttributeAccessIssue]
+            del stack[len(stack) - arg_count - 1 :]
+            stack.append(result)
+        else:
+            self._runtime_error("Can only call functions and classes.")
+
+    def _invoke_from_class(self, klass: ObjClass, name: str, arg_count: int) -> None:
+        method: Optional[ObjClosure] = klass.methods.get(name)
+        if method is None:
+            self._runtime_error(f"Undefined property '{name}'.")
+        self._call(method, arg_count)
+
+    def _capture_upvalue(self, slot: int) -> ObjUpvalue:
+        upvalue: Optional[ObjUpvalue] = self._open_upvalues.get(slot)
+        if upvalue is None:
+            upvalue = ObjUpvalue(slot)
+            self._open_upvalues[slot] = upvalue
+        return upvalue
+
+    def _close_upvalues(self, last: int) -> None:
+        stack: list[object] = self._stack
+        open_upvalues: dict[int, ObjUpvalue] = self._open_upvalues
+        for slot in [slot for slot in open_upvalues if slot >= last]:
+            upvalue: ObjUpvalue = open_upvalues.pop(slot)
+            upvalue.closed = stack[slot]
+            upvalue.slot = -1
+
+    def _stringify(self, value: object) -> str:
+        if value is None:
+            return "nil"
+
+        if value is True:
+            return "true"
+
+        if value is False:
+            return "false"
+
+        if isinstance(value, float):
+            text = str(value)
+            if text.endswith(".0"):
+                text = text[:-2]
+            return text
+
+        return str(value)
+
+    def _run(self) -> None:
+        stack: list[object] = self._stack
+        push = stack.append
+        pop = stack.pop
+        frames: list[_CallFrame] = self._frames
+        globals: dict[str, object] = self.globals
+
+        frame: _CallFrame = frames[-1]
+        closure: ObjClosure = frame.closure
+        code = closure.function.chunk.code
+        constants: list[object] = closure.function.chunk.constants
+        base: int = frame.base
+        ip: int = frame.ip
+
+        while True:
+            instruction: int = code[ip]
+            ip += 1
+
+            if instruction == _GET_LOCAL:
+                push(stack[base + code[ip]])
+                ip += 1
+            elif instruction == _CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif instruction == _POP:
+                pop()
+            elif instruction == _SET_LOCAL:
+                stack[base + code[ip]] = stack[-1]
+                ip += 1
+            elif instruction == _GET_GLOBAL:
+                name: str = constants[code[ip]]  # type: ignore[reportAssignmentType]
+                ip += 1
+                if name not in globals:
+                    frame.ip = ip
+                    self._runtime_error(f"Undefined variable '{name}'.")
+                push(globals[name])
+            elif instruction == _GET_UPVALUE:
+                upvalue: ObjUpvalue = closure.upvalues[code[ip]]
+                ip += 1
+                push(stack[upvalue.slot] if upvalue.slot >= 0 else upvalue.closed)
+            elif instruction == _GET_PROPERTY:
+                instance = stack[-1]
+                name = constants[code[ip]]  # type: ignore[reportAssignmentType]
+                ip += 1
+                if type(instance) is not ObjInstance:
+                    frame.ip = ip
+                    self._runtime_error("Only instances have properties.")
+                fields: dict[str, object] = instance.fields
+                if name in fields:
+                    stack[-1] = fields[name]
+                else:
+                    method: Optional[ObjClosure] = instance.klass.methods.get(name)
+                    if method is None:
+                        frame.ip = ip
+                        self._runtime_error(f"Undefined property '{name}'.")
+                    stack[-1] = ObjBoundMethod(instance, method)
+            elif instruction == _JUMP_IF_FALSE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip += ((code[ip] << 8) | code[ip + 1]) + 2
+                else:
+                    ip += 2
+            elif instruction == _LOOP:
+                ip -= ((code[ip] << 8) | code[ip + 1]) - 2
+            elif instruction == _JUMP:
+                ip += ((code[ip] << 8) | code[ip + 1]) + 2
+            elif instruction == _ADD:
+                b = pop()
+                a = stack[-1]
+                if type(a) is float and type(b) is float:
+                    stack[-1] = a + b
+                elif type(a) is str and type(b) is str:
+                    stack[-1] = a + b
+                else:
+                    frame.ip = ip
+                    self._runtime_error("Operands must be two numbers or two strings.")
+            elif instruction == _SUBTRACT:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    self._runtime_error("Operands must be numbers.")
+                stack[-1] = a - b
+            elif instruction == _LESS:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    self._runtime_error("Operands must be numbers.")
+                stack[-1] = a < b
+            elif instruction == _CALL:
+                arg_count: int = code[ip]
+                ip += 1
+                frame.ip = ip
+                callee = stack[-arg_count - 1]
+                if type(callee) is ObjClosure:
+                    self._call(callee, arg_count)
+                else:
+                    self._call_value(callee, arg_count)
+                frame = frames[-1]
+                closure = frame.closure
+                code = closure.function.chunk.code
+                constants = closure.function.chunk.constants
+                base = frame.base
+                ip = frame.ip
+            elif instruction == _INVOKE:
+                name = constants[code[ip]]  # type: ignore[reportAssignmentType]
+                arg_count = code[ip + 1]
+                ip += 2
+                frame.ip = ip
+                receiver = stack[-arg_count - 1]
+                if type(receiver) is not ObjInstance:
+                    self._runtime_error("Only instances have properties.")
+                fields = receiver.fields
+                if name in fields:
+                    value = fields[name]
+                    stack[-arg_count - 1] = value
+                    self._call_value(value, arg_count)
+                else:
+                    self._invoke_from_class(receiver.klass, name, arg_count)
+                frame = frames[-1]
+                closure = frame.closure
+                code = closure.function.chunk.code
+                constants = closure.function.chunk.constants
+                base = frame.base
+                ip = frame.ip
+            elif instruction == _TAIL_CALL:
+                arg_count = code[ip]
+                ip += 1
+                frame.ip = ip
+                callee = stack[-arg_count - 1]
+                if type(callee) is ObjClosure:
+                    self._tail_call(callee, arg_count)
+                elif type(callee) is ObjBoundMethod:
+                    stack[-arg_count - 1] = callee.receiver
+                    self._tail_call(callee.method, arg_count)
+                else:
+                    self._call_value(callee, arg_count)
+                frame = frames[-1]
+                closure = frame.closure
+                code = closure.function.chunk.code
+                constants = closure.function.chunk.constants
+                base = frame.base
+                ip = frame.ip
+            elif instruction == _TAIL_INVOKE:
+                name = constants[code[ip]]  # type: ignore[reportAssignmentType]
+                arg_count = code[ip + 1]
+                ip += 2
+                frame.ip = ip
+                receiver = stack[-arg_count - 1]
+                if type(receiver) is not ObjInstance:
+                    self._runtime_error("Only instances have properties.")
+                fields = receiver.fields
+                if name in fields:
+                    value = fields[name]
+                    stack[-arg_count - 1] = value
+                    if type(value) is ObjClosure:
+                        self._tail_call(value, arg_count)
+                    else:
+                        self._call_value(value, arg_count)
+                else:
+                    method = receiver.klass.methods.get(name)
+                    if method is None:
+                        self._runtime_error(f"Undefined property '{name}'.")
+                    self._tail_call(method, arg_count)
+                frame = frames[-1]
+                closure = frame.closure
+                code = closure.function.chunk.code
+                constants = closure.function.chunk.constants
+                base = frame.base
+                ip = frame.ip
+            elif instruction == _RETURN:
+                result = pop()
+                if self._open_upvalues:
+                    self._close_upvalues(base)
+                frames.pop()
+                del stack[base:]
+                if not frames:
+                    return
+                push(result)
+                frame = frames[-1]
+                closure = frame.closure
+                code = closure.function.chunk.code
+                constants = closure.function.chunk.constants
+                base = frame.base
+                ip = frame.ip
+            elif instruction == _SET_PROPERTY:
+                instance = stack[-2]
+                if type(instance) is not ObjInstance:
+                    frame.ip = ip + 1
+                    self._runtime_error("Only instances have fields.")
+                value = pop()
+                instance.fields[constants[code[ip]]] = value  # type: ignore[reportArgumentType]
+                ip += 1
+                stack[-1] = value
+            elif instruction == _SET_UPVALUE:
+                upvalue = closure.upvalues[code[ip]]
+                ip += 1
+                if upvalue.slot >= 0:
+                    stack[upvalue.slot] = stack[-1]
+                else:
+                    upvalue.closed = stack[-1]
+            elif instruction == _SET_GLOBAL:
+                name = constants[code[ip]]  # type: ignore[reportAssignmentType]
+                ip += 1
+                if name not in globals:
+                    frame.ip = ip
+                    self._runtime_error(f"Undefined variable '{name}'.")
+                globals[name] = stack[-1]
+            elif instruction == _NIL:
+                push(None)
+            elif instruction == _TRUE:
+                push(True)
+            elif instruction == _FALSE:
+                push(False)
+            elif instruction == _EQUAL:
+                b = pop()
+                a = stack[-1]
+                stack[-1] = type(a) is type(b) and a == b
+            elif instruction == _NOT_EQUAL:
+                b = pop()
+                a = stack[-1]
+                stack[-1] = type(a) is not type(b) or a != b
+            elif instruction == _GREATER:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    self._runtime_error("Operands must be numbers.")
+                stack[-1] = a > b
+            elif instruction == _GREATER_EQUAL:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    self._runtime_error("Operands must be numbers.")
+                stack[-1] = a >= b
+            elif instruction == _LESS_EQUAL:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    self._runtime_error("Operands must be numbers.")
+                stack[-1] = a <= b
+            elif instruction == _MULTIPLY:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    self._runtime_error("Operands must be numbers.")
+                stack[-1] = a * b
+            elif instruction == _DIVIDE:
+                b = pop()
+                a = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    self._runtime_error("Operands must be numbers.")
+                if b == 0:
+                    frame.ip = ip
+                    self._runtime_error("Right operand cannot be 0.")
+                stack[-1] = a / b
+            elif instruction == _NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+            elif instruction == _NEGATE:
+                value = stack[-1]
+                if type(value) is not float:
+                    frame.ip = ip
+                    self._runtime_error("Operand must be a number.")
+                stack[-1] = -value
+            elif instruction == _PRINT:
+                print(self._stringify(pop()))
+            elif instruction == _DEFINE_GLOBAL:
+                globals[constants[code[ip]]] = pop()  # type: ignore[reportArgumentType]
+                ip += 1
+            elif instruction == _GET_SUPER:
+                name = constants[code[ip]]  # type: ignore[reportAssignmentType]
+                ip += 1
+                superclass: ObjClass = pop()  # type: ignore[reportAssignmentType]
+                method = superclass.methods.get(name)
+                if method is None:
+                    frame.ip = ip
+                    self._runtime_error(f"Undefined property '{name}'.")
+                stack[-1] = ObjBoundMethod(stack[-1], method)
+            elif instruction == _SUPER_INVOKE:
+                name = constants[code[ip]]  # type: ignore[reportAssignmentType]
+                arg_count = code[ip + 1]
+                ip += 2
+                frame.ip = ip
+                superclass = pop()  # type: ignore[reportAssignmentType]
+                self._invoke_from_class(superclass, name, arg_count)
+                frame = frames[-1]
+                closure = frame.closure
+                code = closure.function.chunk.code
+                constants = closure.function.chunk.constants
+                base = frame.base
+                ip = frame.ip
+            elif instruction == _CLOSURE:
+                function: ObjFunction = constants[code[ip]]  # type: ignore[reportAssignmentType]
+                ip += 1
+                upvalues: list[ObjUpvalue] = []
+                for _ in range(function.upvalue_count):
+                    if code[ip]:
+                        upvalues.append(self._capture_upvalue(base + code[ip + 1]))
+                    else:
+                        upvalues.append(closure.upvalues[code[ip + 1]])
+                    ip += 2
+                push(ObjClosure(function, upvalues))
+            elif instruction == _CLOSE_UPVALUE:
+                self._close_upvalues(len(stack) - 1)
+                pop()
+            elif instruction == _CLASS:
+                push(ObjClass(constants[code[ip]]))  # type: ignore[reportArgumentType]
+                ip += 1
+            elif instruction == _INHERIT:
+                superclass = stack[-2]  # type: ignore[reportAssignmentType]
+                if type(superclass) is not ObjClass:
+                    frame.ip = ip
+                    self._runtime_error("Superclass must be a class.")
+                subclass: ObjClass = pop()  # type: ignore[reportAssignmentType]
+                subclass.methods.update(superclass.methods)
+            elif instruction == _METHOD:
+                klass: ObjClass = stack[-2]  # type: ignore[reportAssignmentType]
+                klass.methods[constants[code[ip]]] = pop()  # type: ignore[reportArgumentType]
+                ip += 1
+            else:
+                raise AssertionError(f"Unknown opcode {instruction}.")
@@ -0,0 +1,89 @@
+from __future__ import annotations
+from typing import Callable, Final, Optional
+
+from Chunk import Chunk
+
+
+class ObjFunction:
+    __slots__ = ("arity", "upvalue_count", "chunk", "name")
+
+    def __init__(self, name: Optional[str]) -> None:
+        self.arity: int = 0
+        self.upvalue_count: int = 0
+        self.chunk: Final[Chunk] = Chunk()
+        self.name: Final[Optional[str]] = name
+
+    def __str__(self) -> str:
+        if self.name is None:
+            return "<script>"
+        return f"<fn {self.name}>"
+
+
+class ObjNative:
+    __slots__ = ("arity", "function")
+
+    def __init__(self, arity: int, function: Callable[..., object]) -> None:
+        self.arity: Final[int] = arity
+        self.function: Final[Callable[..., object]] = function
+
+    def __str__(self) -> str:
+        return "<native fn>"
+
+
+class ObjUpvalue:
+    """A captured variable.
+
+    While the variable is still on the VM stack `slot` is its stack index;
+    once the variable goes out of scope the upvalue is closed, `slot` becomes
+    -1 and the value lives in `closed`.
+    """
+
+    __slots__ = ("slot", "closed")
+
+    def __init__(self, slot: int) -> None:
+        self.slot: int = slot
+        self.closed: object = None
+
+
+class ObjClosure:
+    __slots__ = ("function", "upvalues")
+
+    def __init__(self, function: ObjFunction, upvalues: list[ObjUpvalue]) -> None:
+        self.function: Final[ObjFunction] = function
+        self.upvalues: Final[list[ObjUpvalue]] = upvalues
+
+    def __str__(self) -> str:
+        return str(self.function)
+
+
+class ObjClass:
+    __slots__ = ("name", "methods")
+
+    def __init__(self, name: str) -> None:
+        self.name: Final[str] = name
+        self.methods: Final[dict[str, ObjClosure]] = {}
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class ObjInstance:
+    __slots__ = ("klass", "fields")
+
+    def __init__(self, klass: ObjClass) -> None:
+        self.klass: Final[ObjClass] = klass
+        self.fields: Final[dict[str, object]] = {}
+
+    def __str__(self) -> str:
+        return self.klass.name + " instance"
+
+
+class ObjBoundMethod:
+    __slots__ = ("receiver", "method")
+
+    def __init__(self, receiver: object, method: ObjClosure) -> None:
+        self.receiver: Final[object] = receiver
+        self.method: Final[ObjClosure] = method
+
+    def __str__(self) -> str:
+        return str(self.method.function)
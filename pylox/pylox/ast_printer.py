@@ -43,10 +43,10 @@ def main():
     expression = Binary(
         Unary(
             Token(TokenType.MINUS, "-", None, 1),
-            Literal(123),
+            Literal(123, Token(TokenType.NUMBER, "123", 123, 1)),
         ),
         Token(TokenType.STAR, "*", None, 1),
-        Grouping(Literal(45.67)),
+        Grouping(Literal(45.67, Token(TokenType.NUMBER, "45.67", 45.67, 1))),
     )
 
     print(AstPrinter().print(expression))
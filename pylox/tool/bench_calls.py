@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pylox"))
+
+from ClosureInterpreter import ClosureInterpreter  # noqa: E402
+from Interpreter import Interpreter  # noqa: E402
+from LoxCallable import LoxCallable  # noqa: E402
+from LoxClass import LoxClass  # noqa: E402
+from LoxFunction import LoxFunction  # noqa: E402
+from LoxInstance import LoxInstance  # noqa: E402
+from Parser import Parser  # noqa: E402
+from Resolver import Resolver  # noqa: E402
+from Scanner import Scanner  # noqa: E402
+
+# Each loop runs the same statement n times; only what the statement does
+# differs, so the difference between two loops is the cost of that part.
+_LOOPS: dict[str, str] = {
+    "no call": "x = nil;",
+    "call, falls off the end": "x = empty();",
+    "call, returns": "x = returns();",
+    "call, returns from a loop": "x = returns_from_loop();",
+}
+
+_PROGRAM = """
+fun empty() {{}}
+fun returns() {{ return nil; }}
+fun returns_from_loop() {{ while (true) {{ {{ return nil; }} }} }}
+{{
+  var x;
+  for (var i = 0; i < {n}; i = i + 1) {{ {body} }}
+}}
+"""
+
+
+def error(*_: object) -> None:
+    raise SystemExit("bench_calls: the benchmark program failed to compile")
+
+
+def run(engine: type[Interpreter], body: str, n: int) -> float:
+    interpreter = engine(LoxCallable, LoxFunction, LoxClass, LoxInstance)
+    source = _PROGRAM.format(n=n, body=body)
+    statements = Parser(Scanner(source, error).scan_tokens(), error).parse()
+    Resolver(interpreter, error).resolve(statements)
+
+    start = time.perf_counter()
+    interpreter.interpret(statements, error)
+    return time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) > 2:
+        print("Usage: bench_calls [iterations]", file=sys.stderr)
+        sys.exit(64)
+
+    n = int(sys.argv[1]) if len(sys.argv) == 2 else 200000
+    for name, engine in (("tree", Interpreter), ("closure", ClosureInterpreter)):
+        baseline = run(engine, _LOOPS["no call"], n)
+        for label, body in _LOOPS.items():
+            if body == _LOOPS["no call"]:
+                continue
+            overhead = (run(engine, body, n) - baseline) / n * 1e9
+            print(f"{name:>7}: {label:<26} {overhead:7.0f} ns per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pylox"))
+
+from Expr import Expr  # noqa: E402
+from Parser import Parser  # noqa: E402
+from Scanner import Scanner  # noqa: E402
+from Stmt import Stmt  # noqa: E402
+from Token import Token  # noqa: E402
+from measure_ast import synthetic_source  # noqa: E402
+
+
+class _Failed(Exception): ...
+
+
+def error(*_: object) -> None:
+    raise _Failed()
+
+
+def _dump(node: object) -> object:
+    """A comparable rendering of a syntax tree, down to its tokens."""
+    if isinstance(node, list):
+        return [_dump(item) for item in node]
+    if isinstance(node, Token):
+        return (node.type, node.lexeme, node.literal, node.line)
+    if not isinstance(node, (Expr, Stmt)):
+        return node
+    fields: list[object] = [type(node).__name__]
+    for klass in type(node).__mro__:
+        for name in getattr(klass, "__slots__", ()):
+            if hasattr(node, name):
+                fields.append((name, _dump(getattr(node, name))))
+    return tuple(fields)
+
+
+def measure(tokens: list[Token], precedence_climbing: bool) -> tuple[float, list[Stmt]]:
+    # The trees are big enough that collections triggered by one parser's
+    # allocations would mostly be spent traversing what the other one built.
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        statements = Parser(tokens, error, precedence_climbing).parse()
+        elapsed = time.perf_counter() - start
+    finally:
+        gc.enable()
+    return elapsed, statements
+
+
+def max_nesting(precedence_climbing: bool) -> int:
+    """The deepest parenthesized expression the parser gets through."""
+
+    def parses(depth: int) -> bool:
+        source = "print " + "(" * depth + "1" + ")" * depth + ";"
+        tokens = Scanner(source, error).scan_tokens()
+        try:
+            Parser(tokens, error, precedence_climbing).parse()
+        except (RecursionError, _Failed):
+            return False
+        return True
+
+    low, high = 1, 2
+    while parses(high):
+        low, high = high, high * 2
+    while high - low > 1:
+        middle = (low + high) // 2
+        if parses(middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def main():
+    if len(sys.argv) > 2:
+        print("Usage: bench_parser [script]", file=sys.stderr)
+        sys.exit(64)
+
+    if len(sys.argv) == 2:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            source = f.read()
+    else:
+        source = synthetic_source(6000)
+
+    try:
+        tokens = Scanner(source, error).scan_tokens()
+    except _Failed:
+        raise SystemExit("bench_parser: the source failed to scan")
+
+    print(f"source bytes: {len(source)}, {len(tokens)} tokens")
+    results = {}
+    for name, precedence_climbing in (("descent", False), ("climbing", True)):
+        try:
+            elapsed, statements = measure(tokens, precedence_climbing)
+        except _Failed:
+            raise SystemExit("bench_parser: the source failed to parse")
+        results[name] = _dump(statements)
+        print(
+            f"{name:>9}: {elapsed:.2f}s, {len(tokens) / elapsed:,.0f} tokens/s, "
+            f"nests {max_nesting(precedence_climbing)} parentheses deep"
+        )
+
+    if results["descent"] != results["climbing"]:
+        raise SystemExit("bench_parser: parsers produced different trees")
+
+
+if __name__ == "__main__":
+    main()
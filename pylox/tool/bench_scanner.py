@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pylox"))
+
+from Scanner import Scanner  # noqa: E402
+from measure_ast import synthetic_source  # noqa: E402
+
+
+def error(line: int, message: str) -> None:
+    raise SystemExit(f"bench_scanner: [line {line}] Error: {message}")
+
+
+def measure(source: str, table_driven: bool) -> tuple[int, float, list[tuple]]:
+    start = time.perf_counter()
+    tokens = Scanner(source, error, table_driven).scan_tokens()
+    elapsed = time.perf_counter() - start
+    return len(tokens), elapsed, [(t.type, t.lexeme, t.literal, t.line) for t in tokens]
+
+
+def main():
+    if len(sys.argv) > 2:
+        print("Usage: bench_scanner [script]", file=sys.stderr)
+        sys.exit(64)
+
+    if len(sys.argv) == 2:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            source = f.read()
+    else:
+        # About 10 MB of typical Lox.
+        source = synthetic_source(24000)
+
+    print(f"source bytes: {len(source)}")
+    results = {}
+    for name, table_driven in (("legacy", False), ("table-driven", True)):
+        count, elapsed, tokens = measure(source, table_driven)
+        results[name] = tokens
+        print(f"{name:>12}: {count} tokens in {elapsed:.2f}s, {count / elapsed:,.0f} tokens/s")
+
+    if results["legacy"] != results["table-driven"]:
+        raise SystemExit("bench_scanner: scanners produced different tokens")
+
+
+if __name__ == "__main__":
+    main()
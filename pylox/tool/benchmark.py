@@ -0,0 +1,277 @@
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Final, Optional
+
+_HERE: Final[str] = os.path.dirname(os.path.abspath(__file__))
+_LOX: Final[str] = os.path.join(_HERE, "..", "pylox", "Lox.py")
+_BENCHMARKS: Final[str] = os.path.join(_HERE, "..", "..", "test", "benchmark")
+
+# Benchmarks that run for a fixed time and print how much work they got
+# done, keyed by name, with the output line holding the amount of work. The
+# last line of their output is the time they actually ran for. Every other
+# benchmark is measured by how long it takes to finish.
+_THROUGHPUT: Final[dict[str, int]] = {
+    "zoo_batch": -2,
+}
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class Sample:
+    """One run of a benchmark in its own process."""
+
+    def __init__(self, wall: float, cpu: float, max_rss_kb: int, stdout: str) -> None:
+        self.wall: Final[float] = wall
+        self.cpu: Final[float] = cpu
+        self.max_rss_kb: Final[int] = max_rss_kb
+        self.stdout: Final[str] = stdout
+
+
+def _t_quantile(p: float, df: float) -> float:
+    # Cornish-Fisher expansion of Student's t around the normal quantile; within
+    # 1% of the exact value from two degrees of freedom up.
+    z = statistics.NormalDist().inv_cdf(p)
+    return (
+        z
+        + (z**3 + z) / (4 * df)
+        + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+        + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3)
+        + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z)
+        / (92160 * df**4)
+    )
+
+
+def summarize(values: list[float], confidence: float) -> dict[str, Any]:
+    mean = statistics.fmean(values)
+    stdev = statistics.stdev(values) if len(values) > 1 else 0.0
+    margin = 0.0
+    if len(values) > 1:
+        t = _t_quantile((1 + confidence) / 2, len(values) - 1)
+        margin = t * stdev / math.sqrt(len(values))
+    return {
+        "mean": mean,
+        "stdev": stdev,
+        "ci": [mean - margin, mean + margin],
+    }
+
+
+def run_once(script: str, engine: str, lox_flags: list[str], timeout: float) -> Sample:
+    command = [sys.executable, _LOX, f"--engine={engine}", *lox_flags, script]
+    with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdout=stdout, stderr=stderr)
+        timer = threading.Timer(timeout, process.kill)
+        timer.start()
+        # wait4 rather than Popen.wait, to get the child's own resource usage.
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+        timer.cancel()
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if wall >= timeout:
+            raise BenchmarkError(f"timed out after {timeout:g}s")
+
+        stdout.seek(0)
+        stderr.seek(0)
+        if process.returncode != 0:
+            message = " ".join(stderr.read().decode(errors="replace").split())
+            raise BenchmarkError(f"exited with {process.returncode}: {message}")
+        return Sample(
+            wall,
+            usage.ru_utime + usage.ru_stime,
+            usage.ru_maxrss,
+            stdout.read().decode(errors="replace"),
+        )
+
+
+def score(name: str, sample: Sample) -> float:
+    """The figure compared across runs: seconds, or work per second."""
+    if name not in _THROUGHPUT:
+        return sample.wall
+    lines = sample.stdout.split()
+    try:
+        work = float(lines[_THROUGHPUT[name]])
+        elapsed = float(lines[-1])
+    except (IndexError, ValueError):
+        raise BenchmarkError(f"unexpected output {sample.stdout!r}") from None
+    return work / elapsed
+
+
+def run_benchmark(
+    name: str, args: argparse.Namespace, lox_flags: list[str]
+) -> dict[str, Any]:
+    script = os.path.join(args.directory, f"{name}.lox")
+    for _ in range(args.warmup):
+        run_once(script, args.engine, lox_flags, args.timeout)
+    samples = [
+        run_once(script, args.engine, lox_flags, args.timeout) for _ in range(args.runs)
+    ]
+
+    scores = [score(name, sample) for sample in samples]
+    throughput = name in _THROUGHPUT
+    return {
+        "kind": "throughput" if throughput else "time",
+        "unit": "work/s" if throughput else "s",
+        "scores": scores,
+        "score": summarize(scores, args.confidence),
+        "wall": [sample.wall for sample in samples],
+        "cpu": [sample.cpu for sample in samples],
+        "max_rss_kb": [sample.max_rss_kb for sample in samples],
+    }
+
+
+def regression(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float,
+    confidence: float,
+) -> Optional[float]:
+    """Returns how much worse current is when that is significantly past threshold.
+
+    Welch's confidence interval for the difference of the mean scores has to
+    lie entirely beyond threshold times the baseline mean.
+    """
+    a: list[float] = baseline["scores"]
+    b: list[float] = current["scores"]
+    base_mean = statistics.fmean(a)
+    # Positive differences are always for the worse.
+    sign = -1 if current["kind"] == "throughput" else 1
+    difference = sign * (statistics.fmean(b) - base_mean)
+
+    var_a = statistics.variance(a) / len(a) if len(a) > 1 else 0.0
+    var_b = statistics.variance(b) / len(b) if len(b) > 1 else 0.0
+    margin = 0.0
+    if var_a + var_b > 0:
+        # Welch-Satterthwaite degrees of freedom.
+        df = (var_a + var_b) ** 2 / (
+            (var_a**2 / (len(a) - 1) if len(a) > 1 else 0.0)
+            + (var_b**2 / (len(b) - 1) if len(b) > 1 else 0.0)
+        )
+        margin = _t_quantile((1 + confidence) / 2, df) * math.sqrt(var_a + var_b)
+
+    if difference - margin > threshold * base_mean:
+        return difference / base_mean
+    return None
+
+
+def available(directory: str) -> list[str]:
+    return sorted(
+        name.removesuffix(".lox") for name in os.listdir(directory) if name.endswith(".lox")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="benchmark",
+        description="Runs test/benchmark scripts in fresh pylox processes.",
+        epilog="Arguments after -- are passed on to pylox.",
+    )
+    parser.add_argument("benchmarks", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument(
+        "--directory",
+        default=_BENCHMARKS,
+        help="where the benchmark scripts are (default: test/benchmark)",
+    )
+    parser.add_argument("--engine", default="tree", help="pylox engine (default: tree)")
+    parser.add_argument("--runs", type=int, default=5, help="measured runs (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured runs (default: 1)")
+    parser.add_argument(
+        "--timeout", type=float, default=600, help="seconds allowed per run (default: 600)"
+    )
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE")
+    parser.add_argument(
+        "--baseline", metavar="FILE", help="compare with the --json results of an earlier run"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.05,
+        help="relative slowdown counted as a regression (default: 0.05)",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="confidence level of intervals and regressions (default: 0.95)",
+    )
+    argv = sys.argv[1:]
+    lox_flags: list[str] = []
+    if "--" in argv:
+        lox_flags = argv[argv.index("--") + 1 :]
+        argv = argv[: argv.index("--")]
+    args = parser.parse_args(argv)
+
+    if args.runs < 1 or args.warmup < 0:
+        parser.error("--runs must be at least 1 and --warmup at least 0")
+    if not 0 < args.confidence < 1:
+        parser.error("--confidence must be between 0 and 1")
+
+    names = args.benchmarks or available(args.directory)
+    unknown = [name for name in names if name not in available(args.directory)]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    baseline: dict[str, dict[str, Any]] = {}
+    if args.baseline is not None:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["benchmarks"]
+
+    benchmarks: dict[str, dict[str, Any]] = {}
+    results: dict[str, Any] = {
+        "engine": args.engine,
+        "lox_flags": lox_flags,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "runs": args.runs,
+        "warmup": args.warmup,
+        "confidence": args.confidence,
+        "benchmarks": benchmarks,
+    }
+    failed = False
+    regressed = False
+    for name in names:
+        try:
+            result = run_benchmark(name, args, lox_flags)
+        except BenchmarkError as e:
+            print(f"{name:>16}: failed, {e}", file=sys.stderr)
+            failed = True
+            continue
+        benchmarks[name] = result
+
+        low, high = result["score"]["ci"]
+        line = (
+            f"{name:>16}: {result['score']['mean']:10.4g} {result['unit']:<6}"
+            f" [{low:.4g}, {high:.4g}]"
+            f"  cpu {statistics.fmean(result['cpu']):.3g}s"
+            f"  rss {max(result['max_rss_kb']) // 1024} MB"
+        )
+        if name in baseline and baseline[name]["kind"] == result["kind"]:
+            worse = regression(result, baseline[name], args.threshold, args.confidence)
+            if worse is not None:
+                line += f"  REGRESSION {worse:+.1%}"
+                regressed = True
+        print(line)
+
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if failed:
+        sys.exit(70)
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
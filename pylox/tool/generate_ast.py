@@ -13,50 +13,105 @@ def generate_ast():
         output_dir,
         "Expr",
         [
-            "Assign   : name: Token, value: Expr",
+            "from typing import TYPE_CHECKING, Final, Optional, override",
+            "",
+            "from Token import Token",
+            "",
+            "if TYPE_CHECKING:",
+            "    from GlobalEnvironment import GlobalCell",
+            "    from LoxClass import LoxClass",
+            "    from LoxFunction import LoxFunction",
+            "    from Shape import Shape",
+        ],
+        [
+            "Assign   : name: Token, value: Expr"
+            " | access: Optional[int], slot: Optional[int], cell: Optional[GlobalCell]",
             "Binary   : left: Expr, operator: Token, right: Expr",
-            "Call     : callee: Expr, paren: Token, arguments: list[Expr]",
-            "Get      : object: Expr , name: Token",
+            "Add          < Binary",
+            "FloatAdd     < Add",
+            "StringAdd    < Add",
+            "Subtract     < Binary",
+            "Multiply     < Binary",
+            "Divide       < Binary",
+            "Less         < Binary",
+            "LessEqual    < Binary",
+            "Greater      < Binary",
+            "GreaterEqual < Binary",
+            "Equal        < Binary",
+            "NotEqual     < Binary",
+            "Call     : callee: Expr, line: int, arguments: list[Expr]",
+            "Get      : object: Expr, name: Token"
+            " | cached_class: Optional[LoxClass], cached_method: Optional[LoxFunction],"
+            " cached_shape: Optional[Shape], cached_slot: Optional[int]",
+            "FieldGet     < Get",
+            "GenericGet   < Get",
             "Grouping : expression: Expr",
-            "Literal  : value: object",
+            "Literal  : value: object, token: Token",
             "Logical  : left: Expr, operator: Token, right: Expr",
-            "Set      : object: Expr, name: Token, value: Expr",
-            "Super    : keyword: Token, method: Token",
+            "And          < Logical",
+            "Or           < Logical",
+            "Set      : object: Expr, name: Token, value: Expr"
+            " | cached_shape: Optional[Shape], cached_slot: Optional[int],"
+            " cached_next: Optional[Shape]",
+            "Super    : keyword: Token, method: Token, this: This"
+            " | access: Optional[int], slot: Optional[int],"
+            " cached_class: Optional[LoxClass], cached_method: Optional[LoxFunction]",
             "Unary    : operator: Token, right: Expr",
-            "This     : keyword: Token",
-            "Variable : name: Token",
+            "Negate       < Unary",
+            "Not          < Unary",
+            "This     : keyword: Token | access: Optional[int], slot: Optional[int]",
+            "Variable : name: Token"
+            " | access: Optional[int], slot: Optional[int], cell: Optional[GlobalCell]",
         ],
     )
 
     define_ast(
         output_dir,
         "Stmt",
+        [
+            "from typing import TYPE_CHECKING, Final, Optional, override",
+            "",
+            "from Token import Token",
+            "from Expr import Expr, Variable",
+            "",
+            "if TYPE_CHECKING:",
+            "    from Environment import Upvalue",
+            "    from PreParser import LazyBody",
+        ],
         [
             "Block      : statements: list[Stmt]",
-            "Class      : name: Token, super_class: Optional[Variable], methods: list[Function]",
+            "Class      : name: Token, super_class: Optional[Variable], methods: list[Function]"
+            " | slot: Optional[int], captured: Optional[bool], super_slot: Optional[int]",
             "Expression : expression: Expr",
-            "Function   : name: Token, params: list[Token], body: list[Stmt]",
+            "For        : initializer: Optional[Stmt], condition: Expr,"
+            " increment: Optional[Expr], body: Stmt",
+            "Function   : name: Token, params: list[Token], body: list[Stmt]"
+            " | slot: Optional[int], captured: Optional[bool], locals: Optional[int],"
+            " captured_params: Optional[list[int]], upvalues: Optional[list[Upvalue]],"
+            " lazy: Optional[LazyBody]",
             "If         : condition: Expr, thenBranch: Stmt, elseBranch: Stmt",
             "Print      : expression: Expr",
             "Return     : keyword: Token, value: Expr",
-            "Var        : name: Token, initializer: Expr",
+            "Var        : name: Token, initializer: Expr"
+            " | slot: Optional[int], captured: Optional[bool]",
             "While      : condition: Expr, body: Stmt",
         ],
     )
 
 
-def define_ast(output_dir: str, base_name: str, types: list[str]):
+def define_ast(output_dir: str, base_name: str, imports: list[str], types: list[str]):
     with open(f"{output_dir}/{base_name}.py", mode="w", encoding="utf-8") as f:
+        f.write("from __future__ import annotations\n")
+        f.write("from abc import ABC, abstractmethod\n")
+        for line in imports:
+            f.write(f"{line}\n")
         f.write(
             f"""
-from __future__ import annotations
-from abc import ABC, abstractmethod
-from typing import Final, override
-
-from Token import Token
-
 
 class {base_name}(ABC):
+    # Nodes have no per-instance __dict__; every subclass lists its fields.
+    __slots__ = ()
+
     @abstractmethod
     def accept[R](self, visitor: Visitor[R]) -> R: ...
 
@@ -66,34 +121,84 @@ class {base_name}(ABC):
 
         define_visitor(f, base_name, types)
         for type in types:
-            cls_name = type.split(":", maxsplit=1)[0].strip()
-            fields = type.split(":", maxsplit=1)[1].strip()
-            define_type(f, base_name, cls_name, fields)
+            if "<" in type:
+                cls_name, kind_of = (part.strip() for part in type.split("<"))
+                define_kind(f, base_name, cls_name, kind_of)
+            else:
+                cls_name = type.split(":", maxsplit=1)[0].strip()
+                fields = type.split(":", maxsplit=1)[1].strip()
+                define_type(f, base_name, cls_name, fields)
+            if type != types[-1]:
+                f.write("\n\n")
 
 
 def define_visitor(f: TextIO, base_name: str, types: list[str]):
     f.write("class Visitor[R]:\n")
     for type in types:
-        type_name = type.split(":", maxsplit=1)[0].strip()
-
-        f.writelines(
-            [
-                "    @abstractmethod\n",
-                f"    def visit_{type_name}_{base_name}(self, {base_name.lower()}: {type_name}) -> R: ...\n",
-                "\n",
-            ]
-        )
+        parameter = base_name.lower()
+        if "<" in type:
+            # Visitors that don't tell kinds apart see the node they refine.
+            type_name, kind_of = (part.strip() for part in type.split("<"))
+            f.writelines(
+                [
+                    f"    def visit_{type_name}_{base_name}(self, {parameter}: {type_name}) -> R:\n",
+                    f"        return self.visit_{kind_of}_{base_name}({parameter})\n",
+                ]
+            )
+        else:
+            type_name = type.split(":", maxsplit=1)[0].strip()
+            f.writelines(
+                [
+                    "    @abstractmethod\n",
+                    f"    def visit_{type_name}_{base_name}(self, {parameter}: {type_name}) -> R: ...\n",
+                ]
+            )
+        if type != types[-1]:
+            f.write("\n")
+    f.write("\n\n")
+
+
+def define_kind(f: TextIO, base_name: str, cls_name: str, kind_of: str):
+    # A kind of an existing node, with the same fields, that visitors can
+    # handle on its own.
+    f.write(f"class {cls_name}({kind_of}):\n")
+    f.write("    __slots__ = ()\n")
+    f.write("\n")
+    f.writelines(
+        [
+            "    @override\n",
+            "    def accept[R](self, visitor: Visitor[R]) -> R:\n",
+            f"        return visitor.visit_{cls_name}_{base_name}(self)\n",
+        ]
+    )
 
 
 def define_type(f: TextIO, base_name: str, cls_name: str, field_list: str):
+    # Fields after a "|" are mutable, start out as None and are not
+    # constructor parameters; the resolver keeps what it finds out about a
+    # node in them, and the interpreters keep caches.
+    field_list, _, cache_list = (part.strip() for part in field_list.partition("|"))
+    fields = [field.split(":") for field in field_list.split(",")]
+    caches = [field.split(":") for field in cache_list.split(",")] if cache_list else []
+    names = [name.strip() for name, _ in fields + caches]
     f.write(f"class {cls_name}({base_name}):\n")
-    f.write(f"    def __init__(self, {field_list}):\n")
+    slots = ", ".join(f'"{name}"' for name in names)
+    if len(names) == 1:
+        slots += ","
+    f.write(f"    __slots__ = ({slots})\n")
+    f.write("\n")
+    signature = f"    def __init__(self, {field_list}):"
+    if len(signature) > 88:
+        f.write("    def __init__(\n")
+        f.write(f"        self, {field_list}\n")
+        f.write("    ):\n")
+    else:
+        f.write(f"{signature}\n")
     f.write("        super().__init__()\n")
-    fields = field_list.split(",")
-    for field in fields:
-        field_name = field.split(":")[0].strip()
-        field_type = field.split(":")[1].strip()
-        f.write(f"        self.{field_name}: Final[{field_type}] = {field_name}\n")
+    for name, type in fields:
+        f.write(f"        self.{name.strip()}: Final[{type.strip()}] = {name.strip()}\n")
+    for name, type in caches:
+        f.write(f"        self.{name.strip()}: {type.strip()} = None\n")
     f.write("\n")
     f.writelines(
         [
@@ -102,7 +207,6 @@ def define_type(f: TextIO, base_name: str, cls_name: str, field_list: str):
             f"        return visitor.visit_{cls_name}_{base_name}(self)\n",
         ]
     )
-    f.write("\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pylox"))
+
+from Expr import Expr  # noqa: E402
+from Parser import Parser  # noqa: E402
+from Scanner import Scanner  # noqa: E402
+from Stmt import Stmt  # noqa: E402
+
+
+def synthetic_source(functions: int) -> str:
+    lines: list[str] = []
+    for i in range(functions):
+        lines.extend(
+            [
+                f"class Shape{i} {{",
+                "  init(width, height) {",
+                "    this.width = width;",
+                "    this.height = height;",
+                "  }",
+                "  area() { return this.width * this.height; }",
+                "}",
+                f"fun compute{i}(n) {{",
+                f"  var shape = Shape{i}(n, n + {i});",
+                "  var total = 0;",
+                "  for (var k = 0; k < n; k = k + 1) {",
+                "    if (k == 2 or total > 100) total = total - 1;",
+                '    else total = total + shape.area() / 2 + (-k);',
+                "  }",
+                '  print "result" + " " + "done";',
+                "  return total;",
+                "}",
+            ]
+        )
+    return "\n".join(lines) + "\n"
+
+
+def count_nodes(statements: list[Stmt]) -> int:
+    count = 0
+    seen: set[int] = set()
+    pending: list[object] = list(statements)
+    while pending:
+        node = pending.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, list):
+            pending.extend(node)
+            continue
+        if not isinstance(node, (Expr, Stmt)):
+            continue
+        count += 1
+        for name in _fields(node):
+            pending.append(getattr(node, name))
+    return count
+
+
+def _fields(node: object) -> list[str]:
+    if hasattr(node, "__dict__"):
+        return list(vars(node))
+    names: list[str] = []
+    for klass in type(node).__mro__:
+        names.extend(getattr(klass, "__slots__", ()))
+    return [name for name in names if hasattr(node, name)]
+
+
+def error(*_: object) -> None:
+    raise SystemExit("measure_ast: the synthetic source failed to parse")
+
+
+def main():
+    if len(sys.argv) > 2:
+        print("Usage: measure_ast [script]", file=sys.stderr)
+        sys.exit(64)
+
+    if len(sys.argv) == 2:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            source = f.read()
+    else:
+        source = synthetic_source(2000)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    statements: list[Stmt] = Parser(Scanner(source, error).scan_tokens(), error).parse()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    nodes = count_nodes(statements)
+    print(f"source bytes:     {len(source)}")
+    print(f"AST nodes:        {nodes}")
+    print(f"retained bytes:   {retained}")
+    print(f"bytes per node:   {retained / nodes:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pylox"))
+
+from ClosureInterpreter import ClosureInterpreter  # noqa: E402
+from Interpreter import Interpreter  # noqa: E402
+from LoxCallable import LoxCallable  # noqa: E402
+from LoxClass import LoxClass  # noqa: E402
+from LoxFunction import LoxFunction  # noqa: E402
+from LoxInstance import LoxInstance  # noqa: E402
+from Parser import Parser  # noqa: E402
+from Resolver import Resolver  # noqa: E402
+from Scanner import Scanner  # noqa: E402
+
+# Each run is a new program, as a REPL line or an embedded script would be,
+# with locals, closures and methods for the resolver to report on. The
+# globals it defines replace those of the run before.
+_PROGRAM = """
+class Counter {{
+  init(start) {{ this.count = start; }}
+  add(n) {{ var next = this.count + n; this.count = next; return next; }}
+}}
+fun make(n) {{
+  var total = {run};
+  fun step(k) {{ total = total + k; return total; }}
+  return step;
+}}
+{{
+  var counter = Counter({run});
+  var step = make({run});
+  for (var i = 0; i < 10; i = i + 1) {{ counter.add(step(i)); }}
+  result = counter.count;
+}}
+"""
+
+
+def error(*_: object) -> None:
+    raise SystemExit("soak_resolver: the soak program failed to compile")
+
+
+def run(interpreter: Interpreter, n: int) -> None:
+    source = _PROGRAM.format(run=n)
+    statements = Parser(Scanner(source, error).scan_tokens(), error).parse()
+    Resolver(interpreter, error).resolve(statements)
+    interpreter.interpret(statements, error)
+
+
+def main():
+    if len(sys.argv) > 2:
+        print("Usage: soak_resolver [runs]", file=sys.stderr)
+        sys.exit(64)
+
+    runs = int(sys.argv[1]) if len(sys.argv) == 2 else 6000
+    # Memory is measured from the end of the first tenth of the runs, once
+    # everything allocated only once has been.
+    warm_up = max(runs // 10, 1)
+    for name, engine in (("tree", Interpreter), ("closure", ClosureInterpreter)):
+        interpreter = engine(LoxCallable, LoxFunction, LoxClass, LoxInstance)
+        interpreter.globals.define("result", None)
+        tracemalloc.start()
+        for n in range(warm_up):
+            run(interpreter, n)
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+        for n in range(warm_up, runs):
+            run(interpreter, n)
+        gc.collect()
+        growth = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        print(
+            f"{name:>7}: {runs - warm_up} runs after {warm_up} to warm up, "
+            f"{growth} bytes retained, {growth / (runs - warm_up):.1f} per run"
+        )
+
+
+if __name__ == "__main__":
+    main()